@@ -0,0 +1,71 @@
+"""Clustering time and label agreement of raw vs dimension-reduced HDBSCAN.
+
+Synthetic embeddings are drawn around random centers on the unit sphere, so
+label agreement (adjusted Rand index) is reported against the raw path and
+against the generating centers.
+
+    python benchmarks/bench_clustering.py --sizes 10000 100000 --dim 1536 --components 32
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+
+from bsai.src.domain.clusterer import HDBSCANClusterer
+
+
+def synthetic_embeddings(
+    n: int, dim: int, n_centers: int = 50, noise: float = 0.6, seed: int = 0
+) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_centers, dim)).astype(np.float32)
+    truth = rng.integers(n_centers, size=n)
+    vectors = centers[truth] + noise * rng.normal(size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors, truth
+
+
+def timed_fit(clusterer: HDBSCANClusterer, vectors) -> tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    labels = np.asarray(clusterer.clusterize(vectors))
+    return labels, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--components", type=int, default=32)
+    parser.add_argument("--reduction", type=str, default="pca", choices=["pca", "svd"])
+    parser.add_argument("--min-cluster-size", type=int, default=15)
+    parser.add_argument("--skip-raw", action="store_true", help="only time the reduced path")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        vectors, truth = synthetic_embeddings(n, args.dim)
+        reduced = HDBSCANClusterer(
+            min_cluster_size=args.min_cluster_size,
+            n_components=args.components,
+            reduction=args.reduction,
+        )
+        reduced_labels, reduced_time = timed_fit(reduced, vectors)
+        line = (
+            f"n={n} dim={args.dim}: {args.reduction}-{args.components} {reduced_time:.1f}s "
+            f"(ARI vs truth {adjusted_rand_score(truth, reduced_labels):.3f})"
+        )
+        if not args.skip_raw:
+            # the current path: raw vectors handed over as Python lists
+            raw_labels, raw_time = timed_fit(
+                HDBSCANClusterer(min_cluster_size=args.min_cluster_size), vectors.tolist()
+            )
+            line += (
+                f", raw {raw_time:.1f}s (ARI vs truth {adjusted_rand_score(truth, raw_labels):.3f}), "
+                f"speedup {raw_time / reduced_time:.1f}x, "
+                f"ARI reduced vs raw {adjusted_rand_score(raw_labels, reduced_labels):.3f}"
+            )
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Memory and time of array-backed batches against the former pydantic models.
+
+For an (n, dim) embedding batch, times the hand-off from vectorizer output to
+a `Vector`, the conversion back to a float32 matrix for clustering, and a
+`Cluster` over the labels, and reports peak traced memory of each path.
+
+    python -m benchmarks.bench_dto --n 10000 --dim 1536
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+from pydantic import BaseModel
+
+from bsai.src.types.dto import Cluster, Vector
+
+
+class LegacyVector(BaseModel):
+    urls: list[str]
+    vectors: list[list[float]]
+
+
+class LegacyCluster(BaseModel):
+    urls: list[str]
+    labels: list[int]
+    texts: list[str]
+
+
+def legacy(urls: list[str], matrix: np.ndarray, labels: np.ndarray) -> dict:
+    # vectorizers returned nested lists that pydantic validated float by float
+    start = time.perf_counter()
+    vectors = LegacyVector(urls=urls, vectors=matrix.tolist())
+    built = time.perf_counter()
+    dense = np.asarray(vectors.vectors, dtype=np.float32)
+    converted = time.perf_counter()
+    clusters = LegacyCluster(urls=urls, labels=labels.tolist(), texts=[""] * len(urls))
+    done = time.perf_counter()
+    del vectors, dense, clusters
+    return {"vector": built - start, "to_matrix": converted - built, "cluster": done - converted}
+
+
+def array_backed(urls: list[str], matrix: np.ndarray, labels: np.ndarray) -> dict:
+    start = time.perf_counter()
+    vectors = Vector(urls=urls, vectors=matrix).validate()
+    built = time.perf_counter()
+    dense = np.asarray(vectors.vectors, dtype=np.float32)
+    converted = time.perf_counter()
+    clusters = Cluster(urls=urls, labels=labels, texts=[""] * len(urls)).validate()
+    done = time.perf_counter()
+    del vectors, dense, clusters
+    return {"vector": built - start, "to_matrix": converted - built, "cluster": done - converted}
+
+
+def measure(func, urls: list[str], matrix: np.ndarray, labels: np.ndarray) -> dict:
+    """Times from an untraced run, since tracing slows allocation-heavy code; peak from a traced one"""
+    gc.collect()
+    seconds = func(urls, matrix, labels)
+    gc.collect()
+    tracemalloc.start()
+    func(urls, matrix, labels)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {**seconds, "total": sum(seconds.values()), "peak_mb": peak / 2**20}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=10_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(args.n, args.dim)).astype(np.float32)
+    labels = rng.integers(-1, 50, args.n)
+    urls = [f"https://example.com/{i}" for i in range(args.n)]
+    print(f"{args.n} x {args.dim} float32 embeddings ({matrix.nbytes / 2**20:.0f} MB raw)")
+
+    results = {
+        "pydantic lists": measure(legacy, urls, matrix, labels),
+        "array-backed": measure(array_backed, urls, matrix, labels),
+    }
+    print(f"  {'':<16}{'vector s':>10}{'matrix s':>10}{'cluster s':>11}{'total s':>10}{'peak MB':>10}")
+    for name, row in results.items():
+        print(
+            f"  {name:<16}{row['vector']:>10.3f}{row['to_matrix']:>10.3f}{row['cluster']:>11.3f}"
+            f"{row['total']:>10.3f}{row['peak_mb']:>10.0f}"
+        )
+    before, after = results["pydantic lists"], results["array-backed"]
+    print(
+        f"  {before['total'] / after['total']:.0f}x faster, "
+        f"{before['peak_mb'] - after['peak_mb']:.0f} MB less peak memory"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""End-to-end ingest benchmark on synthetic bookmark exports with simulated APIs.
+
+Writes an export of each requested size, then runs `pipeline_urls` (or the
+streaming variant) per repository backend, with the parser, LLM and vectorizer
+replaced by fakes that inject latency and failures. Reports per-stage
+throughput, p50/p99 latency and peak traced memory. Postgres runs only with
+`--postgres-dsn` pointing at a scratch database; its tables are truncated first.
+
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 --backends df sqlite \\
+        --parser-latency 0.05 --llm-latency 0.2 --failure-rate 0.02 --json report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import asyncpg
+from loguru import logger
+
+from benchmarks.synthetic import (
+    FakeLLM,
+    FakeParser,
+    FakeVectorizer,
+    Latency,
+    Recorder,
+    Timed,
+    write_bookmark_export,
+)
+from bsai.src.api.bookmarks import read_bookmarks
+from bsai.src.domain.clusterer import HDBSCANClusterer
+from bsai.src.domain.core import pipeline_urls, pipeline_urls_streaming
+from bsai.src.domain.dedup import Deduplicator
+from bsai.src.domain.ledger import StageLedger
+from bsai.src.domain.repository import DFRepository, PostgresRepository, SQLiteRepository
+
+# pipeline-facing calls reported as stages, in pipeline order
+STAGES = {
+    "parser.extract": "fetch",
+    "llm.get_summary": "summarize",
+    "vectorizer.fit_transform": "embed",
+    "clusterer.clusterize": "cluster",
+    "clusterer.predict": "predict",
+    "llm.get_cluster_topics": "topics",
+}
+
+
+async def _truncate(dsn: str):
+    conn = await asyncpg.connect(dsn)
+    try:
+        await conn.execute("TRUNCATE urls, texts, summaries, vectors, clusters")
+    except asyncpg.UndefinedTableError:
+        pass
+    finally:
+        await conn.close()
+
+
+def build_repository(backend: str, path: str, dsn: str | None):
+    if backend == "df":
+        return DFRepository(path)
+    if backend == "sqlite":
+        return SQLiteRepository(path)
+    if backend == "postgres":
+        asyncio.run(_truncate(dsn))
+        return PostgresRepository(dsn)
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+def run(args, backend: str, urls: list[str], workdir: str) -> dict:
+    recorder = Recorder()
+    parser = FakeParser(
+        Latency(args.parser_latency, failure_rate=args.failure_rate, seed=1),
+        recorder,
+        max_workers=args.parser_workers,
+        mirror_rate=args.mirror_rate,
+    )
+    llm = FakeLLM(
+        Latency(args.llm_latency, failure_rate=args.failure_rate, seed=2),
+        recorder,
+        max_concurrency=args.llm_concurrency,
+    )
+    vectorizer = FakeVectorizer(
+        Latency(args.embed_latency, failure_rate=args.embed_failure_rate, seed=3),
+        recorder,
+        dim=args.dim,
+    )
+    clusterer = HDBSCANClusterer(min_cluster_size=10, n_components=args.components)
+    repository = build_repository(backend, os.path.join(workdir, backend), args.postgres_dsn)
+    ledger = StageLedger(os.path.join(workdir, backend, "ledger.sqlite"), backoff=0.0)
+    deduplicator = Deduplicator(os.path.join(workdir, backend, "dedup.sqlite")) if args.dedup else None
+
+    components = [
+        Timed(parser, "parser", recorder),
+        Timed(vectorizer, "vectorizer", recorder),
+        Timed(clusterer, "clusterer", recorder),
+        Timed(llm, "llm", recorder),
+        Timed(repository, "repository", recorder),
+    ]
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    for i in range(0, len(urls), args.batch_size):
+        batch = urls[i:i + args.batch_size]
+        if args.streaming:
+            pipeline_urls_streaming(
+                batch, *components, incremental=args.incremental, ledger=ledger,
+                batch_size=args.stream_batch_size, deduplicator=deduplicator,
+            )
+        else:
+            pipeline_urls(
+                batch, *components, incremental=args.incremental, ledger=ledger,
+                deduplicator=deduplicator,
+            )
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+
+    if backend == "postgres":
+        repository.close()
+    return {
+        "backend": backend,
+        "urls": len(urls),
+        "seconds": elapsed,
+        "urls_per_s": len(urls) / elapsed,
+        "peak_mb": peak / 2**20,
+        "ledger": ledger.summary(),
+        "calls": recorder.summary(),
+    }
+
+
+def print_report(result: dict):
+    print(
+        f"\n[{result['backend']}] {result['urls']} urls in {result['seconds']:.1f}s "
+        f"({result['urls_per_s']:.1f} urls/s), peak {result['peak_mb']:.0f} MB, "
+        f"ledger {result['ledger']}"
+    )
+    print(f"  {'call':<34}{'calls':>7}{'items':>8}{'fail':>6}{'items/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    calls = result["calls"]
+    names = [name for name in STAGES if name in calls]
+    names += sorted(name for name in calls if name not in STAGES)
+    for name in names:
+        row = calls[name]
+        label = f"{STAGES[name]} ({name})" if name in STAGES else name
+        print(
+            f"  {label:<34}{row['calls']:>7}{row['items']:>8}{row['failures']:>6}"
+            f"{row['items_per_s']:>10.1f}{row['p50_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000])
+    parser.add_argument("--backends", nargs="+", default=["df", "sqlite"], choices=["df", "sqlite", "postgres"])
+    parser.add_argument("--postgres-dsn", type=str, default=None)
+    parser.add_argument("--batch-size", type=int, default=1000, help="urls per pipeline call")
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--stream-batch-size", type=int, default=64)
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--parser-latency", type=float, default=0.02)
+    parser.add_argument("--parser-workers", type=int, default=16)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--llm-concurrency", type=int, default=16)
+    parser.add_argument("--embed-latency", type=float, default=0.1)
+    parser.add_argument("--mirror-rate", type=float, default=0.0, help="share of pages copying another")
+    parser.add_argument("--dedup", action="store_true", help="skip near-duplicate pages")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--embed-failure-rate", type=float, default=0.0)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--components", type=int, default=32)
+    parser.add_argument("--json", type=str, default=None, help="write the full report here")
+    args = parser.parse_args()
+    if "postgres" in args.backends and not args.postgres_dsn:
+        parser.error("--postgres-dsn is required for the postgres backend")
+
+    logger.remove()
+    tracemalloc.start()
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            export = write_bookmark_export(os.path.join(workdir, f"bookmarks_{size}.html"), size)
+            start = time.perf_counter()
+            urls = [bookmark.url for bookmark in read_bookmarks(export)]
+            print(f"\nRead {len(urls)} unique of {size} bookmarks in {time.perf_counter() - start:.2f}s")
+            for backend in args.backends:
+                result = run(args, backend, urls, os.path.join(workdir, str(size)))
+                result["size"] = size
+                print_report(result)
+                results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Import-time benchmark for the CLI, dependency wiring and each backend module.
+
+Every measurement runs in a fresh interpreter so module caches do not carry
+over; reports the median wall time of `--runs` runs. The read-only `recommend`
+and `search` commands run end to end against a small data directory prepared
+in a temporary `DATA_PATH`, once per file-based backend.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+MODULES = [
+    "bsai.src.api.cli",
+    "config",
+    "bsai.src.dependency",
+    "bsai.src.domain.repository",
+    "bsai.src.domain.openai_vectorizer",
+    "bsai.src.domain.transformer_vectorizer",
+    "bsai.src.domain.clusterer",
+    "bsai.src.domain.llm",
+    "bsai.src.domain.parser",
+    "bsai.src.visualization",
+    "bsai.src.domain.core",
+    "bsai.src.api.html_handler",
+]
+
+
+def prepare_data(path: str, backend: str = "df", n: int = 200, dim: int = 1536):
+    """Summaries, vectors and two clusters for `n` bookmarks in a file-based repository"""
+    from bsai.src.dependency import load_backend
+    from bsai.src.types.dto import Cluster, Summary, Vector
+
+    urls = [f"https://example.com/{i}" for i in range(n)]
+    repository = load_backend("repository", backend)(path)
+    repository.save_urls(urls)
+    repository.save_summaries(Summary(urls=urls, texts=[f"summary {i}" for i in range(n)]))
+    vectors = np.random.default_rng(0).standard_normal((n, dim)).astype(np.float32)
+    repository.save_vectors(Vector(urls=urls, vectors=vectors))
+    labels = np.arange(n, dtype=np.int64) % 2
+    repository.save_clusters(Cluster(urls=urls, labels=labels, texts=[f"topic {l}" for l in labels]))
+    return urls
+
+
+def timed_run(command: list[str], runs: int, env: dict | None = None) -> float | None:
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(command, capture_output=True, env=env or os.environ.copy())
+        if result.returncode != 0:
+            return None
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--backends", nargs="+", default=["df", "sqlite"])
+    args = parser.parse_args()
+
+    baseline = timed_run([sys.executable, "-c", "pass"], args.runs)
+    print(f"{'interpreter':<44}{baseline * 1000:>9.0f} ms")
+    targets = [(module, [sys.executable, "-c", f"import {module}"], None) for module in args.modules]
+    cli = [sys.executable, "-m", "bsai.src.api.cli"]
+    targets.append(("bsai --help", cli + ["--help"], None))
+
+    data_path = tempfile.mkdtemp(prefix="bsai-bench-")
+    try:
+        for backend in args.backends:
+            path = os.path.join(data_path, backend)
+            urls = prepare_data(path, backend)
+            env = {**os.environ, "DATA_PATH": path, "DATA_BACKEND": backend}
+            targets.append((f"bsai recommend -n 2 ({backend})", cli + ["recommend", "-n", "2"], env))
+            # a stored url is answered from the index without building a vectorizer
+            targets.append((f"bsai search <stored url> ({backend})", cli + ["search", urls[0]], env))
+        for name, command, command_env in targets:
+            seconds = timed_run(command, args.runs, command_env)
+            if seconds is None:
+                print(f"{name:<44}{'failed':>9}")
+                continue
+            print(f"{name:<44}{seconds * 1000:>9.0f} ms  (+{(seconds - baseline) * 1000:.0f} ms)")
+    finally:
+        shutil.rmtree(data_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Throughput of the local transformer vectorizer on CPU, in texts per second.
+
+    python benchmarks/bench_vectorizer.py /path/to/model --n 512 --threads 4 --quantize
+"""
+import argparse
+import random
+import string
+import time
+
+from bsai.src.domain.transformer_vectorizer import TransformerVectorizer
+
+
+def synthetic_texts(n: int, min_words: int = 20, max_words: int = 300, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(2000)]
+    return [" ".join(rng.choices(words, k=rng.randint(min_words, max_words))) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("model_path", type=str)
+    parser.add_argument("--n", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-length", type=int, default=512)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--quantize", action="store_true")
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.n)
+    vectorizer = TransformerVectorizer(
+        args.model_path,
+        batch_size=args.batch_size,
+        max_length=args.max_length,
+        num_threads=args.threads,
+        quantize=args.quantize,
+    )
+    vectorizer.transform(texts[:args.batch_size])  # warm-up
+
+    start = time.perf_counter()
+    vectorizer.transform(texts)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.n} texts in {elapsed:.2f}s: {args.n / elapsed:.1f} texts/s "
+        f"(batch {args.batch_size}, threads {args.threads or 'default'}, "
+        f"quantize {args.quantize})"
+    )
+
+
+if __name__ == "__main__":
+    main()
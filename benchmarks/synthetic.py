@@ -0,0 +1,280 @@
+"""Synthetic bookmark exports and latency/failure-injecting fakes for pipeline benchmarks"""
+import html
+import random
+import string
+import threading
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bsai.src.domain.llm import BaseLLM
+from bsai.src.domain.parser import BaseParser
+from bsai.src.domain.vectorizer import BaseVectorizer
+
+
+def _vocabularies(n_topics: int, words_per_topic: int = 200, seed: int = 0) -> list[list[str]]:
+    rng = random.Random(seed)
+    return [
+        ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(words_per_topic)]
+        for _ in range(n_topics)
+    ]
+
+
+def write_bookmark_export(
+    path: str,
+    n: int,
+    n_folders: int = 20,
+    duplicate_rate: float = 0.05,
+    seed: int = 0,
+) -> str:
+    """Netscape bookmark file with `n` links spread over nested folders.
+
+    A `duplicate_rate` share of links repeats an earlier url with tracking
+    parameters or a fragment added, which canonicalization should fold away.
+    """
+    rng = random.Random(seed)
+    folders = defaultdict(list)
+    urls = []
+    for i in range(n):
+        if urls and rng.random() < duplicate_rate:
+            url = rng.choice(urls) + rng.choice(["?utm_source=feed", "#top", "?fbclid=abc"])
+        else:
+            url = f"https://site{rng.randrange(n // 10 + 1)}.example.com/post/{i}"
+            urls.append(url)
+        folders[rng.randrange(n_folders)].append((url, f"Bookmark {i}", 1_600_000_000 + i))
+
+    lines = [
+        "<!DOCTYPE NETSCAPE-Bookmark-file-1>",
+        '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">',
+        "<TITLE>Bookmarks</TITLE>",
+        "<H1>Bookmarks</H1>",
+        "<DL><p>",
+    ]
+    for folder, links in sorted(folders.items()):
+        lines.append(f"    <DT><H3>Folder {folder}</H3>")
+        lines.append("    <DL><p>")
+        for url, title, add_date in links:
+            lines.append(
+                f'        <DT><A HREF="{html.escape(url)}" ADD_DATE="{add_date}">{html.escape(title)}</A>'
+            )
+        lines.append("    </DL><p>")
+    lines.append("</DL><p>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return path
+
+
+class Recorder:
+    """Thread-safe per-name durations and item counts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = defaultdict(list)
+        self.items = defaultdict(int)
+        self.failures = defaultdict(int)
+
+    def record(self, name: str, seconds: float, items: int = 1, failed: bool = False):
+        with self._lock:
+            self.durations[name].append(seconds)
+            self.items[name] += items
+            self.failures[name] += failed
+
+    def summary(self) -> dict[str, dict]:
+        with self._lock:
+            report = {}
+            for name, durations in sorted(self.durations.items()):
+                seconds = np.asarray(durations)
+                total = float(seconds.sum())
+                report[name] = {
+                    "calls": len(seconds),
+                    "items": self.items[name],
+                    "failures": self.failures[name],
+                    "seconds": total,
+                    "items_per_s": self.items[name] / total if total else 0.0,
+                    "p50_ms": float(np.percentile(seconds, 50)) * 1000,
+                    "p99_ms": float(np.percentile(seconds, 99)) * 1000,
+                }
+            return report
+
+
+class Latency:
+    """Log-normally jittered delay around `mean` seconds with a `failure_rate` chance of failing"""
+
+    def __init__(self, mean: float = 0.0, jitter: float = 0.5, failure_rate: float = 0.0, seed: int = 0):
+        self.mean = mean
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self) -> bool:
+        """Sleep for one simulated request; returns whether it failed"""
+        with self._lock:
+            delay = self.mean * self._rng.lognormvariate(0.0, self.jitter) if self.mean else 0.0
+            failed = self._rng.random() < self.failure_rate
+        time.sleep(delay)
+        return failed
+
+
+def _n_items(value) -> int:
+    if hasattr(value, "urls"):
+        return len(value.urls)
+    return len(value) if hasattr(value, "__len__") else 1
+
+
+class Timed:
+    """Proxy recording the duration of every method call on `target` as `<prefix>.<method>`"""
+
+    def __init__(self, target, prefix: str, recorder: Recorder):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_prefix", prefix)
+        object.__setattr__(self, "_recorder", recorder)
+
+    def __getattr__(self, name: str):
+        value = getattr(self._target, name)
+        if not callable(value):
+            return value
+
+        def timed(*args, **kwargs):
+            items = _n_items(args[0]) if args else 1
+            start = time.perf_counter()
+            try:
+                return value(*args, **kwargs)
+            finally:
+                self._recorder.record(f"{self._prefix}.{name}", time.perf_counter() - start, items)
+
+        return timed
+
+    def __setattr__(self, name: str, value):
+        setattr(self._target, name, value)
+
+
+class FakeParser(BaseParser):
+    """Returns topic-flavoured page text per url; failed requests drop the url like Tavily does.
+
+    A `mirror_rate` share of urls serve a copy of one of `n_sources` shared pages
+    with a different footer, like mirrors and syndicated posts.
+    """
+
+    def __init__(
+        self,
+        latency: Latency,
+        recorder: Recorder,
+        max_workers: int = 8,
+        n_topics: int = 20,
+        words: int = 400,
+        mirror_rate: float = 0.0,
+        n_sources: int = 100,
+    ):
+        self.latency = latency
+        self.recorder = recorder
+        self.max_workers = max_workers
+        self.vocabularies = _vocabularies(n_topics)
+        self.words = words
+        self.mirror_rate = mirror_rate
+        self.n_sources = n_sources
+
+    def _page(self, url: str) -> str | None:
+        start = time.perf_counter()
+        failed = self.latency()
+        self.recorder.record("api.parser", time.perf_counter() - start, failed=failed)
+        if failed:
+            return None
+        rng = random.Random(url)
+        footer = ""
+        if rng.random() < self.mirror_rate:
+            footer = f"\nMirrored by {url}"
+            rng = random.Random(f"source-{rng.randrange(self.n_sources)}")
+        topic = rng.randrange(len(self.vocabularies))
+        body = " ".join(rng.choices(self.vocabularies[topic], k=self.words))
+        return f"t{topic} {body}{footer}"
+
+    def extract(self, urls: list[str]) -> tuple[list[str], list[str]]:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pages = list(executor.map(self._page, urls))
+        found = [(url, page) for url, page in zip(urls, pages) if page is not None]
+        return [url for url, _ in found], [page for _, page in found]
+
+
+class FakeLLM(BaseLLM):
+    """Summaries are the first words of a text; a failed request yields "" like `agenerate`.
+
+    A failed topic request fails the whole `get_cluster_topics` call, as in `OpenAIModel`.
+    """
+
+    def __init__(self, latency: Latency, recorder: Recorder, max_concurrency: int = 8, words: int = 40):
+        self.latency = latency
+        self.recorder = recorder
+        self.max_concurrency = max_concurrency
+        self.words = words
+
+    def _request(self) -> bool:
+        start = time.perf_counter()
+        failed = self.latency()
+        self.recorder.record("api.llm", time.perf_counter() - start, failed=failed)
+        return failed
+
+    def _summary(self, text: str) -> str:
+        return "" if self._request() else " ".join(text.split()[:self.words])
+
+    def get_summary(self, texts: list[str], progress=None) -> list[str]:
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return list(executor.map(self._summary, texts))
+
+    def get_cluster_topic(self, texts: list[str]) -> str:
+        return "" if self._request() else texts[0].split()[0]
+
+    def get_cluster_topics(self, groups: list[list[str]]) -> list[str]:
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            topics = list(executor.map(self.get_cluster_topic, groups))
+        failed = sum(not topic for topic in topics)
+        if failed:
+            raise RuntimeError(f"Failed to generate {failed}/{len(groups)} cluster topics")
+        return topics
+
+
+class FakeVectorizer(BaseVectorizer):
+    """Unit vectors around one center per topic token, one simulated request per batch.
+
+    A failed request raises, failing the whole embed call like an API error.
+    """
+
+    def __init__(
+        self,
+        latency: Latency,
+        recorder: Recorder,
+        dim: int = 256,
+        batch_size: int = 256,
+        n_topics: int = 20,
+        noise: float = 0.3,
+    ):
+        super().__init__()
+        self.latency = latency
+        self.recorder = recorder
+        self.batch_size = batch_size
+        self.noise = noise
+        self.centers = np.random.default_rng(0).normal(size=(n_topics, dim)).astype(np.float32)
+
+    def _vector(self, text: str) -> np.ndarray:
+        token = text.split(maxsplit=1)[0] if text else ""
+        topic = int(token[1:]) if token[1:].isdigit() else zlib.crc32(token.encode())
+        rng = np.random.default_rng(zlib.crc32(text.encode()))
+        vector = self.centers[topic % len(self.centers)] + self.noise * rng.normal(size=self.centers.shape[1])
+        return vector / np.linalg.norm(vector)
+
+    def transform(self, texts: list[str]) -> np.ndarray:
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            start = time.perf_counter()
+            failed = self.latency()
+            self.recorder.record("api.vectorizer", time.perf_counter() - start, failed=failed)
+            if failed:
+                raise RuntimeError("Injected embedding failure")
+            vectors.extend(self._vector(text) for text in texts[i:i + self.batch_size])
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.centers.shape[1])
+
+    def fit_transform(self, texts: list[str]) -> np.ndarray:
+        return self.transform(texts)
@@ -0,0 +1,154 @@
+"""Streaming reader for Netscape-format bookmark exports"""
+from html.parser import HTMLParser
+from typing import Iterator
+from urllib.parse import unquote_plus, urlsplit, urlunsplit
+
+from bsai.src.types.dto import Bookmark
+
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_hsenc", "_hsmi", "mkt_tok", "ref_src", "ref_url",
+}
+# generic names that only mean tracking on these hosts and their subdomains
+HOST_TRACKING_PARAMS = {
+    "si": ("youtube.com", "youtu.be", "open.spotify.com"),
+    "spm": (
+        "aliexpress.com", "aliexpress.us", "alibaba.com", "taobao.com", "tmall.com",
+    ),
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _is_tracking(param: str, host: str) -> bool:
+    key = unquote_plus(param.split("=", 1)[0]).lower()
+    if key in HOST_TRACKING_PARAMS:
+        hosts = HOST_TRACKING_PARAMS[key]
+        return any(host == domain or host.endswith(f".{domain}") for domain in hosts)
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str | None:
+    """Normalized form of an http(s) url, or None for anything else.
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters and trailing slashes. User info and the other query parameters
+    are kept as written and in their order.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    hostname = parts.hostname.rstrip(".")
+    host = f"[{hostname}]" if ":" in hostname else hostname
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    userinfo, at, _ = parts.netloc.rpartition("@")
+    host = userinfo + at + host
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    query = parts.query
+    params = query.split("&")
+    if any(_is_tracking(param, hostname) for param in params):
+        query = "&".join(
+            param for param in params if param and not _is_tracking(param, hostname)
+        )
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+class BookmarkHTMLParser(HTMLParser):
+    """Incremental parser collecting links with their folder path and add date"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.bookmarks: list[Bookmark] = []
+        self._folders: list[str] = []
+        self._pending_folder: str | None = None
+        self._heading: list[str] | None = None
+        self._link: dict | None = None
+        self._title: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]):
+        if tag == "h3":
+            self._heading = []
+        elif tag == "dl":
+            self._folders.append(self._pending_folder or "")
+            self._pending_folder = None
+        elif tag == "a":
+            self._link = dict(attrs)
+            self._title = []
+
+    def handle_endtag(self, tag: str):
+        if tag == "h3" and self._heading is not None:
+            self._pending_folder = "".join(self._heading).strip()
+            self._heading = None
+        elif tag == "dl" and self._folders:
+            self._folders.pop()
+        elif tag == "a" and self._link is not None:
+            self._emit()
+
+    def handle_data(self, data: str):
+        if self._heading is not None:
+            self._heading.append(data)
+        elif self._link is not None:
+            self._title.append(data)
+
+    def _emit(self):
+        href = self._link.get("href")
+        add_date = self._link.get("add_date")
+        if href:
+            self.bookmarks.append(Bookmark(
+                url=href,
+                title="".join(self._title).strip(),
+                folder=[folder for folder in self._folders if folder],
+                add_date=int(add_date) if add_date and add_date.isdigit() else None,
+            ))
+        self._link = None
+
+
+def iter_bookmarks(path: str, chunk_size: int = 1 << 16) -> Iterator[Bookmark]:
+    """Yield bookmarks from an export file without loading it whole"""
+    parser = BookmarkHTMLParser()
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while chunk := f.read(chunk_size):
+            parser.feed(chunk)
+            yield from parser.bookmarks
+            parser.bookmarks.clear()
+    parser.close()
+    yield from parser.bookmarks
+
+
+def match_stored(urls: list[str], stored: list[str]) -> list[str]:
+    """`urls` with each one whose canonical form is already stored replaced by the stored url.
+
+    Libraries ingested before urls were canonicalized hold them as exported, so
+    comparing canonical forms keeps those bookmarks from being fetched again.
+    """
+    known = set(stored)
+    if all(url in known for url in urls):
+        return urls
+    stored_by_canonical = {}
+    for url in stored:
+        stored_by_canonical.setdefault(canonicalize_url(url) or url, url)
+    return [stored_by_canonical.get(url, url) for url in urls]
+
+
+def read_bookmarks(path: str) -> list[Bookmark]:
+    """Unique fetchable bookmarks with canonical urls, keeping the first occurrence"""
+    seen = set()
+    bookmarks = []
+    for bookmark in iter_bookmarks(path):
+        url = canonicalize_url(bookmark.url)
+        if url is None or url in seen:
+            continue
+        seen.add(url)
+        bookmark.url = url
+        bookmarks.append(bookmark)
+    return bookmarks
@@ -0,0 +1,85 @@
+"""bsai command line: ingest, recommend, search and show-clusters.
+
+Each command imports what it needs when it runs, so read-only commands skip
+the LLM, parser and clustering stacks and only validate the settings of the
+components they build.
+
+    python -m bsai.src.api.cli recommend -n 3
+"""
+import argparse
+import os
+
+
+def ingest(args: argparse.Namespace):
+    from bsai.src.api.html_handler import ingest
+
+    ingest(args.path)
+
+
+def recommend(args: argparse.Namespace):
+    from bsai.src.dependency import build_recommender, build_repository
+
+    recommender = build_recommender()
+    recommender.sync(build_repository())
+    for url, text in recommender.recommend(args.n):
+        print(f"{url}\n    {text}")
+    recommender.save()
+
+
+def search(args: argparse.Namespace):
+    from bsai.src.dependency import build_repository, build_search
+    from bsai.src.domain.recommender import recommend_similar
+
+    similar = build_search(build_repository())
+    for url, score in recommend_similar(args.query, similar, args.k):
+        print(f"{score:.3f}  {url}")
+
+
+def show_clusters(args: argparse.Namespace):
+    from bsai.src.dependency import build_repository
+    from bsai.src.visualization import show_clusters
+    from config import settings
+
+    plots_path = os.path.join(settings.data.path, "plots")
+    output_path = show_clusters(
+        build_repository(),
+        output_path=args.output or os.path.join(plots_path, "clusters.png"),
+        layout_path=os.path.join(plots_path, "layout.npz"),
+    )
+    print(output_path or "No clustered bookmarks yet")
+
+
+COMMANDS = {
+    "ingest": ingest,
+    "recommend": recommend,
+    "search": search,
+    "show-clusters": show_clusters,
+}
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="bsai")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = commands.add_parser("ingest", help="import a browser bookmark export")
+    ingest_parser.add_argument("path", type=str)
+
+    recommend_parser = commands.add_parser("recommend", help="suggest stored bookmarks to read")
+    recommend_parser.add_argument("-n", type=int, default=1)
+
+    search_parser = commands.add_parser("search", help="bookmarks similar to a url or text")
+    search_parser.add_argument("query", type=str)
+    search_parser.add_argument("-k", type=int, default=10)
+
+    clusters_parser = commands.add_parser("show-clusters", help="render the cluster map")
+    clusters_parser.add_argument("--output", type=str, default=None)
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    args = build_arg_parser().parse_args(argv)
+    COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,91 @@
 import argparse
 import os
 
-from bs4 import BeautifulSoup
-
+from bsai.src.api.bookmarks import match_stored, read_bookmarks
 from bsai.src.dependency import (
     build_clusterizer,
+    build_deduplicator,
+    build_ledger,
     build_llm,
     build_parser,
+    build_recommender,
     build_repository,
     build_vectorizer,
 )
-from bsai.src.domain.core import pipeline_urls, recommend_random
+from bsai.src.domain.core import pipeline_urls, pipeline_urls_streaming
+from bsai.src.metrics import metrics
+from bsai.src.visualization import show_clusters
 from loguru import logger
 
-from bsai.src.utils import visualize_clusters
-
-
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('path', type=str)
-    args = parser.parse_args()
+from config import settings
 
-    if not os.path.exists(args.path):
-        raise FileNotFoundError(f"Path {args.path} does not exist")
 
-    with open(args.path) as f:
-        bookmarks = f.read()
+def ingest(path: str):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Path {path} does not exist")
 
-    soup = BeautifulSoup(bookmarks, 'html.parser')
-    links = soup.find_all('a')
-    hrefs = [l['href'] for l in links]
+    bookmarks = read_bookmarks(path)
+    repository = build_repository()
+    hrefs = match_stored([bookmark.url for bookmark in bookmarks], repository.get_urls())
+    logger.info(f"Read {len(hrefs)} unique bookmarks from {path}")
 
     url_parser = build_parser()
     vectorizer = build_vectorizer()
     clusterizer = build_clusterizer()
     llm = build_llm()
-    repository = build_repository()
-    pipeline_urls(hrefs, url_parser, vectorizer, clusterizer, llm, repository)
+    ledger = build_ledger()
+    deduplicator = build_deduplicator()
+    if settings.pipeline.streaming:
+        pipeline_urls_streaming(
+            hrefs,
+            url_parser,
+            vectorizer,
+            clusterizer,
+            llm,
+            repository,
+            incremental=settings.cluster.incremental,
+            ledger=ledger,
+            deduplicator=deduplicator,
+            batch_size=settings.pipeline.batch_size,
+            queue_size=settings.pipeline.queue_size,
+        )
+    else:
+        pipeline_urls(
+            hrefs,
+            url_parser,
+            vectorizer,
+            clusterizer,
+            llm,
+            repository,
+            incremental=settings.cluster.incremental,
+            ledger=ledger,
+            deduplicator=deduplicator,
+        )
+
+    metrics_path = settings.metrics.export_path or os.path.join(
+        settings.data.path, "metrics", "ingest.prom"
+    )
+    logger.info(f"Run metrics written to {metrics.export(metrics_path)}")
+
+    plots_path = os.path.join(settings.data.path, "plots")
+    output_path = show_clusters(
+        repository,
+        output_path=os.path.join(plots_path, "clusters.png"),
+        layout_path=os.path.join(plots_path, "layout.npz"),
+    )
+    logger.info(f"Cluster map saved to {output_path}")
+    recommender = build_recommender()
+    recommender.sync(repository)
+    for url, text in recommender.recommend():
+        logger.info(f"Recommended URL: {url}, summary: {text}")
+    recommender.save()
+
 
-    visualize_clusters(repository.get_clusters(), repository.get_vectors())
-    url, text = recommend_random(repository)
-    logger.info(f"Recommended URL: {url}, summary: {text}")
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', type=str)
+    args = parser.parse_args()
+    ingest(args.path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+"""Persistent and in-process caches"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+
+def content_key(*parts) -> str:
+    """Stable sha256 over JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class DiskCache:
+    """SQLite-backed key/value store with LRU eviction beyond `max_entries`.
+
+    With `bypass` set, lookups always miss but fresh values are still written,
+    which refreshes stale entries without disabling the cache.
+    """
+
+    def __init__(self, path: str, max_entries: int | None = 100_000, bypass: bool = False):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def get(self, key: str) -> bytes | None:
+        if self.bypass:
+            self.misses += 1
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return row[0]
+
+    def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        if self.bypass or not keys:
+            self.misses += len(keys)
+            return {}
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                found.update(self._conn.execute(
+                    f"SELECT key, value FROM cache WHERE key IN ({marks})", chunk
+                ).fetchall())
+            self._conn.executemany(
+                "UPDATE cache SET accessed = ? WHERE key = ?",
+                [(time.time(), key) for key in found],
+            )
+        self.hits += len(found)
+        self.misses += len(set(keys)) - len(found)
+        return found
+
+    def set(self, key: str, value: bytes | str):
+        self.set_many({key: value})
+
+    def set_many(self, items: dict[str, bytes | str]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, accessed) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in items.items()],
+            )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._conn.execute("COMMIT")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self),
+        }
+
+
+class TableCache:
+    """In-memory LRU of parsed files, bounded by their estimated size in bytes.
+
+    Entries are validated against the file's mtime and size on every lookup, so
+    a file rewritten by another process is reloaded; writers in this process
+    call `invalidate` directly.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str, load: Callable[[str], Any], size: Callable[[Any], int]) -> Any:
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = load(path)
+        nbytes = size(value)
+        with self._lock:
+            self._pop(path)
+            if nbytes <= self.max_bytes:
+                self._entries[path] = (signature, value, nbytes)
+                self._size += nbytes
+                while self._size > self.max_bytes:
+                    self._pop(next(iter(self._entries)))
+        return value
+
+    def _pop(self, path: str):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._size -= entry[2]
+
+    def invalidate(self, path: str):
+        with self._lock:
+            self._pop(path)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
@@ -1 +1,71 @@
 """Schema for the database."""
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS texts (
+    url TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS summaries (
+    url TEXT PRIMARY KEY,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS vectors (
+    url TEXT PRIMARY KEY,
+    vector BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clusters (
+    url TEXT PRIMARY KEY,
+    label INTEGER NOT NULL,
+    cluster_text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS clusters_label ON clusters (label);
+CREATE TABLE IF NOT EXISTS generations (
+    name TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
+"""
+
+# `xact` is the id of the transaction that last wrote a row. Sequence ids are handed
+# out before commit, so the *_since reads order by `xact` instead and stop below the
+# oldest transaction still running.
+POSTGRES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    id BIGSERIAL,
+    url TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS texts (
+    id BIGSERIAL,
+    url TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS summaries (
+    id BIGSERIAL,
+    xact BIGINT NOT NULL DEFAULT pg_current_xact_id()::text::bigint,
+    url TEXT PRIMARY KEY,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS vectors (
+    id BIGSERIAL,
+    xact BIGINT NOT NULL DEFAULT pg_current_xact_id()::text::bigint,
+    url TEXT PRIMARY KEY,
+    vector BYTEA NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clusters (
+    id BIGSERIAL,
+    xact BIGINT NOT NULL DEFAULT pg_current_xact_id()::text::bigint,
+    url TEXT PRIMARY KEY,
+    label INTEGER NOT NULL,
+    cluster_text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS clusters_label ON clusters (label);
+CREATE INDEX IF NOT EXISTS summaries_xact ON summaries (xact, id);
+CREATE INDEX IF NOT EXISTS vectors_xact ON vectors (xact, id);
+CREATE INDEX IF NOT EXISTS clusters_xact ON clusters (xact, id);
+CREATE TABLE IF NOT EXISTS generations (
+    name TEXT PRIMARY KEY,
+    generation BIGINT NOT NULL
+);
+"""
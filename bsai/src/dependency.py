@@ -1,30 +1,192 @@
-from bsai.src.domain.clusterer import BaseClusterer, HDBSCANClusterer
-from bsai.src.domain.llm import BaseLLM, OpenAIModel
-from bsai.src.domain.parser import BaseParser, TavilyParser
-from bsai.src.domain.repository import BaseRepository, DFRepository
-from bsai.src.domain.vectorizer import BaseVectorizer, OpenAIVectorizer
+from __future__ import annotations
+
+import importlib
+import os
+from typing import TYPE_CHECKING, Callable
+
 from config import settings
 
+if TYPE_CHECKING:
+    # each factory imports what it builds, so a command only pays for the
+    # components it uses (pandas, asyncpg, tiktoken, the model stacks)
+    from bsai.src.cache import DiskCache
+    from bsai.src.domain.clusterer import BaseClusterer
+    from bsai.src.domain.dedup import Deduplicator
+    from bsai.src.domain.index import VectorIndex
+    from bsai.src.domain.ledger import StageLedger
+    from bsai.src.domain.llm import BaseLLM
+    from bsai.src.domain.parser import BaseParser
+    from bsai.src.domain.recommender import Recommender, SimilarSearch
+    from bsai.src.domain.repository import BaseRepository
+    from bsai.src.domain.vectorizer import BaseVectorizer
+
+# Implementations by component and backend name, imported only when built
+BACKENDS = {
+    "llm": {"openai": "bsai.src.domain.llm:OpenAIModel"},
+    "parser": {"tavily": "bsai.src.domain.parser:TavilyParser"},
+    "clusterer": {"hdbscan": "bsai.src.domain.clusterer:HDBSCANClusterer"},
+    "vectorizer": {
+        "openai": "bsai.src.domain.openai_vectorizer:OpenAIVectorizer",
+        "local": "bsai.src.domain.transformer_vectorizer:TransformerVectorizer",
+    },
+    "repository": {
+        "df": "bsai.src.domain.repository:DFRepository",
+        "sqlite": "bsai.src.domain.repository:SQLiteRepository",
+        "postgres": "bsai.src.domain.repository:PostgresRepository",
+    },
+}
+
+
+def load_backend(component: str, name: str) -> type:
+    if name not in BACKENDS[component]:
+        raise ValueError(f"Unknown {component} backend: {name}")
+    module, attribute = BACKENDS[component][name].split(":")
+    return getattr(importlib.import_module(module), attribute)
+
+
+def build_completion_cache() -> DiskCache | None:
+    if not settings.llm.cache_enabled:
+        return None
+    from bsai.src.cache import DiskCache
+
+    return DiskCache(
+        os.path.join(settings.data.path, "cache", "completions.sqlite"),
+        max_entries=settings.llm.cache_max_entries,
+        bypass=settings.llm.cache_bypass,
+    )
+
 
 def build_llm() -> BaseLLM:
-    return OpenAIModel(settings.llm.model)
+    return load_backend("llm", "openai")(
+        settings.llm.model,
+        max_concurrency=settings.llm.max_concurrency,
+        requests_per_minute=settings.llm.requests_per_minute,
+        tokens_per_minute=settings.llm.tokens_per_minute,
+        timeout=settings.llm.timeout,
+        max_retries=settings.llm.max_retries,
+        cache=build_completion_cache(),
+        max_input_tokens=settings.llm.max_input_tokens,
+        map_reduce_tokens=settings.llm.map_reduce_tokens,
+        chunk_tokens=settings.llm.chunk_tokens,
+        max_chunks=settings.llm.max_chunks,
+    )
+
+
+def build_recommender() -> Recommender:
+    from bsai.src.domain.recommender import Recommender
+
+    return Recommender(
+        os.path.join(settings.data.path, "recommender"),
+        strategy=settings.recommender.strategy,
+        index=build_index() if settings.recommender.strategy == "mmr" else None,
+        mmr_lambda=settings.recommender.mmr_lambda,
+        n_candidates=settings.recommender.n_candidates,
+        history_window=settings.recommender.history_window,
+    )
+
 
+def build_index() -> VectorIndex:
+    from bsai.src.domain.index import VectorIndex
 
-def build_recommender():
-    ...
+    return VectorIndex(
+        os.path.join(settings.data.path, "index"),
+        ivf_threshold=settings.index.ivf_threshold,
+        nprobe=settings.index.nprobe,
+    )
+
+
+def build_search(
+    repository: BaseRepository, vectorizer: Callable[[], BaseVectorizer] | None = None
+) -> SimilarSearch:
+    from bsai.src.domain.recommender import SimilarSearch
+
+    return SimilarSearch(
+        repository, vectorizer or build_vectorizer, build_index(), build_deduplicator()
+    )
+
+
+def build_embedding_cache() -> DiskCache | None:
+    if not settings.embedding.cache_enabled:
+        return None
+    from bsai.src.cache import DiskCache
+
+    return DiskCache(
+        os.path.join(settings.data.path, "cache", "embeddings.sqlite"), max_entries=None
+    )
 
 
 def build_vectorizer() -> BaseVectorizer:
-    return OpenAIVectorizer()
+    vectorizer = load_backend("vectorizer", settings.embedding.backend)
+    if settings.embedding.backend == "local":
+        return vectorizer(
+            settings.embedding.local_model_path,
+            batch_size=settings.embedding.local_batch_size,
+            max_length=settings.embedding.local_max_length,
+            num_threads=settings.embedding.num_threads,
+            quantize=settings.embedding.quantize,
+        )
+    return vectorizer(
+        settings.embedding.model,
+        batch_size=settings.embedding.batch_size,
+        max_batch_tokens=settings.embedding.max_batch_tokens,
+        max_workers=settings.embedding.max_workers,
+        cache=build_embedding_cache(),
+    )
 
 
 def build_clusterizer() -> BaseClusterer:
-    return HDBSCANClusterer()
+    clusterer = load_backend("clusterer", "hdbscan")(
+        min_cluster_size=settings.cluster.min_cluster_size,
+        min_samples=settings.cluster.min_samples,
+        model_path=os.path.join(settings.data.path, "models", "hdbscan.pkl"),
+        n_components=settings.cluster.n_components,
+        reduction=settings.cluster.reduction,
+    )
+    if settings.cluster.incremental:
+        clusterer.load()
+    return clusterer
 
 
 def build_parser() -> BaseParser:
-    return TavilyParser(settings.tavily.api_key)
+    return load_backend("parser", "tavily")(
+        settings.tavily.api_key,
+        max_workers=settings.tavily.max_workers,
+        requests_per_second=settings.tavily.requests_per_second,
+        max_retries=settings.tavily.max_retries,
+        base_url=settings.tavily.base_url,
+    )
+
+
+def build_ledger() -> StageLedger:
+    from bsai.src.domain.ledger import StageLedger
+
+    return StageLedger(
+        os.path.join(settings.data.path, "ledger.sqlite"),
+        max_attempts=settings.pipeline.max_attempts,
+        backoff=settings.pipeline.retry_backoff,
+    )
+
+
+def build_deduplicator() -> Deduplicator | None:
+    if not settings.dedup.enabled:
+        return None
+    from bsai.src.domain.dedup import Deduplicator
+
+    return Deduplicator(
+        os.path.join(settings.data.path, "dedup.sqlite"),
+        threshold=settings.dedup.threshold,
+        num_perm=settings.dedup.num_perm,
+        bands=settings.dedup.bands,
+        shingle_size=settings.dedup.shingle_size,
+    )
 
 
 def build_repository() -> BaseRepository:
-    return DFRepository(settings.data.path)
+    repository = load_backend("repository", settings.data.backend)
+    if settings.data.backend == "postgres":
+        return repository(str(settings.postgres.dsn))
+    if settings.data.backend == "sqlite":
+        return repository(settings.data.path)
+    return repository(
+        settings.data.path, cache_max_bytes=settings.data.cache_max_mb * 1024 * 1024
+    )
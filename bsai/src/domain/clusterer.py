@@ -1,37 +1,150 @@
+import os
+import pickle
+
 import hdbscan
 import numpy as np
 from sklearn.cluster import DBSCAN, HDBSCAN
+from sklearn.decomposition import PCA, TruncatedSVD
+
+
+def group_by_label(labels) -> dict[int, np.ndarray]:
+    """Member indices of every label, from a single sort"""
+    labels = np.asarray(labels)
+    order = np.argsort(labels, kind="stable")
+    ids, starts = np.unique(labels[order], return_index=True)
+    return dict(zip(ids.tolist(), np.split(order, starts[1:])))
+
+
+def representatives(
+    labels, vectors=None, n_samples: int = 5, cluster_ids: list[int] | None = None
+) -> dict[int, np.ndarray]:
+    """Up to `n_samples` distinct members per cluster, noise excluded.
+
+    With `vectors` the members closest to each cluster centroid are picked,
+    otherwise a random sample without replacement.
+    """
+    groups = group_by_label(labels)
+    if cluster_ids is not None:
+        groups = {c: groups[c] for c in cluster_ids if c in groups}
+    groups.pop(-1, None)
+    matrix = np.asarray(vectors, dtype=np.float32) if vectors is not None else None
+
+    samples = {}
+    for cluster_id, members in groups.items():
+        k = min(n_samples, len(members))
+        if matrix is None:
+            samples[cluster_id] = np.random.choice(members, k, replace=False)
+            continue
+        points = matrix[members]
+        distances = ((points - points.mean(axis=0)) ** 2).sum(axis=1)
+        closest = np.argpartition(distances, k - 1)[:k]
+        samples[cluster_id] = members[closest[np.argsort(distances[closest])]]
+    return samples
 
 
 class BaseClusterer:
-    def clusterize(self, vectors: list[list[float]]) -> list[int]:
+    def clusterize(self, vectors: np.ndarray) -> np.ndarray:
         raise NotImplementedError
 
     def samples_from_cluster(
-        self, vectors: list[list[float]], cluster_id: int, n_samples: int = 5
+        self, vectors: np.ndarray, cluster_id: int, n_samples: int = 5
     ) -> np.ndarray:
         raise NotImplementedError
 
-    def predict(self, vectors: list[np.ndarray]) -> np.ndarray:
+    def predict(self, vectors: np.ndarray) -> np.ndarray:
         raise NotImplementedError
 
 
+def build_reducer(method: str, n_components: int):
+    if method == "pca":
+        return PCA(n_components=n_components, svd_solver="randomized", random_state=42)
+    if method == "svd":
+        return TruncatedSVD(n_components=n_components, algorithm="randomized", random_state=42)
+    raise ValueError(f"Unknown reduction method: {method}")
+
+
 class HDBSCANClusterer(BaseClusterer):
-    def __init__(self, min_cluster_size: int = 3, min_samples: int = 2):
-        self.hdbs = hdbscan.HDBSCAN(min_cluster_size=min_cluster_size, min_samples=min_samples)
+    """HDBSCAN over embeddings, optionally projected to `n_components` dimensions first.
+
+    The projection (PCA or truncated SVD, both randomized) is fitted together
+    with the clusters and persisted with them, so predicted points go through
+    the same projection.
+    """
+
+    def __init__(
+        self,
+        min_cluster_size: int = 3,
+        min_samples: int = 2,
+        model_path: str | None = None,
+        n_components: int | None = None,
+        reduction: str = "pca",
+    ):
+        self.hdbs = hdbscan.HDBSCAN(
+            min_cluster_size=min_cluster_size, min_samples=min_samples, prediction_data=True
+        )
+        self.model_path = model_path
+        self.n_components = n_components
+        self.reduction = reduction
+        self.reducer = None
+        # stored label for each fitted hdbscan label, kept stable across refits
+        self.label_map: dict[int, int] = {}
+        self.fit_size = 0
+        self.n_predicted = 0
+
+    def is_fitted(self) -> bool:
+        return self.fit_size > 0
 
-    def clusterize(self, vectors: list[list[float]]) -> list[int]:
-        self.hdbs.fit(vectors)
+    def _project(self, vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if self.reducer is None:
+            return matrix
+        return self.reducer.transform(matrix).astype(np.float32)
+
+    def clusterize(self, vectors: np.ndarray) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        self.reducer = None
+        if self.n_components and self.n_components < min(matrix.shape):
+            self.reducer = build_reducer(self.reduction, self.n_components).fit(matrix)
+        self.hdbs.fit(self._project(matrix))
+        self.label_map = {}
+        self.fit_size = len(self.hdbs.labels_)
+        self.n_predicted = 0
         return self.hdbs.labels_
 
     def samples_from_cluster(
-        self, vectors: list[list[float]], cluster_id: int, n_samples: int = 5
+        self, vectors: np.ndarray, cluster_id: int, n_samples: int = 5
     ) -> np.ndarray:
-        cluster_samples = [
-            i for i, v in enumerate(vectors) if self.hdbs.labels_[i] == cluster_id
-        ]
-        return np.random.choice(cluster_samples, n_samples)
+        return representatives(self.hdbs.labels_, vectors, n_samples, [cluster_id])[cluster_id]
 
-    def predict(self, vectors: list[list[float]]) -> list[int]:
-        labels, probs = hdbscan.approximate_predict(self.hdbs, vectors)
+    def predict(self, vectors: np.ndarray) -> np.ndarray:
+        labels, probs = hdbscan.approximate_predict(self.hdbs, self._project(vectors))
+        self.n_predicted += len(labels)
         return labels
+
+    def save(self):
+        if self.model_path is None:
+            return
+        os.makedirs(os.path.dirname(self.model_path) or ".", exist_ok=True)
+        state = {
+            "hdbs": self.hdbs,
+            "reducer": self.reducer,
+            "label_map": self.label_map,
+            "fit_size": self.fit_size,
+            "n_predicted": self.n_predicted,
+        }
+        tmp_path = self.model_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f)
+        os.replace(tmp_path, self.model_path)
+
+    def load(self) -> bool:
+        if self.model_path is None or not os.path.exists(self.model_path):
+            return False
+        with open(self.model_path, "rb") as f:
+            state = pickle.load(f)
+        self.hdbs = state["hdbs"]
+        self.reducer = state.get("reducer")
+        self.label_map = state["label_map"]
+        self.fit_size = state["fit_size"]
+        self.n_predicted = state["n_predicted"]
+        return True
@@ -1,22 +1,37 @@
-from typing import List
+import time
+from collections import Counter, defaultdict
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Callable, List
 
 import numpy as np
 
-from bsai.src.domain.clusterer import BaseClusterer
+from bsai.src.domain.clusterer import (
+    BaseClusterer,
+    HDBSCANClusterer,
+    group_by_label,
+    representatives,
+)
+from bsai.src.domain.dedup import Deduplicator
+from bsai.src.domain.ledger import StageLedger
 from bsai.src.domain.llm import BaseLLM
 from bsai.src.domain.parser import BaseParser
 from bsai.src.domain.repository import BaseRepository
 from bsai.src.domain.vectorizer import BaseVectorizer
+from bsai.src.metrics import metrics
 
 from loguru import logger
 
 from bsai.src.types.dto import ParsedText, Summary, Vector, Cluster
-from bsai.src.utils import visualize_clusters
+
+
+# Topic stored for points HDBSCAN leaves as noise (label -1)
+NOISE_TOPIC = "Other"
 
 
 def parse_urls(urls: list[str], parser: BaseParser) -> ParsedText:
     urls, texts = parser.extract(urls)
-    return ParsedText(urls=urls, texts=texts)
+    return ParsedText(urls=urls, texts=texts).validate()
 
 
 def generate_summary(parsed_text: ParsedText, llm: BaseLLM) -> Summary:
@@ -32,7 +47,7 @@ def generate_summary(parsed_text: ParsedText, llm: BaseLLM) -> Summary:
 
 def generate_embedding(summaries: Summary, vectorizer: BaseVectorizer) -> Vector:
     vectors = vectorizer.fit_transform(summaries.texts)
-    return Vector(urls=summaries.urls, vectors=vectors)
+    return Vector(urls=summaries.urls, vectors=vectors).validate()
 
 
 def generate_clusters(
@@ -53,21 +68,420 @@ def clusters_to_summary(
         vectors: Vector,
         llm: BaseLLM,
 ) -> Cluster:
-    cluster_to_summary = {}
-    for cluster_id in set(clusters.labels):
-        samples_idx = clusterer.samples_from_cluster(vectors.vectors, cluster_id)
-        samples = [summaries.texts[i] for i in samples_idx]
-        cluster_to_summary[cluster_id] = generate_topic(samples, llm)
-
-    cluster_urls = []
-    labels = []
-    texts = []
-    for cluster_id, cluster_url in zip(clusters.labels, clusters.urls):
-        cluster_text = cluster_to_summary[cluster_id]
-        cluster_urls.append(cluster_url)
-        labels.append(cluster_id)
-        texts.append(cluster_text)
-    return Cluster(urls=cluster_urls, labels=labels, texts=texts)
+    labels = clusters.labels.tolist()
+    topics = cluster_topics(clusters.labels, summaries.texts, list(set(labels)), llm, vectors.vectors)
+    return Cluster(urls=clusters.urls, labels=clusters.labels, texts=[topics[label] for label in labels])
+
+
+def cluster_topics(
+        labels: np.ndarray,
+        texts: list[str],
+        cluster_ids: list[int],
+        llm: BaseLLM,
+        vectors=None,
+        n_samples: int = 5,
+) -> dict[int, str]:
+    """Topic for each of `cluster_ids`, generated concurrently from representative texts.
+
+    Representatives are the members closest to the centroid when `vectors` are
+    given, else a random sample. Noise gets `NOISE_TOPIC` without an LLM call.
+    """
+    samples = representatives(labels, vectors, n_samples, cluster_ids)
+    groups = [[texts[i] for i in idx] for idx in samples.values()]
+    topics = dict(zip(samples, llm.get_cluster_topics(groups)))
+    if -1 in cluster_ids:
+        topics[-1] = NOISE_TOPIC
+    return topics
+
+
+def _refit_clusters(
+        clusterer: HDBSCANClusterer,
+        existing: Cluster,
+        llm: BaseLLM,
+        repository: BaseRepository,
+        match_threshold: float,
+) -> Cluster:
+    """Fit on every stored vector, reusing stored labels and topics of matching clusters"""
+    urls, matrix = repository.get_vector_matrix()
+    fitted = np.asarray(clusterer.clusterize(matrix))
+    existing_labels = existing.labels.tolist()
+
+    old_labels = dict(zip(existing.urls, existing_labels))
+    old_topics = dict(zip(existing_labels, existing.texts))
+    old_members = defaultdict(set)
+    for url, label in old_labels.items():
+        old_members[label].add(url)
+
+    label_map = {-1: -1}
+    topics = {}
+    next_label = max(existing_labels, default=-1) + 1
+    for cluster_id, indices in group_by_label(fitted).items():
+        if cluster_id == -1:
+            continue
+        members = {urls[i] for i in indices}
+        votes = Counter(old_labels[url] for url in members if old_labels.get(url, -1) != -1)
+        if votes:
+            candidate, _ = votes.most_common(1)[0]
+            overlap = len(members & old_members[candidate]) / len(members | old_members[candidate])
+            if overlap >= match_threshold and candidate not in topics:
+                label_map[cluster_id] = candidate
+                topics[candidate] = old_topics[candidate]
+                continue
+        label_map[cluster_id] = next_label
+        next_label += 1
+    clusterer.label_map = label_map
+
+    labels = np.array([label_map[c] for c in fitted.tolist()])
+    changed = [c for c in set(labels.tolist()) if c not in topics]
+    summaries = repository.get_summaries()
+    summary_of = dict(zip(summaries.urls, summaries.texts))
+    texts = [summary_of.get(url, "") for url in urls]
+    topics.update(cluster_topics(labels, texts, changed, llm, matrix))
+    logger.info(f"Refit {len(urls)} points, generated topics for {len(changed)} clusters")
+
+    clusters = Cluster(urls=urls, labels=labels, texts=[topics[c] for c in labels.tolist()])
+    repository.replace_clusters(clusters)
+    return clusters
+
+
+def _assign_clusters(
+        urls: list[str],
+        labels: list[int],
+        existing: Cluster,
+        llm: BaseLLM,
+        repository: BaseRepository,
+        refresh_threshold: float,
+) -> Cluster:
+    """Store predicted labels, regenerating topics of clusters that grew noticeably"""
+    existing_labels = existing.labels.tolist()
+    topics = dict(zip(existing_labels, existing.texts))
+    old_sizes = Counter(existing_labels)
+    changed = [
+        c for c, n in Counter(labels).items()
+        if c not in topics or (c != -1 and n > refresh_threshold * old_sizes[c])
+    ]
+    if changed:
+        all_urls = existing.urls + urls
+        summaries = repository.get_summaries()
+        summary_of = dict(zip(summaries.urls, summaries.texts))
+        texts = [summary_of.get(url, "") for url in all_urls]
+        topics.update(cluster_topics(np.array(existing_labels + labels), texts, changed, llm))
+    logger.info(f"Assigned {len(urls)} points, generated topics for {len(changed)} clusters")
+
+    clusters = Cluster(urls=urls, labels=labels, texts=[topics[c] for c in labels])
+    if any(c in old_sizes for c in changed):
+        repository.replace_clusters(Cluster(
+            urls=existing.urls + urls,
+            labels=existing_labels + labels,
+            texts=[topics[c] for c in existing_labels + labels],
+        ))
+    else:
+        repository.save_clusters(clusters)
+    return clusters
+
+
+def update_clusters(
+        vectors: Vector,
+        clusterer: HDBSCANClusterer,
+        llm: BaseLLM,
+        repository: BaseRepository,
+        noise_threshold: float = 0.5,
+        drift_threshold: float = 0.5,
+        refresh_threshold: float = 0.5,
+        match_threshold: float = 0.5,
+) -> Cluster:
+    """Cluster new vectors against the persisted model and store the result.
+
+    New points are placed with `approximate_predict`. Everything stored is refit
+    when there is no model yet, when more than `noise_threshold` of the batch is
+    noise, or when points predicted since the last fit exceed `drift_threshold`
+    of the fitted size. Refit clusters that overlap a stored one by at least
+    `match_threshold` (Jaccard) keep its label and topic. Returns the clusters
+    of the new vectors.
+    """
+    existing = repository.get_clusters()
+    if clusterer.is_fitted() and existing.urls:
+        predicted = clusterer.predict(vectors.vectors)
+        noise_ratio = float(np.mean(predicted == -1))
+        drift = clusterer.n_predicted / clusterer.fit_size
+        if noise_ratio <= noise_threshold and drift <= drift_threshold:
+            labels = [clusterer.label_map.get(c, c) for c in predicted.tolist()]
+            clusters = _assign_clusters(
+                vectors.urls, labels, existing, llm, repository, refresh_threshold
+            )
+            clusterer.save()
+            return clusters
+        logger.info(f"Refitting clusters: noise ratio {noise_ratio:.2f}, drift {drift:.2f}")
+
+    clusters = _refit_clusters(clusterer, existing, llm, repository, match_threshold)
+    clusterer.save()
+    new_urls = set(vectors.urls)
+    rows = [i for i, url in enumerate(clusters.urls) if url in new_urls]
+    return Cluster(
+        urls=[clusters.urls[i] for i in rows],
+        labels=clusters.labels[rows],
+        texts=[clusters.texts[i] for i in rows],
+    )
+
+
+def cluster_new(
+        summaries: Summary,
+        vectors: Vector,
+        clusterer: BaseClusterer,
+        llm: BaseLLM,
+        repository: BaseRepository,
+        incremental: bool = False,
+) -> Cluster:
+    """Cluster and name newly embedded urls and store the result"""
+    if incremental:
+        clusters = update_clusters(vectors, clusterer, llm, repository)
+    else:
+        clusters = generate_clusters(vectors, clusterer)
+        labels = clusters.labels
+        logger.info(f"Clustering {len(labels)} points, {len(np.unique(labels))} unique clusters")
+
+        clusters = clusters_to_summary(summaries, clusters, clusterer, vectors, llm)
+        repository.save_clusters(clusters)
+    logger.info(f"Generated {len(set(clusters.texts))} cluster texts for {len(clusters.labels)} points")
+    return clusters
+
+
+def _count(stage: str, done: int, failed: int = 0):
+    metrics.inc("bsai_stage_items_total", done, stage=stage)
+    if failed:
+        metrics.inc("bsai_stage_failed_items_total", failed, stage=stage)
+
+
+@metrics.timer("bsai_stage_seconds", stage="fetch")
+def _fetch(
+        urls: list[str], parser: BaseParser, repository: BaseRepository, ledger: StageLedger
+) -> ParsedText:
+    try:
+        parsed = parse_urls(urls, parser)
+    except Exception as e:
+        logger.error(e)
+        ledger.fail(urls, f"fetch: {e}")
+        _count("fetch", 0, len(urls))
+        return ParsedText(urls=[], texts=[])
+    repository.save_texts(parsed)
+    ledger.advance(parsed.urls, "fetched")
+    extracted = set(parsed.urls)
+    ledger.fail([url for url in urls if url not in extracted], "fetch: no content extracted")
+    _count("fetch", len(parsed.urls), len(urls) - len(extracted))
+    logger.info(f"Extracted {len(parsed.texts)} texts from {len(urls)} urls")
+    return parsed
+
+
+@metrics.timer("bsai_stage_seconds", stage="dedup")
+def _deduplicate(parsed: ParsedText, deduplicator: Deduplicator, ledger: StageLedger) -> ParsedText:
+    """Park near-duplicates of other pages at the "duplicate" stage; returns the rest"""
+    duplicates = deduplicator.group(parsed.urls, parsed.texts)
+    if not duplicates:
+        return parsed
+    ledger.advance(list(duplicates), "duplicate")
+    metrics.inc("bsai_duplicates_total", len(duplicates))
+    logger.info(f"Skipping {len(duplicates)} near-duplicate pages")
+    kept = [(url, text) for url, text in zip(parsed.urls, parsed.texts) if url not in duplicates]
+    return ParsedText(urls=[url for url, _ in kept], texts=[text for _, text in kept])
+
+
+def _copy_representatives(
+        urls: list[str], canonical: dict[str, str], repository: BaseRepository
+):
+    """Store the summary, vector and cluster row of each url's representative under the url"""
+    summaries = repository.get_summaries()
+    summary_of = dict(zip(summaries.urls, summaries.texts))
+    with_summary = [url for url in urls if canonical[url] in summary_of]
+    if with_summary:
+        repository.save_summaries(Summary(
+            urls=with_summary, texts=[summary_of[canonical[url]] for url in with_summary]
+        ))
+
+    vector_urls, matrix = repository.get_vector_matrix()
+    row_of = {url: i for i, url in enumerate(vector_urls)}
+    with_vector = [url for url in urls if canonical[url] in row_of]
+    if with_vector:
+        repository.save_vectors(Vector(
+            urls=with_vector,
+            vectors=np.asarray(matrix[[row_of[canonical[url]] for url in with_vector]]),
+        ))
+
+    clusters = repository.get_clusters()
+    cluster_of = dict(zip(clusters.urls, zip(np.asarray(clusters.labels).tolist(), clusters.texts)))
+    with_cluster = [url for url in urls if canonical[url] in cluster_of]
+    if with_cluster:
+        repository.save_clusters(Cluster(
+            urls=with_cluster,
+            labels=[cluster_of[canonical[url]][0] for url in with_cluster],
+            texts=[cluster_of[canonical[url]][1] for url in with_cluster],
+        ))
+
+
+def _link_duplicates(
+        urls: list[str], deduplicator: Deduplicator, repository: BaseRepository, ledger: StageLedger
+):
+    """Mark waiting duplicates as ingested once their representative is.
+
+    Each linked duplicate is stored with a copy of its representative's
+    summary, vector and cluster, so every read of the repository sees it.
+    Duplicates of a representative that failed for good go back to "fetched"
+    and are deduplicated again without it.
+    """
+    waiting = ledger.due(urls, "duplicate")
+    if not waiting:
+        return
+    canonical = dict(zip(waiting, deduplicator.canonical(waiting)))
+    missing = set(repository.get_not_existing_urls(list(set(canonical.values()))))
+    linked = [url for url in waiting if canonical[url] not in missing]
+    if linked:
+        _copy_representatives(linked, canonical, repository)
+        repository.save_urls(linked)
+        ledger.advance(linked, "clustered")
+        logger.info(f"Linked {len(linked)} near-duplicate pages to their representatives")
+    failed = [
+        url for url in missing
+        if (status := ledger.status(url)) is not None and status["failed"]
+    ]
+    if failed:
+        ledger.advance(deduplicator.drop(failed), "fetched")
+
+
+@metrics.timer("bsai_stage_seconds", stage="summarize")
+def _summarize(
+        parsed: ParsedText, llm: BaseLLM, repository: BaseRepository, ledger: StageLedger
+) -> Summary:
+    try:
+        summaries = generate_summary(parsed, llm)
+    except Exception as e:
+        logger.error(e)
+        ledger.fail(parsed.urls, f"summarize: {e}")
+        _count("summarize", 0, len(parsed.urls))
+        return Summary(urls=[], texts=[])
+    repository.save_summaries(summaries)
+    ledger.advance(summaries.urls, "summarized")
+    summarized = set(summaries.urls)
+    ledger.fail([url for url in parsed.urls if url not in summarized], "summarize: empty summary")
+    _count("summarize", len(summaries.urls), len(parsed.urls) - len(summarized))
+    logger.info(f"Generated {len(summaries.texts)} summaries")
+    return summaries
+
+
+@metrics.timer("bsai_stage_seconds", stage="embed")
+def _embed(
+        summaries: Summary,
+        vectorizer: BaseVectorizer,
+        repository: BaseRepository,
+        ledger: StageLedger,
+) -> Vector:
+    try:
+        vectors = generate_embedding(summaries, vectorizer)
+    except Exception as e:
+        logger.error(e)
+        ledger.fail(summaries.urls, f"embed: {e}")
+        _count("embed", 0, len(summaries.urls))
+        return Vector(urls=[], vectors=[])
+    repository.save_vectors(vectors)
+    ledger.advance(vectors.urls, "embedded")
+    _count("embed", len(vectors.urls))
+    logger.info(f"Generated {len(vectors.vectors)} embeddings")
+    return vectors
+
+
+def _collect(
+        urls: list[str], known_urls: list[str], known_values: list, load: Callable[[], tuple]
+) -> tuple[list[str], list]:
+    """Values for `urls` from this run's results, falling back to the repository"""
+    values = dict(zip(known_urls, known_values))
+    if any(url not in values for url in urls):
+        stored_urls, stored_values = load()
+        for url, value in zip(stored_urls, stored_values):
+            values.setdefault(url, value)
+    found = [url for url in urls if url in values]
+    return found, [values[url] for url in found]
+
+
+def _resume(
+        urls: list[str],
+        parser: BaseParser,
+        vectorizer: BaseVectorizer,
+        clusterer: BaseClusterer,
+        llm: BaseLLM,
+        repository: BaseRepository,
+        ledger: StageLedger,
+        incremental: bool = False,
+        deduplicator: Deduplicator | None = None,
+):
+    """Advance every due url in `urls` through the remaining stages"""
+
+    def load_texts(due: list[str]) -> tuple:
+        texts = repository.get_texts_by_url(due)
+        return texts.urls, texts.texts
+
+    def load_summaries() -> tuple:
+        summaries = repository.get_summaries()
+        return summaries.urls, summaries.texts
+
+    def lost(due: list[str], found: list[str], stage: str):
+        # stored output of an earlier stage is missing, so redo that stage
+        found = set(found)
+        ledger.advance([url for url in due if url not in found], stage)
+
+    parsed = ParsedText(urls=[], texts=[])
+    to_fetch = ledger.due(urls, "new")
+    if to_fetch:
+        parsed = _fetch(to_fetch, parser, repository, ledger)
+
+    summaries = Summary(urls=[], texts=[])
+    to_summarize = ledger.due(urls, "fetched")
+    if to_summarize:
+        found, texts = _collect(
+            to_summarize, parsed.urls, parsed.texts, lambda: load_texts(to_summarize)
+        )
+        lost(to_summarize, found, "new")
+        to_summarize = ParsedText(urls=found, texts=texts)
+        if found and deduplicator is not None:
+            to_summarize = _deduplicate(to_summarize, deduplicator, ledger)
+        if to_summarize.urls:
+            summaries = _summarize(to_summarize, llm, repository, ledger)
+
+    vectors = Vector(urls=[], vectors=[])
+    to_embed = ledger.due(urls, "summarized")
+    if to_embed:
+        found, texts = _collect(to_embed, summaries.urls, summaries.texts, load_summaries)
+        lost(to_embed, found, "fetched")
+        if found:
+            vectors = _embed(Summary(urls=found, texts=texts), vectorizer, repository, ledger)
+
+    to_cluster = ledger.due(urls, "embedded")
+    if not to_cluster:
+        return
+    vector_urls, rows = _collect(
+        to_cluster, vectors.urls, vectors.vectors, repository.get_vector_matrix
+    )
+    lost(to_cluster, vector_urls, "summarized")
+    found, texts = _collect(vector_urls, summaries.urls, summaries.texts, load_summaries)
+    lost(vector_urls, found, "fetched")
+    if not found:
+        return
+    with_summary = set(found)
+    rows = [row for url, row in zip(vector_urls, rows) if url in with_summary]
+    batch_summaries = Summary(urls=found, texts=texts)
+    batch_vectors = Vector(urls=found, vectors=np.asarray(rows, dtype=np.float32))
+    try:
+        with metrics.timer("bsai_stage_seconds", stage="cluster"):
+            clusters = cluster_new(
+                batch_summaries, batch_vectors, clusterer, llm, repository, incremental
+            )
+    except Exception as e:
+        logger.error(e)
+        ledger.fail(found, f"cluster: {e}")
+        _count("cluster", 0, len(found))
+        return
+    ledger.advance(clusters.urls, "clustered")
+    _count("cluster", len(clusters.urls))
+    repository.save_urls(clusters.urls)
+    if parsed.urls:
+        repository.save(parsed, batch_summaries, batch_vectors, clusters)
 
 
 def pipeline_urls(
@@ -77,44 +491,156 @@ def pipeline_urls(
         clusterer: BaseClusterer,
         llm: BaseLLM,
         repository: BaseRepository,
+        incremental: bool = False,
+        ledger: StageLedger | None = None,
+        deduplicator: Deduplicator | None = None,
 ):
+    """Ingest new urls, resuming each from the last stage recorded in `ledger`.
+
+    A url is saved as existing only once it is clustered, so an interrupted or
+    partly failed run continues where it stopped and failed urls are retried
+    after a backoff. Without a ledger progress is only tracked for this call.
+    With a `deduplicator`, near-duplicate pages are not summarized or embedded
+    but share the summary, vector and cluster of their representative.
+    """
+    ledger = ledger or StageLedger()
     urls = repository.get_not_existing_urls(urls)
-    n_urls = len(urls)
-    if n_urls > 0:
-        repository.save_urls(urls)
-        logger.info(f"Found {len(urls)} new urls")
+    if not urls:
+        return
+    ledger.add(urls)
+    logger.info(f"Found {len(urls)} new urls")
+    _resume(urls, parser, vectorizer, clusterer, llm, repository, ledger, incremental, deduplicator)
+    if deduplicator is not None:
+        _link_duplicates(urls, deduplicator, repository, ledger)
+    logger.info(f"Ingest status: {ledger.summary()}")
 
-        # parsed = repository.get_texts()
-        parsed = parse_urls(urls, parser)
-        repository.save_texts(parsed)
-        logger.info(f"Extracted {len(parsed.texts)} texts from {n_urls} urls")
 
-        # summaries = repository.get_summaries()
-        summaries = generate_summary(parsed, llm)
-        repository.save_summaries(summaries)
-        logger.info(f"Generated {len(summaries.texts)} summaries")
+_DONE = object()
 
-        # vectors = repository.get_vectors()
-        vectors = generate_embedding(summaries, vectorizer)
-        repository.save_vectors(vectors)
-        logger.info(f"Generated {len(vectors.vectors)} embeddings")
 
-        clusters = generate_clusters(vectors, clusterer)
-        labels = clusters.labels
-        logger.info(f"Clustering {len(labels)} points, {len(set(labels))} unique clusters")
+def _get(queue: Queue, stop: Event):
+    """Next item, or `_DONE` once `stop` is set"""
+    while True:
+        try:
+            return queue.get(timeout=0.1)
+        except Empty:
+            if stop.is_set():
+                return _DONE
 
-        clusters = clusters_to_summary(summaries, clusters, clusterer, vectors, llm)
-        repository.save_clusters(clusters)
-        logger.info(f"Generated {len(set(clusters.texts))} cluster texts for {len(clusters.labels)} points")
 
-        repository.save(parsed, summaries, vectors, clusters)
+def _put(queue: Queue, item, stop: Event):
+    """Put `item`, dropping it once `stop` is set and nobody reads the queue any more"""
+    while True:
+        try:
+            queue.put(item, timeout=0.1)
+            return
+        except Full:
+            if stop.is_set():
+                return
+
+
+def _run_stage(func: Callable, inbox: Queue, outbox: Queue, stop: Event):
+    """Apply `func` to each item until `_DONE` or `stop`; an error stops every stage"""
+    while not stop.is_set():
+        item = _get(inbox, stop)
+        if item is _DONE or isinstance(item, BaseException):
+            _put(outbox, item, stop)
+            return
+        try:
+            result = func(item)
+        except BaseException as e:
+            stop.set()
+            _put(outbox, e, stop)
+            return
+        _put(outbox, result, stop)
+    _put(outbox, _DONE, stop)
+
+
+def _stop_stages(threads: list[Thread], queues: list[Queue], stop: Event):
+    """Stop the stage threads, wait for them to exit and drop batches still queued"""
+    stop.set()
+    for thread in threads:
+        thread.join()
+    for queue in queues:
+        while True:
+            try:
+                queue.get_nowait()
+            except Empty:
+                break
+
+
+def pipeline_urls_streaming(
+        urls: list[str],
+        parser: BaseParser,
+        vectorizer: BaseVectorizer,
+        clusterer: BaseClusterer,
+        llm: BaseLLM,
+        repository: BaseRepository,
+        incremental: bool = False,
+        ledger: StageLedger | None = None,
+        batch_size: int = 32,
+        queue_size: int = 2,
+        deduplicator: Deduplicator | None = None,
+):
+    """`pipeline_urls` with parse, summarize and embed overlapped over micro-batches.
+
+    Each stage runs in its own thread, connected by queues holding at most
+    `queue_size` batches, and persists its output as soon as a batch is done.
+    Urls resumed from an earlier run and the final clustering then go through
+    the staged path. The combined `save` table is not written.
+    """
+    ledger = ledger or StageLedger()
+    urls = repository.get_not_existing_urls(urls)
+    if not urls:
+        return
+    ledger.add(urls)
+    logger.info(f"Found {len(urls)} new urls")
+
+    def fetch(batch: list[str]) -> ParsedText:
+        return _fetch(batch, parser, repository, ledger)
+
+    def summarize(parsed: ParsedText) -> Summary:
+        if deduplicator is not None:
+            parsed = _deduplicate(parsed, deduplicator, ledger)
+            if not parsed.urls:
+                return Summary(urls=[], texts=[])
+        return _summarize(parsed, llm, repository, ledger)
 
+    def embed(summaries: Summary) -> Vector:
+        return _embed(summaries, vectorizer, repository, ledger)
 
-def recommend_random(repository: BaseRepository) -> tuple[str, str]:
-    summary = repository.get_summaries()
-    idx = np.random.choice(len(summary.urls))
-    return summary.urls[idx], summary.texts[idx]
+    fresh = ledger.due(urls, "new")
+    batches = Queue()
+    for i in range(0, len(fresh), batch_size):
+        batches.put(fresh[i:i + batch_size])
+    batches.put(_DONE)
+    queues = [batches] + [Queue(maxsize=queue_size) for _ in range(3)]
+    stop = Event()
+    threads = [
+        Thread(target=_run_stage, args=(func, inbox, outbox, stop), daemon=True)
+        for func, inbox, outbox in zip([fetch, summarize, embed], queues, queues[1:])
+    ]
+    for thread in threads:
+        thread.start()
 
+    start = time.monotonic()
+    n_embedded = 0
+    try:
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            n_embedded += len(item.urls)
+            logger.info(
+                f"Embedded {n_embedded}/{len(fresh)} urls after {time.monotonic() - start:.1f}s"
+            )
+    finally:
+        # on an error, no stage is left blocked on a full queue or working on later batches
+        _stop_stages(threads, queues, stop)
 
-def show_clusters(repository: BaseRepository):
-    visualize_clusters(repository.get_clusters(), repository.get_vectors())
+    _resume(urls, parser, vectorizer, clusterer, llm, repository, ledger, incremental, deduplicator)
+    if deduplicator is not None:
+        _link_duplicates(urls, deduplicator, repository, ledger)
+    logger.info(f"Ingest status: {ledger.summary()}")
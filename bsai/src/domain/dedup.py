@@ -0,0 +1,166 @@
+"""Near-duplicate page detection with MinHash signatures and LSH banding"""
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from bsai.src.domain.text import strip_boilerplate
+
+WORD = re.compile(r"\w+")
+
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> np.ndarray:
+    """Distinct 64-bit hashes of the word `shingle_size`-grams of a page, boilerplate removed"""
+    words = WORD.findall(strip_boilerplate(text).lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    vocabulary = {word: zlib.crc32(word.encode()) for word in set(words)}
+    hashes = np.fromiter(map(vocabulary.__getitem__, words), dtype=np.uint64, count=len(words))
+    k = min(shingle_size, len(hashes))
+    shingles = np.zeros(len(hashes) - k + 1, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(k):
+            shingles = shingles * np.uint64(1_000_003) + hashes[j:len(hashes) - k + 1 + j]
+    return np.unique(shingles)
+
+
+class Deduplicator:
+    """Groups near-identical page texts so only one per group is summarized and embedded.
+
+    Each text gets a `num_perm`-value MinHash signature. Signatures are split into
+    `bands` bands, and texts sharing any band bucket become candidates. A candidate
+    counts as a duplicate when the estimated Jaccard similarity of their shingle sets
+    reaches `threshold`. Representatives' signatures and duplicate -> representative
+    links are kept in SQLite, so later runs also match against earlier pages.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # odd multipliers keep the multiply-shift hashes universal
+        self.a = rng.integers(0, 2**64, num_perm, dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self.b = rng.integers(0, 2**64, num_perm, dtype=np.uint64, endpoint=False)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS signatures (url TEXT PRIMARY KEY, signature BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS duplicates (url TEXT PRIMARY KEY, canonical TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS duplicates_canonical ON duplicates (canonical)")
+        self.signatures: dict[str, np.ndarray] = {}
+        self.buckets: list[dict[bytes, list[str]]] = [defaultdict(list) for _ in range(bands)]
+        for url, blob in self._conn.execute("SELECT url, signature FROM signatures ORDER BY rowid"):
+            self._index(url, np.frombuffer(blob, dtype=np.uint32))
+
+    def signature(self, text: str) -> np.ndarray | None:
+        shingles = shingle_hashes(text, self.shingle_size)
+        if not len(shingles):
+            return None
+        # multiply-shift hashing: the top 32 bits of a * x + b mod 2^64
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(shingles, self.a) + self.b) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _bands(self, signature: np.ndarray) -> list[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _index(self, url: str, signature: np.ndarray):
+        self.signatures[url] = signature
+        for buckets, key in zip(self.buckets, self._bands(signature)):
+            buckets[key].append(url)
+
+    def _match(self, signature: np.ndarray) -> str | None:
+        """Most similar indexed url at or above the threshold"""
+        candidates = dict.fromkeys(
+            url for buckets, key in zip(self.buckets, self._bands(signature)) for url in buckets.get(key, ())
+        )
+        best, best_similarity = None, self.threshold
+        for url in candidates:
+            similarity = float(np.mean(self.signatures[url] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = url, similarity
+        return best
+
+    def group(self, urls: list[str], texts: list[str]) -> dict[str, str]:
+        """Map each duplicate url to its representative; urls left out represent themselves.
+
+        Representatives are the first of a group seen, in this batch or an earlier one.
+        """
+        duplicates = {}
+        new_signatures = []
+        with self._lock:
+            for url, text in zip(urls, texts):
+                if url in self.signatures:
+                    continue
+                signature = self.signature(text)
+                if signature is None:
+                    continue
+                canonical = self._match(signature)
+                if canonical is None:
+                    self._index(url, signature)
+                    new_signatures.append((url, signature.tobytes()))
+                else:
+                    duplicates[url] = canonical
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO signatures (url, signature) VALUES (?, ?)", new_signatures
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO duplicates (url, canonical) VALUES (?, ?)",
+                    list(duplicates.items()),
+                )
+        return duplicates
+
+    def canonical(self, urls: list[str]) -> list[str]:
+        """The representative whose summary, vector and cluster each url shares"""
+        links = {}
+        with self._lock:
+            for i in range(0, len(urls), 500):
+                batch = urls[i:i + 500]
+                links.update(self._conn.execute(
+                    f"SELECT url, canonical FROM duplicates WHERE url IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall())
+        return [links.get(url, url) for url in urls]
+
+    def drop(self, urls: list[str]) -> list[str]:
+        """Stop using `urls` as representatives; returns the duplicates that were linked to them"""
+        with self._lock:
+            for url in urls:
+                signature = self.signatures.pop(url, None)
+                if signature is None:
+                    continue
+                for buckets, key in zip(self.buckets, self._bands(signature)):
+                    buckets[key].remove(url)
+            with self._conn:
+                params = [(url,) for url in urls]
+                orphans = [
+                    url
+                    for param in params
+                    for url, in self._conn.execute("SELECT url FROM duplicates WHERE canonical = ?", param)
+                ]
+                self._conn.executemany("DELETE FROM signatures WHERE url = ?", params)
+                self._conn.executemany("DELETE FROM duplicates WHERE canonical = ?", params)
+        return orphans
@@ -0,0 +1,198 @@
+import json
+import os
+
+import numpy as np
+from loguru import logger
+
+from bsai.src.domain.repository import BaseRepository, VectorStore
+
+
+def normalize(vectors) -> np.ndarray:
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorIndex:
+    """Persisted cosine nearest-neighbour index over stored embeddings.
+
+    Unit-normalized vectors are kept in an append-only `VectorStore`. Below
+    `ivf_threshold` rows a query is a batched dot product against the whole
+    matrix; above it an IVF coarse quantizer is trained and only the `nprobe`
+    closest inverted lists are scanned. New rows are assigned to the existing
+    lists, and the quantizer is retrained once the index has grown `retrain_factor`
+    times since the last training. A vector saved again for an indexed url
+    replaces its row. `sync` remembers how far it has read the repository, so it
+    only fetches vectors saved since.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ivf_threshold: int = 20_000,
+        nprobe: int = 8,
+        retrain_factor: float = 4.0,
+        batch_size: int = 65_536,
+    ):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.retrain_factor = retrain_factor
+        self.batch_size = batch_size
+        self.store = VectorStore(path, "normalized")
+        self.centroids_path = os.path.join(path, "centroids.npy")
+        self.assign_path = os.path.join(path, "assign.i32")
+        self.meta_path = os.path.join(path, "ivf.json")
+        self.sync_path = os.path.join(path, "sync.json")
+        self._load()
+
+    def _load(self):
+        self.urls, self.matrix = self.store.load()
+        self.positions = {url: i for i, url in enumerate(self.urls)}
+        self.centroids = None
+        self.trained_size = 0
+        self.assign = np.empty(0, dtype=np.int32)
+        if os.path.exists(self.centroids_path) and os.path.exists(self.meta_path):
+            self.centroids = np.load(self.centroids_path)
+            with open(self.meta_path) as f:
+                self.trained_size = json.load(f)["trained_size"]
+            self.assign = np.fromfile(self.assign_path, dtype=np.int32)[:len(self.urls)]
+        self.synced = 0
+        if os.path.exists(self.sync_path):
+            with open(self.sync_path) as f:
+                self.synced = json.load(f)["position"]
+        self._build_lists()
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.positions
+
+    def vector(self, url: str) -> np.ndarray:
+        return np.asarray(self.matrix[self.positions[url]])
+
+    def _build_lists(self):
+        if self.centroids is None:
+            self.order = self.bounds = None
+            return
+        self.order = np.argsort(self.assign, kind="stable")
+        self.bounds = np.searchsorted(
+            self.assign[self.order], np.arange(len(self.centroids) + 1)
+        )
+
+    def _assign(self, matrix: np.ndarray) -> np.ndarray:
+        labels = [
+            np.argmax(matrix[i:i + self.batch_size] @ self.centroids.T, axis=1)
+            for i in range(0, len(matrix), self.batch_size)
+        ]
+        return np.concatenate(labels).astype(np.int32) if labels else np.empty(0, np.int32)
+
+    def _train(self):
+        # imported here: scikit-learn is slow to import and only needed past ivf_threshold
+        from sklearn.cluster import MiniBatchKMeans
+
+        n_lists = max(1, min(len(self.urls), int(4 * np.sqrt(len(self.urls)))))
+        logger.info(f"Training IVF index with {n_lists} lists on {len(self.urls)} vectors")
+        rng = np.random.default_rng(42)
+        sample = rng.choice(len(self.urls), min(len(self.urls), 64 * n_lists), replace=False)
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=42, n_init=1)
+        kmeans.fit(self.matrix[np.sort(sample)])
+        self.centroids = normalize(kmeans.cluster_centers_)
+        self.assign = self._assign(self.matrix)
+        self.trained_size = len(self.urls)
+        np.save(self.centroids_path, self.centroids)
+        self.assign.tofile(self.assign_path)
+        with open(self.meta_path, "w") as f:
+            json.dump({"trained_size": self.trained_size}, f)
+
+    def _replace(self, ids: list[int], matrix: np.ndarray):
+        self.store.update(ids, matrix)
+        self.urls, self.matrix = self.store.load()
+        if self.centroids is None:
+            return
+        labels = self._assign(matrix)
+        self.assign[ids] = labels
+        with open(self.assign_path, "r+b") as f:
+            for i, label in zip(ids, labels):
+                f.seek(i * labels.itemsize)
+                f.write(label.tobytes())
+        self._build_lists()
+
+    def add(self, urls: list[str], vectors) -> int:
+        """Index vectors, replacing rows of known urls; returns how many were new"""
+        # the last vector of a url wins
+        rows = {url: i for i, url in enumerate(urls)}
+        if not rows:
+            return 0
+        matrix = normalize(np.asarray(vectors, dtype=np.float32)[list(rows.values())])
+        known = np.array([url in self.positions for url in rows])
+        if known.any():
+            ids = [self.positions[url] for url in rows if url in self.positions]
+            self._replace(ids, matrix[known])
+        new_urls = [url for url in rows if url not in self.positions]
+        if not new_urls:
+            return 0
+        matrix = matrix[~known]
+        self.store.append(new_urls, matrix)
+        self.urls, self.matrix = self.store.load()
+        self.positions.update((url, i) for i, url in enumerate(new_urls, len(self.positions)))
+
+        needs_training = len(self.urls) >= self.ivf_threshold and (
+            self.centroids is None or len(self.urls) >= self.retrain_factor * self.trained_size
+        )
+        if needs_training:
+            self._train()
+        elif self.centroids is not None:
+            labels = self._assign(matrix)
+            with open(self.assign_path, "ab") as f:
+                labels.tofile(f)
+            self.assign = np.concatenate([self.assign, labels])
+        self._build_lists()
+        return len(new_urls)
+
+    def sync(self, repository: BaseRepository) -> int:
+        """Index stored vectors that were saved since the last sync"""
+        urls, matrix, position = repository.get_vectors_since(self.synced)
+        added = self.add(urls, matrix)
+        if position != self.synced:
+            # written after the vectors, so an interrupted sync only repeats work
+            with open(self.sync_path, "w") as f:
+                json.dump({"position": position}, f)
+            self.synced = position
+        return added
+
+    def search(self, queries, k: int = 10) -> list[list[tuple[str, float]]]:
+        """Top-k (url, cosine similarity) for each query vector"""
+        queries = normalize(queries)
+        if len(self.urls) == 0:
+            return [[] for _ in queries]
+        if self.centroids is None:
+            return [self._top_k(np.arange(len(self.urls)), scores, k) for scores in self._scan(queries)]
+
+        results = []
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :self.nprobe]
+        for query, lists in zip(queries, probes):
+            candidates = np.concatenate(
+                [self.order[self.bounds[j]:self.bounds[j + 1]] for j in lists]
+            )
+            candidates.sort()
+            scores = self.matrix[candidates] @ query
+            results.append(self._top_k(candidates, scores, k))
+        return results
+
+    def _scan(self, queries: np.ndarray) -> np.ndarray:
+        scores = np.empty((len(queries), len(self.urls)), dtype=np.float32)
+        for i in range(0, len(self.urls), self.batch_size):
+            scores[:, i:i + self.batch_size] = queries @ self.matrix[i:i + self.batch_size].T
+        return scores
+
+    def _top_k(self, ids: np.ndarray, scores: np.ndarray, k: int) -> list[tuple[str, float]]:
+        k = min(k, len(ids))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.urls[ids[i]], float(scores[i])) for i in top]
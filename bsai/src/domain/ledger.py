@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Ingest stages in order; a url's stage is the last one it completed. A near-duplicate
+# page waits at "duplicate" until the page it duplicates is clustered.
+STAGES = ("new", "fetched", "duplicate", "summarized", "embedded", "clustered")
+
+
+class StageLedger:
+    """Per-url ingest progress with failure bookkeeping, kept in SQLite.
+
+    A failed url stays at its last completed stage and becomes due again after
+    an exponential backoff, until it has failed `max_attempts` times in a row.
+    """
+
+    def __init__(self, path: str = ":memory:", max_attempts: int = 3, backoff: float = 60.0):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ledger ("
+            "url TEXT PRIMARY KEY, stage TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "last_error TEXT, retry_at REAL NOT NULL DEFAULT 0, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ledger_stage ON ledger (stage)")
+
+    def add(self, urls: list[str]):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO ledger (url, stage, updated) VALUES (?, 'new', ?)",
+                [(url, now) for url in urls],
+            )
+
+    def advance(self, urls: list[str], stage: str):
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE ledger SET stage = ?, attempts = 0, last_error = NULL, retry_at = 0, "
+                "updated = ? WHERE url = ?",
+                [(stage, now, url) for url in urls],
+            )
+
+    def fail(self, urls: list[str], error: str):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE ledger SET attempts = attempts + 1, last_error = ?, "
+                "retry_at = ? * (1 << attempts) + ?, updated = ? WHERE url = ?",
+                [(error, self.backoff, now, now, url) for url in urls],
+            )
+
+    def due(self, urls: list[str], stage: str) -> list[str]:
+        """Urls among `urls` waiting at `stage` that are not failed out or backing off"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM ledger WHERE stage = ? AND attempts < ? AND retry_at <= ?",
+                (stage, self.max_attempts, time.time()),
+            ).fetchall()
+        waiting = {url for url, in rows}
+        return [url for url in dict.fromkeys(urls) if url in waiting]
+
+    def status(self, url: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stage, attempts, last_error, retry_at FROM ledger WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        stage, attempts, last_error, retry_at = row
+        return {
+            "stage": stage,
+            "attempts": attempts,
+            "last_error": last_error,
+            "retry_at": retry_at,
+            "failed": attempts >= self.max_attempts,
+        }
+
+    def failed(self) -> list[tuple[str, str, str]]:
+        """(url, stage, last error) of urls that exhausted their attempts"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT url, stage, last_error FROM ledger WHERE attempts >= ?",
+                (self.max_attempts,),
+            ).fetchall()
+
+    def summary(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, COUNT(*) FROM ledger WHERE attempts < ? GROUP BY stage",
+                (self.max_attempts,),
+            ).fetchall()
+            n_failed = self._conn.execute(
+                "SELECT COUNT(*) FROM ledger WHERE attempts >= ?", (self.max_attempts,)
+            ).fetchone()[0]
+        counts = dict.fromkeys(STAGES, 0)
+        counts.update(rows)
+        counts["failed"] = n_failed
+        return counts
@@ -1,9 +1,25 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable
+
 from loguru import logger
-from openai import OpenAI
+from openai import AsyncOpenAI, AuthenticationError, BadRequestError, OpenAI
 from pydantic import BaseModel
 
+from bsai.src.cache import DiskCache, content_key
+from bsai.src.domain.text import TokenCounter, spread, strip_boilerplate
+from bsai.src.metrics import metrics
+from bsai.src.utils import TokenBucket
 from config import settings
 
+# Errors that will not go away on retry
+FATAL_ERRORS = (AuthenticationError, BadRequestError)
+
+# AsyncOpenAI client of the running event loop, see `OpenAIModel._session`
+_async_client: ContextVar[AsyncOpenAI | None] = ContextVar("async_client", default=None)
+
 LONG_SUMMARY_PROMPT_SYSTEM = """You are an advanced summarization assistant. 
 Your task is to generate complete, detailed, and informative summaries of the content from a website. 
 These summaries should be factual and preserve the key information and details. 
@@ -24,6 +40,20 @@ Input:
 Summary:
 """
 
+CHUNK_SUMMARY_PROMPT_USER = """I will provide one part of a long webpage. Summarize this part:
+
+- Keep the key points, facts, names and numbers it contains.
+- Ignore navigation, advertisements and other page boilerplate.
+- Do not add information that is not in the text.
+
+Input:
+{query}
+
+Summary of this part:
+"""
+
+COMBINED_SUMMARY_HEADER = "Summaries of consecutive parts of a long webpage:\n\n"
+
 SHORT_SUMMARY_PROMPT_SYSTEM = """You are a clustering assistant specializing in creating short, meaningful summaries. 
 Your task is to analyze few detailed summaries within a cluster and generate a brief, highly descriptive summary 
 that captures the semantic core of the cluster. 
@@ -55,58 +85,307 @@ class BaseLLM:
     def get_cluster_topic(self, texts: list[str]) -> str:
         raise NotImplementedError
 
+    def get_cluster_topics(self, groups: list[list[str]]) -> list[str]:
+        return [self.get_cluster_topic(texts) for texts in groups]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, ~4 characters per token"""
+    return len(text) // 4 + 1
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code.
+
+    Called from a running event loop, e.g. a notebook or an async web handler,
+    it runs on a fresh loop in a worker thread; the calling loop is blocked
+    until it is done, so async callers should await the coroutine instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
 
 class OpenAIModel(BaseLLM):
-    def __init__(self, name: str):
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 8,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        timeout: float = 60.0,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        cache: DiskCache | None = None,
+        max_input_tokens: int = 8_000,
+        map_reduce_tokens: int = 32_000,
+        chunk_tokens: int = 4_000,
+        max_chunks: int = 8,
+    ):
         self.name = name
         self.client = OpenAI(api_key=settings.llm.token)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.requests_budget = TokenBucket(requests_per_minute)
+        self.tokens_budget = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache = cache
+        self.max_input_tokens = max_input_tokens
+        self.map_reduce_tokens = map_reduce_tokens
+        self.chunk_tokens = chunk_tokens
+        self.max_chunks = max_chunks
+        self._counter = None
+
+    @property
+    def counter(self) -> TokenCounter:
+        if self._counter is None:
+            self._counter = TokenCounter(self.name)
+        return self._counter
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[AsyncOpenAI]:
+        """The async client for the running event loop, opened by the outermost caller.
+
+        Its pooled connections are bound to the loop they were opened on, so every
+        `run_sync` gets a new client, closed before the loop is.
+        """
+        client = _async_client.get()
+        if client is not None:
+            yield client
+            return
+        client = AsyncOpenAI(api_key=settings.llm.token, timeout=self.timeout, max_retries=0)
+        token = _async_client.set(client)
+        try:
+            yield client
+        finally:
+            _async_client.reset(token)
+            await client.close()
+
+    def _dialog_tokens(self, dialog: list[dict]) -> int:
+        # each message carries a few tokens of chat formatting on top of its content
+        return sum(4 + self.counter.count(message['content']) for message in dialog)
+
+    def _cache_key(self, dialog: list[dict], structure: BaseModel | None = None) -> str:
+        schema = structure.model_json_schema() if structure is not None else None
+        return content_key(self.name, dialog, schema)
+
+    def _cached(self, key: str) -> str | None:
+        if self.cache is None:
+            return None
+        value = self.cache.get(key)
+        hit = "true" if value is not None else "false"
+        metrics.inc("bsai_cache_lookups_total", cache="completion", hit=hit)
+        return value.decode('utf-8') if value is not None else None
+
+    def _store(self, key: str, content: str):
+        if self.cache is not None:
+            self.cache.set(key, content.encode('utf-8'))
+
+    def _record_usage(self, completion):
+        if completion.usage is not None:
+            metrics.record_tokens(
+                self.name, completion.usage.prompt_tokens, completion.usage.completion_tokens
+            )
+
+    def _content(self, completion, structure: BaseModel | None = None) -> str:
+        if structure is None:
+            return completion.choices[0].message.content
+        content = completion.choices[0].message.parsed
+        if content.is_useful:
+            return content.summary
+        else:
+            return ""
 
     def generate(self, dialog: list[dict], structure: BaseModel | None = None) -> str:
+        key = self._cache_key(dialog, structure)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
         try:
-            if structure is None:
-                completion = self.client.chat.completions.create(
-                    model=self.name,
-                    messages=dialog,
-                )
-                return completion.choices[0].message.content
-            else:
-                completion = self.client.beta.chat.completions.parse(
-                    model=self.name,
-                    messages=dialog,
-                    response_format=Summary,
-                )
-                content = completion.choices[0].message.parsed
-                if content.is_useful:
-                    return content.summary
+            with metrics.request("openai_chat"):
+                if structure is None:
+                    completion = self.client.chat.completions.create(
+                        model=self.name,
+                        messages=dialog,
+                    )
                 else:
-                    return ""
+                    completion = self.client.beta.chat.completions.parse(
+                        model=self.name,
+                        messages=dialog,
+                        response_format=Summary,
+                    )
+            self._record_usage(completion)
+            content = self._content(completion, structure)
         except Exception as e:
             logger.error(e)
             return ""
+        self._store(key, content)
+        return content
 
-    def get_summary(self, texts: list[str]) -> list[str]:
-        results = []
-        for query in texts:
-            summary = self.get_single_summary(query)
-            results.append(summary)
+    async def agenerate(self, dialog: list[dict], structure: BaseModel | None = None) -> str:
+        """Async `generate` within the request/token budgets; "" when it keeps failing"""
+        try:
+            return await self._agenerate(dialog, structure)
+        except Exception as e:
+            logger.error(e)
+            return ""
+
+    async def _agenerate(self, dialog: list[dict], structure: BaseModel | None = None) -> str:
+        """Completion retrying transient errors; raises once retries are exhausted"""
+        key = self._cache_key(dialog, structure)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        async with self._session() as client:
+            for attempt in range(self.max_retries + 1):
+                await self.requests_budget.async_wait()
+                await self.tokens_budget.async_wait(self._dialog_tokens(dialog))
+                try:
+                    with metrics.request("openai_chat"):
+                        if structure is None:
+                            completion = await client.chat.completions.create(
+                                model=self.name,
+                                messages=dialog,
+                            )
+                        else:
+                            completion = await client.beta.chat.completions.parse(
+                                model=self.name,
+                                messages=dialog,
+                                response_format=Summary,
+                            )
+                    self._record_usage(completion)
+                    content = self._content(completion, structure)
+                    self._store(key, content)
+                    return content
+                except FATAL_ERRORS:
+                    raise
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        raise RuntimeError(f"Giving up after {attempt + 1} attempts: {e}") from e
+                    delay = self.backoff * 2 ** attempt
+                    metrics.inc("bsai_api_retries_total", api="openai_chat")
+                    logger.warning(f"Completion failed ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+
+    def get_summary(
+        self, texts: list[str], progress: Callable[[int, int], None] | None = None
+    ) -> list[str]:
+        return run_sync(self.aget_summary(texts, progress))
+
+    async def aget_summary(
+        self, texts: list[str], progress: Callable[[int, int], None] | None = None
+    ) -> list[str]:
+        """Summarize concurrently; the result is aligned with `texts`"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = [""] * len(texts)
+        done = 0
+
+        async def summarize(i: int, query: str):
+            nonlocal done
+            results[i] = await self._asummarize(query, semaphore)
+            done += 1
+            if progress is not None:
+                progress(done, len(texts))
+            elif done % 50 == 0 or done == len(texts):
+                logger.info(f"Summarized {done}/{len(texts)} texts")
+
+        async with self._session():
+            await asyncio.gather(*(summarize(i, query) for i, query in enumerate(texts)))
         return results
 
-    def get_single_summary(self, query: str) -> str:
-        dialog = [
+    def _prepare(self, text: str) -> list[str]:
+        """Cleaned page text within the input budget, or several chunks to map-reduce.
+
+        Pages up to `max_input_tokens` pass whole, pages up to `map_reduce_tokens`
+        are truncated to `max_input_tokens`, and longer ones are split into
+        `chunk_tokens` chunks of which at most `max_chunks`, spread over the page,
+        are summarized.
+        """
+        text = strip_boilerplate(text)
+        tokens = self.counter.count(text)
+        if tokens <= self.max_input_tokens:
+            return [text]
+        if tokens <= self.map_reduce_tokens:
+            metrics.inc("bsai_long_texts_total", mode="truncated")
+            return [self.counter.truncate(text, self.max_input_tokens)]
+        metrics.inc("bsai_long_texts_total", mode="map_reduce")
+        return spread(self.counter.split(text, self.chunk_tokens), self.max_chunks)
+
+    async def _asummarize(self, text: str, semaphore: asyncio.Semaphore) -> str:
+        async def limited(dialog: list[dict], structure: BaseModel | None = None) -> str:
+            async with semaphore:
+                return await self.agenerate(dialog, structure)
+
+        parts = self._prepare(text)
+        if len(parts) == 1:
+            return await limited(self._summary_dialog(parts[0]), Summary)
+        partial = await asyncio.gather(*(limited(self._chunk_dialog(part)) for part in parts))
+        partial = [summary for summary in partial if summary]
+        if not partial:
+            return ""
+        combined = COMBINED_SUMMARY_HEADER + "\n\n".join(partial)
+        combined = self.counter.truncate(combined, self.max_input_tokens)
+        return await limited(self._summary_dialog(combined), Summary)
+
+    def _summary_dialog(self, query: str) -> list[dict]:
+        return [
             {'role': 'system', 'content': LONG_SUMMARY_PROMPT_SYSTEM},
             {'role': 'user', 'content': LONG_SUMMARY_PROMPT_USER.format(query=query)},
         ]
-        return self.generate(dialog, Summary)
 
-    def get_cluster_topic(self, texts: list[str]) -> str:
+    def _chunk_dialog(self, query: str) -> list[dict]:
+        return [
+            {'role': 'system', 'content': LONG_SUMMARY_PROMPT_SYSTEM},
+            {'role': 'user', 'content': CHUNK_SUMMARY_PROMPT_USER.format(query=query)},
+        ]
+
+    def get_single_summary(self, query: str) -> str:
+        return self.get_summary([query])[0]
+
+    def _topic_dialog(self, texts: list[str]) -> list[dict]:
         cluster_texts = "\n- " + "\n- ".join(texts)
-        dialog = [
+        return [
             {'role': 'system', 'content': SHORT_SUMMARY_PROMPT_SYSTEM},
             {'role': 'user', 'content': SHORT_SUMMARY_PROMPT_USER.format(query=cluster_texts)},
         ]
-        return self.generate(dialog)
+
+    def get_cluster_topic(self, texts: list[str]) -> str:
+        return self.generate(self._topic_dialog(texts))
+
+    def get_cluster_topics(self, groups: list[list[str]]) -> list[str]:
+        return run_sync(self.aget_cluster_topics(groups))
+
+    async def aget_cluster_topics(self, groups: list[list[str]]) -> list[str]:
+        """Topics for several clusters concurrently, aligned with `groups`.
+
+        Raises when any topic could not be generated instead of leaving it empty;
+        the topics that were generated are cached for the next attempt.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def topic(texts: list[str]) -> str:
+            async with semaphore:
+                return await self._agenerate(self._topic_dialog(texts))
+
+        async with self._session():
+            topics = await asyncio.gather(
+                *(topic(texts) for texts in groups), return_exceptions=True
+            )
+        errors = [topic for topic in topics if isinstance(topic, BaseException)]
+        if errors:
+            raise RuntimeError(
+                f"Failed to generate {len(errors)}/{len(groups)} cluster topics: {errors[0]}"
+            ) from errors[0]
+        return list(topics)
 
     def get_embeddings(self, texts: list[str], model="text-embedding-3-large"):
         texts = [text.replace("\n", " ") for text in texts]
-        embeddings = self.client.embeddings.create(input=texts, model=model)
+        with metrics.request("openai_embeddings"):
+            embeddings = self.client.embeddings.create(input=texts, model=model)
+        if embeddings.usage is not None:
+            metrics.record_tokens(model, embeddings.usage.prompt_tokens)
         return [emb.embedding for emb in embeddings.data]
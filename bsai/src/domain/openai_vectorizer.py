@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bsai.src.cache import DiskCache, content_key
+from bsai.src.domain.llm import OpenAIModel, estimate_tokens
+from bsai.src.domain.vectorizer import BaseVectorizer
+
+
+class OpenAIVectorizer(BaseVectorizer):
+    def __init__(
+        self,
+        emb_model='text-embedding-3-small',
+        batch_size: int = 256,
+        max_batch_tokens: int = 250_000,
+        max_workers: int = 4,
+        cache: DiskCache | None = None,
+    ):
+        super().__init__()
+        self.llm = OpenAIModel('gpt-4o-mini')
+        self.emb_model = emb_model
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_workers = max_workers
+        self.cache = cache
+
+    def _batches(self, texts: list[str]) -> list[list[str]]:
+        """Split texts so each request stays under the item and token limits"""
+        batches = []
+        batch = []
+        batch_tokens = 0
+        for text in texts:
+            tokens = estimate_tokens(text)
+            if batch and (len(batch) >= self.batch_size or batch_tokens + tokens > self.max_batch_tokens):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _embed(self, texts: list[str]) -> dict[str, np.ndarray]:
+        embeddings = self.llm.get_embeddings(texts, self.emb_model)
+        vectors = {text: np.asarray(emb, dtype=np.float32) for text, emb in zip(texts, embeddings)}
+        if self.cache is not None:
+            self.cache.set_many(
+                {content_key(self.emb_model, text): vec.tobytes() for text, vec in vectors.items()}
+            )
+        return vectors
+
+    def transform(self, texts: list[str]) -> np.ndarray:
+        unique = list(dict.fromkeys(texts))
+        vectors = {}
+        if self.cache is not None:
+            keys = {text: content_key(self.emb_model, text) for text in unique}
+            cached = self.cache.get_many(list(keys.values()))
+            for text, key in keys.items():
+                if key in cached:
+                    vectors[text] = np.frombuffer(cached[key], dtype=np.float32)
+
+        missing = [text for text in unique if text not in vectors]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for batch_vectors in executor.map(self._embed, self._batches(missing)):
+                vectors.update(batch_vectors)
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([vectors[text] for text in texts])
+
+    def fit_transform(self, texts: list[str]) -> np.ndarray:
+        return self.transform(texts)
@@ -1,8 +1,17 @@
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
-from tavily import TavilyClient
+from tavily import BadRequestError, InvalidAPIKeyError, MissingAPIKeyError, TavilyClient
 from loguru import logger
 
+from bsai.src.metrics import metrics
+from bsai.src.utils import RateLimiter
+
+# Errors that will not go away on retry
+FATAL_ERRORS = (BadRequestError, InvalidAPIKeyError, MissingAPIKeyError)
+
+
 class BaseParser(ABC):
     @abstractmethod
     def extract(self, urls: list[str]) -> tuple[list[str], list[str]]:
@@ -10,28 +19,61 @@ class BaseParser(ABC):
 
 
 class TavilyParser(BaseParser):
-    def __init__(self, token: str):
+    def __init__(
+        self,
+        token: str,
+        max_workers: int = 8,
+        requests_per_second: float | None = 5.0,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        base_url: str | None = None,
+    ):
         self.client = TavilyClient(api_key=token)
+        if base_url is not None:
+            self.client.base_url = base_url
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(requests_per_second)
+        self.max_retries = max_retries
+        self.backoff = backoff
 
     def extract(self, urls: list[str], chunk_size: int = 2) -> tuple[list[str], list[str]]:
-        result = []
+        """Extract chunks concurrently, returning (urls, texts) in input order"""
+        chunks = [urls[i:i + chunk_size] for i in range(0, len(urls), chunk_size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            chunk_results = list(executor.map(self._extract, chunks))
+
         valid_urls = []
-        for i in range(0, len(urls), chunk_size):
-            chunk = urls[i:i + chunk_size]
-            chunk_result, chunk_valid_urls = self._extract(chunk)
-            result.extend(chunk_result)
+        result = []
+        for chunk_valid_urls, chunk_result in chunk_results:
             valid_urls.extend(chunk_valid_urls)
-        return result, valid_urls
+            result.extend(chunk_result)
+        return valid_urls, result
 
     def _extract(self, urls: list[str]) -> tuple[list[str], list[str]]:
-        result = []
-        valid_urls = []
-        try:
-            results = self.client.extract(urls=urls)["results"]
-            for content in results:
-                result.append(content["raw_content"])
-                valid_urls.append(content["url"])
-        except Exception as e:
-            logger.error(e)
-
-        return result, valid_urls
+        for attempt in range(self.max_retries + 1):
+            self.limiter.wait()
+            try:
+                with metrics.request("tavily"):
+                    results = self.client.extract(urls=urls)["results"]
+            except FATAL_ERRORS as e:
+                logger.error(e)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Giving up on {urls} after {attempt + 1} attempts: {e}")
+                    break
+                delay = self.backoff * 2 ** attempt
+                metrics.inc("bsai_api_retries_total", api="tavily")
+                logger.warning(f"Extract failed for {urls} ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            order = {url: i for i, url in enumerate(urls)}
+            results = sorted(results, key=lambda content: order.get(content["url"], len(urls)))
+            metrics.inc("bsai_api_items_total", len(urls), api="tavily")
+            metrics.inc("bsai_api_failed_items_total", len(urls) - len(results), api="tavily")
+            return [content["url"] for content in results], [content["raw_content"] for content in results]
+
+        metrics.inc("bsai_api_items_total", len(urls), api="tavily")
+        metrics.inc("bsai_api_failed_items_total", len(urls), api="tavily")
+        return [], []
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import os
+import pickle
+from collections import deque
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+from loguru import logger
+
+if TYPE_CHECKING:
+    from bsai.src.domain.dedup import Deduplicator
+    from bsai.src.domain.index import VectorIndex
+    from bsai.src.domain.repository import BaseRepository
+    from bsai.src.domain.vectorizer import BaseVectorizer
+
+
+class SimilarSearch:
+    """"More like this" over the stored embeddings of a repository.
+
+    `build_vectorizer` is only called for a free-text query, so searching from a
+    stored url neither loads nor configures an embedding backend.
+    """
+
+    def __init__(
+        self,
+        repository: BaseRepository,
+        build_vectorizer: Callable[[], BaseVectorizer],
+        index: VectorIndex,
+        deduplicator: Deduplicator | None = None,
+    ):
+        self.repository = repository
+        self.build_vectorizer = build_vectorizer
+        self._vectorizer = None
+        self.index = index
+        self.deduplicator = deduplicator
+
+    @property
+    def vectorizer(self) -> BaseVectorizer:
+        if self._vectorizer is None:
+            self._vectorizer = self.build_vectorizer()
+        return self._vectorizer
+
+    def similar(self, query: str, k: int = 10) -> list[tuple[str, float]]:
+        """Top-k (url, similarity) for a stored url or, failing that, free text"""
+        self.index.sync(self.repository)
+        if query not in self.index and self.deduplicator is not None:
+            # a near-duplicate page not stored yet shares the vector of its representative
+            query = self.deduplicator.canonical([query])[0]
+        if query in self.index:
+            hits = self.index.search(self.index.vector(query), k + 1)[0]
+            return [(url, score) for url, score in hits if url != query][:k]
+        vector = self.vectorizer.transform([query])[0]
+        return self.index.search(vector, k)[0]
+
+
+class Recommender:
+    """Cluster-balanced, no-repeat recommendations from an in-memory serving index.
+
+    Every stored summary gets a fixed position. Positions are bucketed by cluster
+    into shuffled serving queues, and a bitmap over positions records what has
+    been served. The "balanced" strategy picks a cluster uniformly among those
+    with unserved items and pops its queue, so small clusters are as likely as
+    large ones and each answer is O(1) amortized. The "mmr" strategy peeks at
+    the queue heads of `n_candidates` clusters and takes the one maximizing
+    `mmr_lambda * closeness to its centroid - (1 - mmr_lambda) * max similarity
+    to the last `history_window` served items`. It needs the vector `index`.
+    Once everything has been served, the history starts over. `sync` folds in
+    summaries and cluster labels saved since its last call, tracked by the
+    repository positions it persists next to the items.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        strategy: str = "balanced",
+        index: VectorIndex | None = None,
+        mmr_lambda: float = 0.5,
+        n_candidates: int = 8,
+        history_window: int = 20,
+        seed: int | None = None,
+    ):
+        if strategy not in ("balanced", "mmr"):
+            raise ValueError(f"Unknown recommendation strategy: {strategy}")
+        if strategy == "mmr" and index is None:
+            raise ValueError("The mmr strategy needs a vector index")
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.strategy = strategy
+        self.index = index
+        self.mmr_lambda = mmr_lambda
+        self.n_candidates = n_candidates
+        self.rng = np.random.default_rng(seed)
+        self.state_path = os.path.join(path, "state.pkl")
+        self.served_path = os.path.join(path, "served.npz")
+        self.recent = deque(maxlen=history_window)
+        self._load()
+
+    def _load(self):
+        self.urls, self.texts, self.labels = [], [], np.empty(0, dtype=np.int32)
+        # labels of urls whose summary has not been read yet
+        self.pending: dict[str, int] = {}
+        self.summaries_position = 0
+        self.clusters_position = (0, 0)
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "rb") as f:
+                state = pickle.load(f)
+            self.urls, self.texts, self.labels = state["urls"], state["texts"], state["labels"]
+            self.pending = state.get("pending", {})
+            self.summaries_position = state.get("summaries_position", 0)
+            self.clusters_position = state.get("clusters_position", (0, 0))
+        self.positions = {url: i for i, url in enumerate(self.urls)}
+        self.served = np.zeros(len(self.urls), dtype=bool)
+        if os.path.exists(self.served_path):
+            saved = np.load(self.served_path)
+            n = min(int(saved["n"]), len(self.urls))
+            self.served[:n] = np.unpackbits(saved["served"], count=n).astype(bool)
+            self.recent.extend(int(i) for i in saved["recent"] if i < len(self.urls))
+        self._dirty = False
+        self._build_queues()
+
+    def save(self):
+        """Persist the serving state; the item table is rewritten only after it changed"""
+        if self._dirty:
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump({
+                    "urls": self.urls,
+                    "texts": self.texts,
+                    "labels": self.labels,
+                    "pending": self.pending,
+                    "summaries_position": self.summaries_position,
+                    "clusters_position": self.clusters_position,
+                }, f)
+            os.replace(tmp_path, self.state_path)
+            self._dirty = False
+        tmp_path = self.served_path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            n=len(self.served),
+            served=np.packbits(self.served),
+            recent=np.asarray(self.recent, dtype=np.int64),
+        )
+        os.replace(tmp_path, self.served_path)
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def _build_queues(self):
+        """Shuffled queues of unserved positions per cluster, plus their vector centroids"""
+        self.queues: dict[int, list[int]] = {}
+        self.heads: dict[int, int] = {}
+        self.active: list[int] = []
+        self.slots: dict[int, int] = {}
+        unserved = np.flatnonzero(~self.served)
+        unserved = unserved[self.rng.permutation(len(unserved))]
+        order = np.argsort(self.labels[unserved], kind="stable")
+        ids, starts = np.unique(self.labels[unserved][order], return_index=True)
+        for cluster_id, members in zip(ids.tolist(), np.split(unserved[order], starts[1:])):
+            self.queues[cluster_id] = members.tolist()
+            self.heads[cluster_id] = 0
+            self._activate(cluster_id)
+        self._build_centroids()
+
+    def _build_centroids(self):
+        self.sums: dict[int, np.ndarray] = {}
+        if self.index is None:
+            return
+        self.rows = np.array([self.index.positions.get(url, -1) for url in self.urls], dtype=np.int64)
+        known = np.flatnonzero(self.rows >= 0)
+        if not len(known):
+            return
+        order = np.argsort(self.labels[known], kind="stable")
+        ids, starts = np.unique(self.labels[known][order], return_index=True)
+        for cluster_id, members in zip(ids.tolist(), np.split(known[order], starts[1:])):
+            self.sums[cluster_id] = self.index.matrix[self.rows[members]].sum(axis=0)
+
+    def _activate(self, cluster_id: int):
+        if cluster_id not in self.slots:
+            self.slots[cluster_id] = len(self.active)
+            self.active.append(cluster_id)
+
+    def _deactivate(self, cluster_id: int):
+        slot = self.slots.pop(cluster_id)
+        last = self.active.pop()
+        if last != cluster_id:
+            self.active[slot] = last
+            self.slots[last] = slot
+
+    def add(
+        self, urls: list[str], texts: list[str], labels: dict[str, int], replace: bool = False
+    ) -> int:
+        """Index new (url, summary) pairs and apply cluster `labels`; returns how many were added.
+
+        `labels` only relabels the urls it names, which may also be urls whose
+        summary comes later. With `replace` it is the complete assignment and
+        every other url loses its label. Urls without a label are served from
+        the noise bucket until they get one.
+        """
+        start = len(self.urls)
+        for url, text in zip(urls, texts):
+            if url not in self.positions:
+                self.positions[url] = len(self.urls)
+                self.urls.append(url)
+                self.texts.append(text)
+        new = self.urls[start:]
+
+        if replace:
+            self.pending = {}
+            current = np.array([labels.get(url, -1) for url in self.urls[:start]], dtype=np.int32)
+        else:
+            current = self.labels.copy()
+        for url, label in labels.items():
+            position = self.positions.get(url)
+            if position is None:
+                self.pending[url] = label
+            elif position < start:
+                current[position] = label
+        relabeled = bool(np.any(current != self.labels))
+        added = np.array([
+            labels[url] if url in labels else self.pending.get(url, -1) for url in new
+        ], dtype=np.int32)
+        for url in new:
+            self.pending.pop(url, None)
+        self.labels = np.concatenate([current, added])
+        self.served = np.concatenate([self.served, np.zeros(len(new), dtype=bool)])
+        if relabeled:
+            self._build_queues()
+        elif new:
+            self._insert(np.arange(start, len(self.urls)))
+        self._dirty = self._dirty or relabeled or bool(new)
+        return len(new)
+
+    def _insert(self, positions: np.ndarray):
+        """Shuffle new positions into the unserved part of their cluster queues"""
+        if self.index is not None:
+            rows = [self.index.positions.get(self.urls[i], -1) for i in positions]
+            self.rows = np.concatenate([self.rows, np.asarray(rows, dtype=np.int64)])
+        order = np.argsort(self.labels[positions], kind="stable")
+        ids, starts = np.unique(self.labels[positions][order], return_index=True)
+        for cluster_id, members in zip(ids.tolist(), np.split(positions[order], starts[1:])):
+            queue = self.queues.get(cluster_id, [])[self.heads.get(cluster_id, 0):]
+            queue.extend(members.tolist())
+            self.queues[cluster_id] = [queue[i] for i in self.rng.permutation(len(queue))]
+            self.heads[cluster_id] = 0
+            self._activate(cluster_id)
+            if self.index is not None:
+                rows = self.rows[members]
+                vectors = self.index.matrix[rows[rows >= 0]].sum(axis=0)
+                self.sums[cluster_id] = self.sums.get(cluster_id, 0) + vectors
+
+    def sync(self, repository: BaseRepository) -> int:
+        """Pick up summaries and cluster labels saved since the last sync"""
+        indexed = self.index.sync(repository) if self.index is not None else 0
+        summary, summaries_position = repository.get_summaries_since(self.summaries_position)
+        clusters, clusters_position = repository.get_clusters_since(self.clusters_position)
+        # a new generation means the clusters were replaced and this is the whole table
+        replace = clusters_position[0] != self.clusters_position[0]
+        labels = dict(zip(clusters.urls, np.asarray(clusters.labels).tolist()))
+        added = self.add(summary.urls, summary.texts, labels, replace=replace)
+        if (summaries_position, clusters_position) != (self.summaries_position, self.clusters_position):
+            self.summaries_position = summaries_position
+            self.clusters_position = clusters_position
+            self._dirty = True
+        if indexed:
+            # vectors may land after their summaries were indexed
+            self._build_centroids()
+        if added:
+            logger.info(f"Recommender indexed {added} new bookmarks, {len(self)} in total")
+        return added
+
+    def _head(self, cluster_id: int) -> int | None:
+        """Next unserved position of a cluster, deactivating the cluster once it runs dry"""
+        queue, head = self.queues[cluster_id], self.heads[cluster_id]
+        while head < len(queue) and self.served[queue[head]]:
+            head += 1
+        self.heads[cluster_id] = head
+        if head == len(queue):
+            self._deactivate(cluster_id)
+            return None
+        return queue[head]
+
+    def _pick_balanced(self) -> tuple[int, int] | None:
+        while self.active:
+            cluster_id = self.active[int(self.rng.integers(len(self.active)))]
+            position = self._head(cluster_id)
+            if position is not None:
+                return cluster_id, position
+        return None
+
+    def _pick_mmr(self) -> tuple[int, int] | None:
+        candidates = []
+        while self.active and not candidates:
+            k = min(self.n_candidates, len(self.active))
+            chosen = [self.active[slot] for slot in self.rng.choice(len(self.active), k, replace=False)]
+            for cluster_id in chosen:
+                position = self._head(cluster_id)
+                if position is not None:
+                    candidates.append((cluster_id, position))
+        if not candidates:
+            return None
+
+        rows = self.rows[[position for _, position in candidates]]
+        vectors = self.index.matrix[np.maximum(rows, 0)] * (rows >= 0)[:, None]
+        relevance = np.array([
+            float(vector @ self.sums[cluster_id]) / (np.linalg.norm(self.sums[cluster_id]) or 1.0)
+            if cluster_id != -1 and cluster_id in self.sums else 0.0
+            for (cluster_id, _), vector in zip(candidates, vectors)
+        ])
+        recent = self.rows[list(self.recent)] if self.recent else np.empty(0, dtype=np.int64)
+        recent = recent[recent >= 0]
+        redundancy = (vectors @ self.index.matrix[recent].T).max(axis=1) if len(recent) else 0.0
+        scores = self.mmr_lambda * relevance - (1 - self.mmr_lambda) * redundancy
+        return candidates[int(np.argmax(scores))]
+
+    def recommend(self, n: int = 1) -> list[tuple[str, str]]:
+        """Up to `n` distinct (url, summary) pairs not served before"""
+        picks = []
+        for _ in range(min(n, len(self.urls))):
+            pick = self._pick_mmr() if self.strategy == "mmr" else self._pick_balanced()
+            if pick is None:
+                logger.info(f"All {len(self)} bookmarks have been recommended, starting over")
+                self.served[:] = False
+                self.served[[position for position, _ in picks]] = True
+                self._build_queues()
+                pick = self._pick_mmr() if self.strategy == "mmr" else self._pick_balanced()
+                if pick is None:
+                    break
+            cluster_id, position = pick
+            self.served[position] = True
+            self.heads[cluster_id] += 1
+            self.recent.append(position)
+            picks.append((position, self.texts[position]))
+        return [(self.urls[position], text) for position, text in picks]
+
+
+def recommend_random(repository: BaseRepository) -> tuple[str, str]:
+    """A random stored (url, summary), ignoring what was served before; see `Recommender`"""
+    summary = repository.get_summaries()
+    idx = np.random.choice(len(summary.urls))
+    return summary.urls[idx], summary.texts[idx]
+
+
+def recommend_similar(query: str, search: SimilarSearch, k: int = 10) -> list[tuple[str, float]]:
+    return search.similar(query, k)
@@ -1,14 +1,36 @@
+from __future__ import annotations
+
 import ast
+import asyncio
+import hashlib
+import io
+import json
 import os
+import sqlite3
+import threading
+import zlib
 from abc import ABC
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import pandas as pd
+import numpy as np
+from bsai.src.cache import TableCache
+from bsai.src.db.schema import POSTGRES_SCHEMA, SQLITE_SCHEMA
 from bsai.src.types.dto import ParsedText, Summary, Vector, Cluster
 from loguru import logger
 
 from bsai.src.utils import filter_urls
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+if TYPE_CHECKING:
+    # imported where used: the df backend and DataFrame reads need pandas and only
+    # postgres needs asyncpg, so the other backends start without them
+    import asyncpg
+    import pandas as pd
+
 
 class BaseRepository(ABC):
     def __init__(self):
@@ -35,6 +57,10 @@ class BaseRepository(ABC):
     def get_not_existing_texts(self, urls: list[str]) -> ParsedText:
         raise NotImplementedError
 
+    def get_texts_by_url(self, urls: list[str]) -> ParsedText:
+        """Stored texts of `urls`, skipping urls without one"""
+        raise NotImplementedError
+
     def save_urls(self, urls: list[str]):
         raise NotImplementedError
 
@@ -47,12 +73,23 @@ class BaseRepository(ABC):
     def get_not_existing_summaries(self, urls: list[str]) -> Summary:
         raise NotImplementedError
 
+    def get_summaries_since(self, position: int = 0) -> tuple[Summary, int]:
+        """Summaries saved after `position` and the position to continue from; 0 reads all"""
+        raise NotImplementedError
+
     def save_vectors(self, vectors: Vector):
         raise NotImplementedError
 
     def get_vectors(self) -> Vector:
         raise NotImplementedError
 
+    def get_vector_matrix(self) -> tuple[list[str], np.ndarray]:
+        raise NotImplementedError
+
+    def get_vectors_since(self, position: int = 0) -> tuple[list[str], np.ndarray, int]:
+        """Vectors saved after `position` and the position to continue from; 0 reads all"""
+        raise NotImplementedError
+
     def get_not_existing_vectors(self, urls: list[str]) -> Vector:
         raise NotImplementedError
 
@@ -62,6 +99,9 @@ class BaseRepository(ABC):
     def save_cluster_texts(self, urls: list[str], cluster_texts: list[str]):
         raise NotImplementedError
 
+    def replace_clusters(self, clusters: Cluster):
+        raise NotImplementedError
+
     def get(self, url: str | None, cluster_id: int | None) -> pd.DataFrame:
         raise NotImplementedError
 
@@ -71,17 +111,257 @@ class BaseRepository(ABC):
     def get_clusters(self) -> Cluster:
         raise NotImplementedError
 
+    def get_clusters_since(
+        self, position: tuple[int, int] = (0, 0)
+    ) -> tuple[Cluster, tuple[int, int]]:
+        """Cluster rows saved after `position` and the position to continue from.
+
+        A position is a (generation, row) pair. `replace_clusters` starts a new
+        generation; reading from an older one returns the whole table, which
+        then supersedes every row read before.
+        """
+        raise NotImplementedError
+
     def exist(self) -> bool:
         raise NotImplementedError
 
 
+class VectorStore:
+    """Append-only float32 matrix file with a row-aligned url index.
+
+    Rows are written to `<name>.f32` and urls to `<name>.urls`, one per line, so
+    appends never rewrite existing data and loads memory-map the matrix. Rows are
+    fixed width, so `update` can overwrite one in place.
+    """
+
+    def __init__(self, path: str, name: str = "vector"):
+        self.matrix_path = os.path.join(path, f"{name}.f32")
+        self.urls_path = os.path.join(path, f"{name}.urls")
+        self.meta_path = os.path.join(path, f"{name}.json")
+
+    def exist(self) -> bool:
+        return os.path.exists(self.meta_path)
+
+    def dim(self) -> int | None:
+        if not self.exist():
+            return None
+        with open(self.meta_path) as f:
+            return json.load(f)["dim"]
+
+    def _read_urls(self) -> tuple[list[str], int]:
+        """Urls of complete rows and the byte length of their lines.
+
+        A last line without its newline was cut short by an interrupted append
+        and does not count.
+        """
+        if not os.path.exists(self.urls_path):
+            return [], 0
+        with open(self.urls_path, "rb") as f:
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        return data[:end].decode("utf-8").split("\n")[:-1], end
+
+    def append(self, urls: list[str], vectors) -> None:
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(urls) == 0:
+            return
+        if matrix.ndim != 2 or matrix.shape[0] != len(urls):
+            raise ValueError(f"Expected {len(urls)} vectors, got shape {matrix.shape}")
+
+        dim = self.dim()
+        if dim is None:
+            dim = matrix.shape[1]
+            with open(self.meta_path, "w") as f:
+                json.dump({"dim": dim, "dtype": "float32"}, f)
+        elif matrix.shape[1] != dim:
+            raise ValueError(f"Vector dim {matrix.shape[1]} does not match store dim {dim}")
+
+        stored, end = self._read_urls()
+        with open(self.matrix_path, "ab") as f:
+            # drop rows left over from an append interrupted before its urls were written
+            f.truncate(len(stored) * dim * matrix.itemsize)
+            f.write(matrix.tobytes())
+        with open(self.urls_path, "ab") as f:
+            f.truncate(end)
+            f.write(("\n".join(urls) + "\n").encode("utf-8"))
+
+    def update(self, rows: list[int], vectors) -> None:
+        """Overwrite the vectors at the given row numbers"""
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        dim = self.dim()
+        if matrix.shape != (len(rows), dim):
+            raise ValueError(
+                f"Expected {len(rows)} vectors of dim {dim}, got shape {matrix.shape}"
+            )
+        with open(self.matrix_path, "r+b") as f:
+            for row, vector in zip(rows, matrix):
+                f.seek(row * dim * matrix.itemsize)
+                f.write(vector.tobytes())
+
+    def load(self) -> tuple[list[str], np.ndarray]:
+        dim = self.dim()
+        if dim is None:
+            return [], np.empty((0, 0), dtype=np.float32)
+        urls, _ = self._read_urls()
+        if not urls:
+            return [], np.empty((0, dim), dtype=np.float32)
+        matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(len(urls), dim))
+        return urls, matrix
+
+
+class TextStore:
+    """Compressed page texts addressed by content hash, with a url -> hash index.
+
+    Each distinct text is compressed once and appended to `<name>.blobs`.
+    `<name>.hashes` maps a content hash to the offset, length and codec of its
+    blob, and `<name>.urls` maps urls to hashes. Both are append-only files with
+    one tab-separated line per entry, so identical pages are stored once and a
+    single text is read with one seek. Texts are compressed with zstd when
+    `zstandard` is installed, zlib otherwise.
+    """
+
+    def __init__(self, path: str, name: str = "text"):
+        self.blobs_path = os.path.join(path, f"{name}.blobs")
+        self.hashes_path = os.path.join(path, f"{name}.hashes")
+        self.urls_path = os.path.join(path, f"{name}.urls")
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self._lock = threading.Lock()
+        self.blobs: dict[str, tuple[int, int, str]] = {}
+        for digest, offset, length, codec in self._lines(self.hashes_path, 4):
+            self.blobs[digest] = (int(offset), int(length), codec)
+        self.hashes: dict[str, str] = {
+            url: digest for url, digest in self._lines(self.urls_path, 2) if digest in self.blobs
+        }
+
+    @staticmethod
+    def _lines(path: str, n_fields: int):
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                # a line cut short by an interrupted append is ignored
+                if len(fields) == n_fields and line.endswith("\n"):
+                    yield fields
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.hashes
+
+    def urls(self) -> list[str]:
+        return list(self.hashes)
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        return zlib.compress(data, 6)
+
+    @staticmethod
+    def _decompress(data: bytes, codec: str) -> bytes:
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("Text blob is zstd-compressed but zstandard is not installed")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    def put(self, urls: list[str], texts: list[str]) -> int:
+        """Store texts under their urls; returns how many new blobs were written"""
+        url_lines = []
+        hash_lines = []
+        with self._lock:
+            with open(self.blobs_path, "ab") as f:
+                for url, text in zip(urls, texts):
+                    data = text.encode("utf-8")
+                    digest = hashlib.sha256(data).hexdigest()
+                    if digest not in self.blobs:
+                        blob = self._compress(data)
+                        self.blobs[digest] = (f.tell(), len(blob), self.codec)
+                        f.write(blob)
+                        hash_lines.append(f"{digest}\t{f.tell() - len(blob)}\t{len(blob)}\t{self.codec}\n")
+                    if self.hashes.get(url) != digest:
+                        self.hashes[url] = digest
+                        url_lines.append(f"{url}\t{digest}\n")
+            # blobs first, then the hash index, then urls: an interrupted put leaves
+            # at most unreferenced bytes behind
+            self._append(self.hashes_path, hash_lines)
+            self._append(self.urls_path, url_lines)
+        return len(hash_lines)
+
+    @staticmethod
+    def _append(path: str, lines: list[str]):
+        if not lines:
+            return
+        with open(path, "a+b") as f:
+            # start on a fresh line after one cut short by an interrupted append
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                f.seek(end - 1)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write("".join(lines).encode("utf-8"))
+
+    def get(self, url: str) -> str | None:
+        texts = self.get_many([url])
+        return texts[0][1] if texts else None
+
+    def get_many(self, urls: list[str]) -> list[tuple[str, str]]:
+        """(url, text) for the stored urls among `urls`, in the given order"""
+        with self._lock:
+            wanted = [(url, self.hashes[url]) for url in dict.fromkeys(urls) if url in self.hashes]
+            locations = {digest: self.blobs[digest] for _, digest in wanted}
+        if not wanted:
+            return []
+        texts = {}
+        with open(self.blobs_path, "rb") as f:
+            # read in file order so a large batch is one forward pass over the blobs
+            for digest, (offset, length, codec) in sorted(locations.items(), key=lambda item: item[1][0]):
+                f.seek(offset)
+                texts[digest] = self._decompress(f.read(length), codec).decode("utf-8")
+        return [(url, texts[digest]) for url, digest in wanted]
+
+    def size(self) -> int:
+        """Bytes of compressed blobs on disk"""
+        return os.path.getsize(self.blobs_path) if os.path.exists(self.blobs_path) else 0
+
+
 class DFRepository(BaseRepository):
-    def __init__(self, path: str):
+    def __init__(self, path: str, cache_max_bytes: int = 512 * 1024 * 1024):
         super().__init__()
         self.path = os.path.join(path, "df_storage")
         os.makedirs(self.path, exist_ok=True)
+        self.cache = TableCache(cache_max_bytes)
+        self.vector_store = VectorStore(self.path)
+        self.text_store = TextStore(self.path)
+        self._migrate_vector_csv()
+        self._migrate_text_csv()
+
+    def _migrate_vector_csv(self):
+        """Convert the legacy stringified `vector.csv` into the binary store once"""
+        path = os.path.join(self.path, "vector.csv")
+        if self.vector_store.exist() or not self.exist(path):
+            return
+        vectors = self._get(path)
+        logger.info(f"Migrating {len(vectors)} vectors from {path}")
+        self.vector_store.append(
+            vectors['url'].tolist(), [ast.literal_eval(v) for v in vectors['vector']]
+        )
+
+    def _migrate_text_csv(self):
+        """Move the legacy raw-text `text.csv` into the compressed text store once"""
+        import pandas as pd
+
+        path = os.path.join(self.path, "text.csv")
+        if len(self.text_store) or not self.exist(path):
+            return
+        texts = pd.read_csv(path)
+        logger.info(f"Migrating {len(texts)} texts from {path}")
+        self.text_store.put(texts['url'].tolist(), texts['text'].fillna("").tolist())
 
     def _save(self, path, **kwargs):
+        import pandas as pd
+
         data = pd.DataFrame(kwargs)
         columns = data.columns
         data.to_csv(
@@ -91,9 +371,33 @@ class DFRepository(BaseRepository):
             index=False,
         )
         del data
+        self.cache.invalidate(path)
 
     def _get(self, path: str) -> pd.DataFrame:
-        return pd.read_csv(path)
+        """Parsed CSV, shared between callers until the file changes; do not mutate"""
+        import pandas as pd
+
+        return self.cache.get(
+            path, pd.read_csv, lambda df: int(df.memory_usage(deep=True).sum())
+        )
+
+    def _get_since(self, path: str, offset: int) -> tuple[pd.DataFrame, int]:
+        """Rows appended to a CSV after byte `offset` and the offset to continue from"""
+        import pandas as pd
+
+        with open(path, "rb") as f:
+            header = f.readline()
+            f.seek(max(offset, len(header)))
+            data = f.read()
+            offset = f.tell()
+        return pd.read_csv(io.BytesIO(header + data)), offset
+
+    def _clusters_generation(self) -> int:
+        path = os.path.join(self.path, "cluster.generation")
+        if not self.exist(path):
+            return 0
+        with open(path) as f:
+            return int(f.read())
 
     def save(
             self,
@@ -102,62 +406,89 @@ class DFRepository(BaseRepository):
             vectors: Vector,
             clusters: Cluster,
     ):
-        union_urls = set(parsed.urls) & set(summaries.urls) & set(vectors.urls) & set(clusters.urls)
-        logger.info(f"Saving {len(union_urls)} urls")
-        urls = []
-        texts = []
-        summary = []
-        vector = []
-        labels = []
-        cluster_texts = []
-        for url in union_urls:
-            urls.append(url)
-            texts.append(parsed.texts[parsed.urls.index(url)])
-            summary.append(summaries.texts[summaries.urls.index(url)])
-            vector.append(vectors.vectors[vectors.urls.index(url)])
-            labels.append(clusters.labels[clusters.urls.index(url)])
-            cluster_texts.append(clusters.texts[clusters.urls.index(url)])
-
-        self._save(
-            os.path.join(self.path, "all.csv"),
-            url=urls,
-            text=texts,
-            summary=summary,
-            vector=vector,
-            label=labels,
-            cluster_text=cluster_texts,
-        )
+        # every stage appends to its own store, so only rows that are missing there are written
+        logger.info(f"Saving {len(clusters.urls)} urls")
+        self.save_texts(parsed)
+        stored = set(self.get_summaries().urls)
+        rows = [i for i, url in enumerate(summaries.urls) if url not in stored]
+        self.save_summaries(Summary(
+            urls=[summaries.urls[i] for i in rows], texts=[summaries.texts[i] for i in rows]
+        ))
+        stored = set(self.get_vector_matrix()[0])
+        rows = [i for i, url in enumerate(vectors.urls) if url not in stored]
+        if rows:
+            self.save_vectors(Vector(
+                urls=[vectors.urls[i] for i in rows], vectors=np.asarray(vectors.vectors)[rows]
+            ))
+        stored = set(self.get_clusters().urls)
+        rows = [i for i, url in enumerate(clusters.urls) if url not in stored]
+        self.save_clusters(Cluster(
+            urls=[clusters.urls[i] for i in rows],
+            labels=np.asarray(clusters.labels)[rows],
+            texts=[clusters.texts[i] for i in rows],
+        ))
 
     def save_urls(self, urls: list[str]):
         path = os.path.join(self.path, "url.csv")
         self._save(path, url=urls)
 
     def save_texts(self, parsed_text: ParsedText):
-        path = os.path.join(self.path, "text.csv")
-        self._save(path, url=parsed_text.urls, text=parsed_text.texts)
+        self.text_store.put(parsed_text.urls, parsed_text.texts)
 
     def save_summaries(self, summary: Summary):
         path = os.path.join(self.path, "summary.csv")
         self._save(path, url=summary.urls, summary=summary.texts)
 
     def save_vectors(self, vectors: Vector):
-        path = os.path.join(self.path, "vector.csv")
-        self._save(path, url=vectors.urls, vector=vectors.vectors)
+        self.vector_store.append(vectors.urls, vectors.vectors)
+        self.cache.invalidate(self.vector_store.urls_path)
 
     def save_clusters(self, clusters: Cluster):
         path = os.path.join(self.path, "cluster.csv")
         self._save(path, url=clusters.urls, label=clusters.labels, cluster_text=clusters.texts)
 
+    def replace_clusters(self, clusters: Cluster):
+        path = os.path.join(self.path, "cluster.csv")
+        tmp_path = path + ".tmp"
+        if self.exist(tmp_path):
+            os.remove(tmp_path)
+        self._save(tmp_path, url=clusters.urls, label=clusters.labels, cluster_text=clusters.texts)
+        os.replace(tmp_path, path)
+        self.cache.invalidate(path)
+        # the rewritten file invalidates byte offsets handed out by get_clusters_since
+        generation_path = os.path.join(self.path, "cluster.generation")
+        with open(generation_path + ".tmp", "w") as f:
+            f.write(str(self._clusters_generation() + 1))
+        os.replace(generation_path + ".tmp", generation_path)
+
     def get(self, url: str | None, cluster_id: int | None) -> pd.DataFrame:
-        path = os.path.join(self.path, "all.csv")
-        if not self.exist(path):
-            return pd.DataFrame()
-        df = self._get(path)
+        """Clustered rows joined with their text, summary and vector, like the SQL backends"""
+        import pandas as pd
+
+        columns = ["url", "text", "summary", "vector", "label", "cluster_text"]
+        cluster_path = os.path.join(self.path, "cluster.csv")
+        summary_path = os.path.join(self.path, "summary.csv")
+        if not self.exist(cluster_path) or not self.exist(summary_path):
+            return pd.DataFrame(columns=columns)
+        clusters = self._get(cluster_path).drop_duplicates('url', keep='last')
         if url:
-            return df[df['url'] == url]
-        if cluster_id:
-            return df[df['cluster_label'] == cluster_id]
-        return df
+            clusters = clusters[clusters['url'] == url]
+        elif cluster_id is not None:
+            clusters = clusters[clusters['label'] == cluster_id]
+        summaries = self._get(summary_path).drop_duplicates('url', keep='last')
+        df = clusters.merge(summaries, on='url')
+        texts = dict(self.text_store.get_many(df['url'].tolist()))
+        stored_urls, matrix = self.get_vector_matrix()
+        row_of = {stored: i for i, stored in enumerate(stored_urls)}
+        df = df[df['url'].isin(texts) & df['url'].isin(row_of)]
+        return pd.DataFrame({
+            "url": df['url'].tolist(),
+            "text": [texts[u] for u in df['url']],
+            "summary": df['summary'].tolist(),
+            "vector": [matrix[row_of[u]].tolist() for u in df['url']],
+            "label": df['label'].tolist(),
+            "cluster_text": df['cluster_text'].fillna("").tolist(),
+        }, columns=columns)
 
     def get_urls(self) -> list[str]:
         path = os.path.join(self.path, "url.csv")
@@ -170,21 +501,14 @@ class DFRepository(BaseRepository):
         return [url for url in urls if url not in set(existing_urls)]
 
     def get_texts(self) -> ParsedText:
-        path = os.path.join(self.path, "text.csv")
-
-        if not self.exist(path):
-            return ParsedText(urls=[], texts=[])
-
-        df = pd.read_csv(path)
-        return ParsedText(urls=df['url'].tolist(), texts=df['text'].tolist())
+        return self.get_texts_by_url(self.text_store.urls())
 
     def get_not_existing_texts(self, urls: list[str]) -> ParsedText:
-        texts = self.get_texts()
-        urls = filter_urls(texts.urls, urls)
-        return ParsedText(
-            urls=[url for url in texts.urls if url in urls],
-            texts=[text for url, text in zip(texts.urls, texts.texts) if url in urls],
-        )
+        return self.get_texts_by_url(filter_urls(self.text_store.urls(), urls))
+
+    def get_texts_by_url(self, urls: list[str]) -> ParsedText:
+        texts = self.text_store.get_many(urls)
+        return ParsedText(urls=[url for url, _ in texts], texts=[text for _, text in texts])
 
     def get_summaries(self) -> Summary:
         path = os.path.join(self.path, "summary.csv")
@@ -201,22 +525,39 @@ class DFRepository(BaseRepository):
             texts=[text for url, text in zip(summaries.urls, summaries.texts) if url in urls],
         )
 
-    def get_vectors(self) -> Vector:
-        path = os.path.join(self.path, "vector.csv")
+    def get_summaries_since(self, position: int = 0) -> tuple[Summary, int]:
+        # summary.csv is append-only, so a position is a byte offset
+        path = os.path.join(self.path, "summary.csv")
         if not self.exist(path):
-            return Vector(urls=[], vectors=[])
-        vectors = self._get(path)
-        vectors['vector'] = vectors['vector'].apply(ast.literal_eval)
-        return Vector(urls=vectors['url'].tolist(), vectors=vectors['vector'].tolist())
+            return Summary(urls=[], texts=[]), 0
+        summaries, position = self._get_since(path, position)
+        return Summary(urls=summaries['url'].tolist(), texts=summaries['summary'].tolist()), position
 
-    def get_not_existing_vectors(self, urls: list[str]) -> Vector:
-        vectors = self.get_vectors()
-        urls = filter_urls(vectors.urls, urls)
-        return Vector(
-            urls=[url for url in vectors.urls if url in urls],
-            vectors=[vector for url, vector in zip(vectors.urls, vectors.vectors) if url in urls],
+    def get_vectors(self) -> Vector:
+        urls, matrix = self.get_vector_matrix()
+        return Vector(urls=urls, vectors=matrix)
+
+    def get_vector_matrix(self) -> tuple[list[str], np.ndarray]:
+        """Urls and a read-only memory-mapped (n, dim) float32 matrix"""
+        if not self.exist(self.vector_store.urls_path):
+            return self.vector_store.load()
+        return self.cache.get(
+            self.vector_store.urls_path,
+            lambda path: self.vector_store.load(),
+            lambda loaded: sum(len(url) + 64 for url in loaded[0]),
         )
 
+    def get_vectors_since(self, position: int = 0) -> tuple[list[str], np.ndarray, int]:
+        # the store is append-only, so a position is a row count
+        urls, matrix = self.get_vector_matrix()
+        return urls[position:], matrix[position:], len(urls)
+
+    def get_not_existing_vectors(self, urls: list[str]) -> Vector:
+        stored_urls, matrix = self.get_vector_matrix()
+        urls = filter_urls(stored_urls, urls)
+        rows = [i for i, url in enumerate(stored_urls) if url in urls]
+        return Vector(urls=[stored_urls[i] for i in rows], vectors=matrix[rows])
+
     def get_clusters(self) -> Cluster:
         path = os.path.join(self.path, "cluster.csv")
 
@@ -226,9 +567,529 @@ class DFRepository(BaseRepository):
         df = self._get(path)
         return Cluster(
             urls=df['url'].tolist(),
-            labels=df['label'].tolist(),
-            texts=df['cluster_text'].tolist()
+            labels=df['label'].to_numpy(),
+            # a failed topic is stored empty and read back as NaN
+            texts=df['cluster_text'].fillna("").tolist()
         )
 
+    def get_clusters_since(
+        self, position: tuple[int, int] = (0, 0)
+    ) -> tuple[Cluster, tuple[int, int]]:
+        # cluster.csv is appended to within a generation, so a row is a byte offset
+        path = os.path.join(self.path, "cluster.csv")
+        generation = self._clusters_generation()
+        if not self.exist(path):
+            return Cluster(urls=[], labels=[], texts=[]), (generation, 0)
+        offset = position[1] if position[0] == generation else 0
+        df, offset = self._get_since(path, offset)
+        clusters = Cluster(
+            urls=df['url'].tolist(),
+            labels=df['label'].to_numpy(),
+            texts=df['cluster_text'].fillna("").tolist(),
+        )
+        return clusters, (generation, offset)
+
     def exist(self, path: str) -> bool:
         return os.path.exists(path)
+
+
+class SQLiteRepository(BaseRepository):
+    """Repository on a single SQLite file with one url-keyed table per stage"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        os.makedirs(path, exist_ok=True)
+        self.path = os.path.join(path, "bsai.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SQLITE_SCHEMA)
+
+    def _write(self, query: str, rows: list[tuple]):
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(query, rows)
+
+    def _read(self, query: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def _read_excluding(self, query: str, urls: list[str]) -> list[tuple]:
+        """Run `query` with the `input_urls` temp table holding `urls`"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS input_urls "
+                "(position INTEGER PRIMARY KEY, url TEXT NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM input_urls")
+            self._conn.executemany(
+                "INSERT INTO input_urls (position, url) VALUES (?, ?)", enumerate(urls)
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS temp.input_urls_url ON input_urls (url)")
+            return self._conn.execute(query).fetchall()
+
+    def save(
+            self,
+            parsed: ParsedText,
+            summaries: Summary,
+            vectors: Vector,
+            clusters: Cluster,
+    ):
+        # every stage is already keyed by url, so this is an idempotent upsert of all of them
+        logger.info(f"Saving {len(clusters.urls)} urls")
+        self.save_texts(parsed)
+        self.save_summaries(summaries)
+        self.save_vectors(vectors)
+        self.save_clusters(clusters)
+
+    def save_urls(self, urls: list[str]):
+        self._write("INSERT OR IGNORE INTO urls (url) VALUES (?)", [(url,) for url in urls])
+
+    def save_texts(self, parsed_text: ParsedText):
+        self._write(
+            "INSERT OR REPLACE INTO texts (url, text) VALUES (?, ?)",
+            list(zip(parsed_text.urls, parsed_text.texts)),
+        )
+
+    def save_summaries(self, summary: Summary):
+        self._write(
+            "INSERT OR REPLACE INTO summaries (url, summary) VALUES (?, ?)",
+            list(zip(summary.urls, summary.texts)),
+        )
+
+    def save_vectors(self, vectors: Vector):
+        self._write(
+            "INSERT OR REPLACE INTO vectors (url, vector) VALUES (?, ?)",
+            [(url, row.tobytes()) for url, row in zip(vectors.urls, vectors.vectors)],
+        )
+
+    def _cluster_rows(self, clusters: Cluster) -> list[tuple]:
+        return [
+            (url, int(label), text)
+            for url, label, text in zip(clusters.urls, clusters.labels, clusters.texts)
+        ]
+
+    def save_clusters(self, clusters: Cluster):
+        self._write(
+            "INSERT OR REPLACE INTO clusters (url, label, cluster_text) VALUES (?, ?, ?)",
+            self._cluster_rows(clusters),
+        )
+
+    def replace_clusters(self, clusters: Cluster):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM clusters")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO clusters (url, label, cluster_text) VALUES (?, ?, ?)",
+                self._cluster_rows(clusters),
+            )
+            # rowids restart after the delete, so readers have to start over
+            self._conn.execute(
+                "INSERT INTO generations (name, generation) VALUES ('clusters', 1) "
+                "ON CONFLICT (name) DO UPDATE SET generation = generations.generation + 1"
+            )
+
+    def save_cluster_texts(self, urls: list[str], cluster_texts: list[str]):
+        # re-inserted rather than updated, so the row moves past get_clusters_since positions
+        self._write(
+            "INSERT OR REPLACE INTO clusters (url, label, cluster_text) "
+            "SELECT url, label, ? FROM clusters WHERE url = ?",
+            list(zip(cluster_texts, urls)),
+        )
+
+    def get(self, url: str | None, cluster_id: int | None) -> pd.DataFrame:
+        import pandas as pd
+
+        query = (
+            "SELECT c.url, t.text, s.summary, v.vector, c.label, c.cluster_text "
+            "FROM clusters c "
+            "JOIN texts t ON t.url = c.url "
+            "JOIN summaries s ON s.url = c.url "
+            "JOIN vectors v ON v.url = c.url"
+        )
+        params = ()
+        if url:
+            query += " WHERE c.url = ?"
+            params = (url,)
+        elif cluster_id is not None:
+            query += " WHERE c.label = ?"
+            params = (cluster_id,)
+        with self._lock:
+            df = pd.read_sql_query(query, self._conn, params=params)
+        df['vector'] = [np.frombuffer(v, dtype=np.float32).tolist() for v in df['vector']]
+        return df
+
+    def get_urls(self) -> list[str]:
+        return [url for url, in self._read("SELECT url FROM urls ORDER BY rowid")]
+
+    def get_not_existing_urls(self, urls: list[str]) -> list[str]:
+        rows = self._read_excluding(
+            "SELECT i.url FROM input_urls i LEFT JOIN urls u ON u.url = i.url "
+            "WHERE u.url IS NULL ORDER BY i.position",
+            urls,
+        )
+        return [url for url, in rows]
+
+    def get_texts(self) -> ParsedText:
+        rows = self._read("SELECT url, text FROM texts ORDER BY rowid")
+        return ParsedText(urls=[r[0] for r in rows], texts=[r[1] for r in rows])
+
+    def get_not_existing_texts(self, urls: list[str]) -> ParsedText:
+        rows = self._read_excluding(
+            "SELECT t.url, t.text FROM texts t LEFT JOIN input_urls i ON i.url = t.url "
+            "WHERE i.url IS NULL ORDER BY t.rowid",
+            urls,
+        )
+        return ParsedText(urls=[r[0] for r in rows], texts=[r[1] for r in rows])
+
+    def get_texts_by_url(self, urls: list[str]) -> ParsedText:
+        rows = self._read_excluding(
+            "SELECT t.url, t.text FROM input_urls i JOIN texts t ON t.url = i.url "
+            "ORDER BY i.position",
+            list(dict.fromkeys(urls)),
+        )
+        return ParsedText(urls=[r[0] for r in rows], texts=[r[1] for r in rows])
+
+    def get_summaries(self) -> Summary:
+        rows = self._read("SELECT url, summary FROM summaries ORDER BY rowid")
+        return Summary(urls=[r[0] for r in rows], texts=[r[1] for r in rows])
+
+    def get_not_existing_summaries(self, urls: list[str]) -> Summary:
+        rows = self._read_excluding(
+            "SELECT s.url, s.summary FROM summaries s LEFT JOIN input_urls i ON i.url = s.url "
+            "WHERE i.url IS NULL ORDER BY s.rowid",
+            urls,
+        )
+        return Summary(urls=[r[0] for r in rows], texts=[r[1] for r in rows])
+
+    def get_summaries_since(self, position: int = 0) -> tuple[Summary, int]:
+        # INSERT OR REPLACE gives a rewritten row a new, higher rowid
+        rows = self._read(
+            "SELECT rowid, url, summary FROM summaries WHERE rowid > ? ORDER BY rowid", (position,)
+        )
+        summary = Summary(urls=[r[1] for r in rows], texts=[r[2] for r in rows])
+        return summary, rows[-1][0] if rows else position
+
+    def _to_matrix(self, rows: list[tuple]) -> tuple[list[str], np.ndarray]:
+        if not rows:
+            return [], np.empty((0, 0), dtype=np.float32)
+        matrix = np.frombuffer(b"".join(r[1] for r in rows), dtype=np.float32)
+        return [r[0] for r in rows], matrix.reshape(len(rows), -1)
+
+    def get_vectors(self) -> Vector:
+        urls, matrix = self.get_vector_matrix()
+        return Vector(urls=urls, vectors=matrix)
+
+    def get_vector_matrix(self) -> tuple[list[str], np.ndarray]:
+        return self._to_matrix(self._read("SELECT url, vector FROM vectors ORDER BY rowid"))
+
+    def get_vectors_since(self, position: int = 0) -> tuple[list[str], np.ndarray, int]:
+        rows = self._read(
+            "SELECT rowid, url, vector FROM vectors WHERE rowid > ? ORDER BY rowid", (position,)
+        )
+        urls, matrix = self._to_matrix([r[1:] for r in rows])
+        return urls, matrix, rows[-1][0] if rows else position
+
+    def get_not_existing_vectors(self, urls: list[str]) -> Vector:
+        rows = self._read_excluding(
+            "SELECT v.url, v.vector FROM vectors v LEFT JOIN input_urls i ON i.url = v.url "
+            "WHERE i.url IS NULL ORDER BY v.rowid",
+            urls,
+        )
+        urls, matrix = self._to_matrix(rows)
+        return Vector(urls=urls, vectors=matrix)
+
+    def get_clusters(self) -> Cluster:
+        rows = self._read("SELECT url, label, cluster_text FROM clusters ORDER BY rowid")
+        return Cluster(
+            urls=[r[0] for r in rows],
+            labels=[r[1] for r in rows],
+            texts=[r[2] for r in rows],
+        )
+
+    def get_clusters_since(
+        self, position: tuple[int, int] = (0, 0)
+    ) -> tuple[Cluster, tuple[int, int]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT generation FROM generations WHERE name = 'clusters'"
+            ).fetchone()
+            generation = row[0] if row else 0
+            after = position[1] if position[0] == generation else 0
+            rows = self._conn.execute(
+                "SELECT rowid, url, label, cluster_text FROM clusters WHERE rowid > ? ORDER BY rowid",
+                (after,),
+            ).fetchall()
+        clusters = Cluster(
+            urls=[r[1] for r in rows],
+            labels=[r[2] for r in rows],
+            texts=[r[3] for r in rows],
+        )
+        return clusters, (generation, rows[-1][0] if rows else after)
+
+    def exist(self, path: str | None = None) -> bool:
+        return os.path.exists(path or self.path)
+
+
+class PostgresRepository(BaseRepository):
+    """Repository on PostgreSQL through an asyncpg connection pool.
+
+    The pool lives on a private event loop thread, so the synchronous repository
+    interface can be shared by several ingest workers. Bulk writes `COPY` into a
+    staging table and upsert from there.
+    """
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10):
+        super().__init__()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self.pool = self._run(self._connect(dsn, min_size, max_size))
+
+    async def _connect(self, dsn: str, min_size: int, max_size: int) -> asyncpg.Pool:
+        import asyncpg
+
+        pool = await asyncpg.create_pool(dsn, min_size=min_size, max_size=max_size)
+        await pool.execute(POSTGRES_SCHEMA)
+        return pool
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self):
+        self._run(self.pool.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    _since_tables = ("summaries", "vectors", "clusters")
+
+    async def _copy_upsert(
+        self, table: str, columns: list[str], records: list[tuple], replace: bool = False
+    ):
+        updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c != "url")
+        if updates and table in self._since_tables:
+            # a fresh xact moves an updated row past the positions of the *_since reads
+            updates += ", id = DEFAULT, xact = DEFAULT"
+        conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        names = ", ".join(columns)
+        # the last record of a url wins, as with the other backends
+        records = list({record[0]: record for record in records}.values())
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                if replace:
+                    await conn.execute(f"DELETE FROM {table}")
+                await conn.execute(
+                    f"CREATE TEMP TABLE stage ON COMMIT DROP AS "
+                    f"SELECT {names} FROM {table} WITH NO DATA"
+                )
+                await conn.copy_records_to_table("stage", records=records, columns=columns)
+                await conn.execute(
+                    f"INSERT INTO {table} ({names}) "
+                    f"SELECT {names} FROM stage "
+                    f"ON CONFLICT (url) {conflict}"
+                )
+                if replace:
+                    await conn.execute(
+                        "INSERT INTO generations (name, generation) VALUES ($1, 1) "
+                        "ON CONFLICT (name) DO UPDATE SET generation = generations.generation + 1",
+                        table,
+                    )
+
+    def _write(self, table: str, columns: list[str], records: list[tuple], replace: bool = False):
+        if records or replace:
+            self._run(self._copy_upsert(table, columns, records, replace))
+
+    def _read(self, query: str, *args) -> list:
+        return self._run(self.pool.fetch(query, *args))
+
+    async def _fetch_since(self, query: str, position: int) -> tuple[list, int]:
+        async with self.pool.acquire() as conn:
+            # every transaction below the snapshot xmin has finished, so no row can
+            # still appear under it; the next read starts there
+            horizon = await conn.fetchval(
+                "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+            )
+            rows = await conn.fetch(query, position, horizon)
+        return rows, horizon
+
+    def _read_since(self, table: str, columns: str, position: int) -> tuple[list, int]:
+        return self._run(self._fetch_since(
+            f"SELECT {columns} FROM {table} "
+            f"WHERE xact >= $1 AND xact < $2 ORDER BY xact, id",
+            position,
+        ))
+
+    def save(
+            self,
+            parsed: ParsedText,
+            summaries: Summary,
+            vectors: Vector,
+            clusters: Cluster,
+    ):
+        # every stage is already keyed by url, so this is an idempotent upsert of all of them
+        logger.info(f"Saving {len(clusters.urls)} urls")
+        self.save_texts(parsed)
+        self.save_summaries(summaries)
+        self.save_vectors(vectors)
+        self.save_clusters(clusters)
+
+    def save_urls(self, urls: list[str]):
+        self._write("urls", ["url"], [(url,) for url in urls])
+
+    def save_texts(self, parsed_text: ParsedText):
+        self._write("texts", ["url", "text"], list(zip(parsed_text.urls, parsed_text.texts)))
+
+    def save_summaries(self, summary: Summary):
+        self._write("summaries", ["url", "summary"], list(zip(summary.urls, summary.texts)))
+
+    def save_vectors(self, vectors: Vector):
+        self._write(
+            "vectors",
+            ["url", "vector"],
+            [(url, row.tobytes()) for url, row in zip(vectors.urls, vectors.vectors)],
+        )
+
+    def _cluster_records(self, clusters: Cluster) -> list[tuple]:
+        return [
+            (url, int(label), text)
+            for url, label, text in zip(clusters.urls, clusters.labels, clusters.texts)
+        ]
+
+    def save_clusters(self, clusters: Cluster):
+        self._write("clusters", ["url", "label", "cluster_text"], self._cluster_records(clusters))
+
+    def replace_clusters(self, clusters: Cluster):
+        self._write(
+            "clusters",
+            ["url", "label", "cluster_text"],
+            self._cluster_records(clusters),
+            replace=True,
+        )
+
+    def save_cluster_texts(self, urls: list[str], cluster_texts: list[str]):
+        self._run(self.pool.executemany(
+            "UPDATE clusters SET cluster_text = $1, id = DEFAULT, xact = DEFAULT "
+            "WHERE url = $2",
+            list(zip(cluster_texts, urls)),
+        ))
+
+    def get(self, url: str | None, cluster_id: int | None) -> pd.DataFrame:
+        import pandas as pd
+
+        query = (
+            "SELECT c.url, t.text, s.summary, v.vector, c.label, c.cluster_text "
+            "FROM clusters c "
+            "JOIN texts t ON t.url = c.url "
+            "JOIN summaries s ON s.url = c.url "
+            "JOIN vectors v ON v.url = c.url"
+        )
+        args = ()
+        if url:
+            query += " WHERE c.url = $1"
+            args = (url,)
+        elif cluster_id is not None:
+            query += " WHERE c.label = $1"
+            args = (cluster_id,)
+        rows = self._read(query + " ORDER BY c.id", *args)
+        df = pd.DataFrame(
+            [dict(r) for r in rows],
+            columns=["url", "text", "summary", "vector", "label", "cluster_text"],
+        )
+        df['vector'] = [np.frombuffer(v, dtype=np.float32).tolist() for v in df['vector']]
+        return df
+
+    def get_urls(self) -> list[str]:
+        return [r['url'] for r in self._read("SELECT url FROM urls ORDER BY id")]
+
+    def get_not_existing_urls(self, urls: list[str]) -> list[str]:
+        rows = self._read(
+            "SELECT i.url FROM unnest($1::text[]) WITH ORDINALITY AS i(url, position) "
+            "WHERE NOT EXISTS (SELECT 1 FROM urls u WHERE u.url = i.url) "
+            "ORDER BY i.position",
+            urls,
+        )
+        return [r['url'] for r in rows]
+
+    def get_texts(self) -> ParsedText:
+        rows = self._read("SELECT url, text FROM texts ORDER BY id")
+        return ParsedText(urls=[r['url'] for r in rows], texts=[r['text'] for r in rows])
+
+    def get_not_existing_texts(self, urls: list[str]) -> ParsedText:
+        rows = self._read(
+            "SELECT url, text FROM texts WHERE NOT url = ANY($1::text[]) ORDER BY id", urls
+        )
+        return ParsedText(urls=[r['url'] for r in rows], texts=[r['text'] for r in rows])
+
+    def get_texts_by_url(self, urls: list[str]) -> ParsedText:
+        rows = self._read("SELECT url, text FROM texts WHERE url = ANY($1::text[])", urls)
+        texts = {r['url']: r['text'] for r in rows}
+        found = [url for url in dict.fromkeys(urls) if url in texts]
+        return ParsedText(urls=found, texts=[texts[url] for url in found])
+
+    def get_summaries(self) -> Summary:
+        rows = self._read("SELECT url, summary FROM summaries ORDER BY id")
+        return Summary(urls=[r['url'] for r in rows], texts=[r['summary'] for r in rows])
+
+    def get_not_existing_summaries(self, urls: list[str]) -> Summary:
+        rows = self._read(
+            "SELECT url, summary FROM summaries WHERE NOT url = ANY($1::text[]) ORDER BY id",
+            urls,
+        )
+        return Summary(urls=[r['url'] for r in rows], texts=[r['summary'] for r in rows])
+
+    def get_summaries_since(self, position: int = 0) -> tuple[Summary, int]:
+        rows, position = self._read_since("summaries", "url, summary", position)
+        summary = Summary(urls=[r['url'] for r in rows], texts=[r['summary'] for r in rows])
+        return summary, position
+
+    def _to_matrix(self, rows: list) -> tuple[list[str], np.ndarray]:
+        if not rows:
+            return [], np.empty((0, 0), dtype=np.float32)
+        matrix = np.frombuffer(b"".join(r['vector'] for r in rows), dtype=np.float32)
+        return [r['url'] for r in rows], matrix.reshape(len(rows), -1)
+
+    def get_vectors(self) -> Vector:
+        urls, matrix = self.get_vector_matrix()
+        return Vector(urls=urls, vectors=matrix)
+
+    def get_vector_matrix(self) -> tuple[list[str], np.ndarray]:
+        return self._to_matrix(self._read("SELECT url, vector FROM vectors ORDER BY id"))
+
+    def get_vectors_since(self, position: int = 0) -> tuple[list[str], np.ndarray, int]:
+        rows, position = self._read_since("vectors", "url, vector", position)
+        urls, matrix = self._to_matrix(rows)
+        return urls, matrix, position
+
+    def get_not_existing_vectors(self, urls: list[str]) -> Vector:
+        rows = self._read(
+            "SELECT url, vector FROM vectors WHERE NOT url = ANY($1::text[]) ORDER BY id", urls
+        )
+        urls, matrix = self._to_matrix(rows)
+        return Vector(urls=urls, vectors=matrix)
+
+    def get_clusters(self) -> Cluster:
+        rows = self._read("SELECT url, label, cluster_text FROM clusters ORDER BY id")
+        return Cluster(
+            urls=[r['url'] for r in rows],
+            labels=[r['label'] for r in rows],
+            texts=[r['cluster_text'] for r in rows],
+        )
+
+    def get_clusters_since(
+        self, position: tuple[int, int] = (0, 0)
+    ) -> tuple[Cluster, tuple[int, int]]:
+        # read before the rows: a replace in between is then caught on the next call
+        generations = self._read("SELECT generation FROM generations WHERE name = 'clusters'")
+        generation = generations[0]['generation'] if generations else 0
+        after = position[1] if position[0] == generation else 0
+        rows, after = self._read_since("clusters", "url, label, cluster_text", after)
+        clusters = Cluster(
+            urls=[r['url'] for r in rows],
+            labels=[r['label'] for r in rows],
+            texts=[r['cluster_text'] for r in rows],
+        )
+        return clusters, (generation, after)
+
+    def exist(self) -> bool:
+        return bool(self._run(self.pool.fetchval("SELECT to_regclass('urls') IS NOT NULL")))
@@ -0,0 +1,108 @@
+"""Page text clean-up and token-budget helpers applied before summarization"""
+import re
+
+from loguru import logger
+
+BOILERPLATE = re.compile(
+    r"cookie|privacy policy|terms of (use|service)|all rights reserved|©|subscribe|newsletter|"
+    r"sign (in|up)|log ?in|create an account|share (on|this)|follow us|skip to (main )?content|"
+    r"accept all|enable javascript|advertisement",
+    re.IGNORECASE,
+)
+LINK_ONLY = re.compile(r"^[\s*\-|>#]*(!?\[[^\]]*\]\([^)]*\)[\s*\-|,•·]*)+$")
+
+
+def strip_boilerplate(text: str, max_boilerplate_words: int = 12) -> str:
+    """Drop link-only lines, repeated lines and short cookie/login/share-style lines"""
+    kept = []
+    seen = set()
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            if kept and kept[-1]:
+                kept.append("")
+            continue
+        key = " ".join(stripped.lower().split())
+        if key in seen or LINK_ONLY.match(stripped):
+            continue
+        if len(key.split()) <= max_boilerplate_words and BOILERPLATE.search(key):
+            continue
+        seen.add(key)
+        kept.append(stripped)
+    return "\n".join(kept).strip()
+
+
+class TokenCounter:
+    """Token counts with the model's tiktoken encoding.
+
+    Falls back to ~4 characters per token when the encoding cannot be loaded,
+    e.g. when its BPE file cannot be downloaded.
+    """
+
+    def __init__(self, model: str):
+        # imported here: tiktoken is slow to import, and dedup only needs strip_boilerplate
+        import tiktoken
+
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = self._load("o200k_base")
+        except Exception as e:
+            logger.warning(f"Falling back to estimated token counts: {e}")
+            self.encoding = None
+
+    @staticmethod
+    def _load(name: str):
+        import tiktoken
+
+        try:
+            return tiktoken.get_encoding(name)
+        except Exception as e:
+            logger.warning(f"Falling back to estimated token counts: {e}")
+            return None
+
+    def count(self, text: str) -> int:
+        if self.encoding is None:
+            return len(text) // 4 + 1
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if self.encoding is None:
+            return text[:max_tokens * 4]
+        tokens = self.encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+
+    def split(self, text: str, max_tokens: int) -> list[str]:
+        """Chunks of at most `max_tokens`, broken at paragraph or line boundaries where possible"""
+        chunks = []
+        chunk = []
+        size = 0
+        for block in re.split(r"\n+", text):
+            tokens = self.count(block)
+            while tokens > max_tokens:
+                head = self.truncate(block, max_tokens)
+                if chunk:
+                    chunks.append("\n".join(chunk))
+                    chunk, size = [], 0
+                chunks.append(head)
+                block = block[len(head):]
+                tokens = self.count(block)
+            # the newline joining a block to the chunk counts as a token
+            if chunk and size + 1 + tokens > max_tokens:
+                chunks.append("\n".join(chunk))
+                chunk, size = [], 0
+            if block:
+                size += tokens + (1 if chunk else 0)
+                chunk.append(block)
+        if chunk:
+            chunks.append("\n".join(chunk))
+        return chunks
+
+
+def spread(items: list, k: int) -> list:
+    """At most `k` items evenly spaced over `items`, keeping the first and last"""
+    if len(items) <= k:
+        return items
+    if k == 1:
+        return items[:1]
+    return [items[round(i * (len(items) - 1) / (k - 1))] for i in range(k)]
@@ -0,0 +1,60 @@
+import numpy as np
+import torch
+import torch.nn.functional as F
+from transformers import AutoModel, AutoTokenizer
+
+from bsai.src.domain.vectorizer import BaseVectorizer
+
+
+class TransformerVectorizer(BaseVectorizer):
+    """Local CPU embeddings from a transformer checkpoint directory.
+
+    Texts are sorted by length so each batch pads to similar sizes, encoded
+    under `torch.inference_mode`, mean-pooled over the attention mask and
+    L2-normalized. `quantize` applies int8 dynamic quantization to the Linear
+    layers.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        batch_size: int = 32,
+        max_length: int = 512,
+        num_threads: int | None = None,
+        quantize: bool = False,
+    ):
+        super().__init__()
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+        model = AutoModel.from_pretrained(model_path, local_files_only=True).eval()
+        if quantize:
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        self.model = model
+        self.dim = model.config.hidden_size
+
+    def transform(self, texts: list[str]) -> np.ndarray:
+        vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        with torch.inference_mode():
+            for i in range(0, len(texts), self.batch_size):
+                idx = order[i:i + self.batch_size]
+                batch = self.tokenizer(
+                    [texts[j] for j in idx],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors="pt",
+                )
+                hidden = self.model(**batch).last_hidden_state
+                mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                vectors[idx] = F.normalize(pooled, dim=1).numpy()
+        return vectors
+
+    def fit_transform(self, texts: list[str]) -> np.ndarray:
+        return self.transform(texts)
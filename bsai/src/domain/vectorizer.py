@@ -1,27 +1,15 @@
 from abc import ABC
 
-from bsai.src.domain.llm import OpenAIModel
+import numpy as np
 
 
 class BaseVectorizer(ABC):
     def __init__(self):
         pass
 
-    def transform(self, texts: list[str]) -> list[list[float]]:
+    def transform(self, texts: list[str]) -> np.ndarray:
+        """A float32 (len(texts), dim) matrix"""
         pass
 
-    def fit_transform(self, texts: list[str]) -> list[list[float]]:
+    def fit_transform(self, texts: list[str]) -> np.ndarray:
         pass
-
-
-class OpenAIVectorizer(BaseVectorizer):
-    def __init__(self, emb_model='text-embedding-3-small'):
-        super().__init__()
-        self.llm = OpenAIModel('gpt-4o-mini')
-        self.emb_model = emb_model
-
-    def transform(self, texts: list[str]) -> list[list[float]]:
-        return self.llm.get_embeddings(texts, self.emb_model)
-
-    def fit_transform(self, texts: list[str]) -> list[list[float]]:
-        return self.transform(texts)
@@ -0,0 +1,178 @@
+"""Process-wide run metrics with Prometheus text and JSON export"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# USD per million (prompt, completion) tokens, used to estimate spend
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Thread-safe labelled counters and latency histograms for one run.
+
+    Counters and histograms are identified by name plus keyword labels, e.g.
+    `metrics.inc("bsai_api_retries_total", api="tavily")`.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters: dict[tuple, float] = {}
+            self.histograms: dict[tuple, Histogram] = {}
+            self.started = time.time()
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(self.buckets)
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def request(self, api: str):
+        """Time one API request and count it as ok or error"""
+        start = time.perf_counter()
+        status = "error"
+        try:
+            yield
+            status = "ok"
+        finally:
+            self.observe("bsai_api_request_seconds", time.perf_counter() - start, api=api)
+            self.inc("bsai_api_requests_total", api=api, status=status)
+
+    def record_tokens(self, model: str, prompt_tokens: int, completion_tokens: int = 0):
+        self.inc("bsai_llm_tokens_total", prompt_tokens, model=model, kind="prompt")
+        if completion_tokens:
+            self.inc("bsai_llm_tokens_total", completion_tokens, model=model, kind="completion")
+        if model in MODEL_PRICES:
+            prompt_price, completion_price = MODEL_PRICES[model]
+            cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+            self.inc("bsai_llm_cost_usd_total", cost, model=model)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": hist.count,
+                    "sum": hist.sum,
+                    "buckets": dict(zip([*map(str, hist.buckets), "+Inf"], hist.counts)),
+                }
+                for (name, labels), hist in sorted(self.histograms.items())
+            ]
+            started = self.started
+            stage_items = {
+                dict(labels)["stage"]: value
+                for (name, labels), value in self.counters.items()
+                if name == "bsai_stage_items_total"
+            }
+            stage_seconds = {
+                dict(labels)["stage"]: hist.sum
+                for (name, labels), hist in self.histograms.items()
+                if name == "bsai_stage_seconds"
+            }
+        return {
+            "started": started,
+            "elapsed": time.time() - started,
+            "stage_items_per_second": {
+                stage: stage_items.get(stage, 0.0) / seconds
+                for stage, seconds in stage_seconds.items()
+                if seconds
+            },
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def to_prometheus(self) -> str:
+        def escape(value) -> str:
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        def render(labels: tuple, extra: tuple = ()) -> str:
+            pairs = [*labels, *extra]
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{render(labels)} {value:.12g}")
+            for (name, labels), hist in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, count in zip([*map(str, hist.buckets), "+Inf"], hist.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{render(labels, (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{render(labels)} {hist.sum:.12g}")
+                lines.append(f"{name}_count{render(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> str:
+        """Write a JSON snapshot for a `.json` path, Prometheus text format otherwise"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if path.endswith(".json"):
+            content = json.dumps(self.snapshot(), indent=2)
+        else:
+            content = self.to_prometheus()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        return path
+
+
+metrics = Metrics()
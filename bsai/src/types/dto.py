@@ -1,23 +1,98 @@
+"""Batches passed between pipeline stages.
+
+Batches are plain dataclasses that do no per-item validation: vectors are a
+float32 (n, dim) matrix and cluster labels an int64 array, each next to a
+list of urls. Call `validate()` where data enters from outside (API
+responses, user files); internal hand-offs skip it.
+"""
+from dataclasses import dataclass
+
 import numpy as np
 from pydantic import BaseModel
 
 
-class ParsedText(BaseModel):
+def _check_lengths(batch, n: int, name: str):
+    if len(batch.urls) != n:
+        raise ValueError(f"{type(batch).__name__} has {len(batch.urls)} urls but {n} {name}")
+    if not all(isinstance(url, str) for url in batch.urls):
+        raise ValueError(f"{type(batch).__name__} urls must be strings")
+
+
+@dataclass(slots=True)
+class ParsedText:
     urls: list[str]
     texts: list[str]
 
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def validate(self) -> "ParsedText":
+        _check_lengths(self, len(self.texts), "texts")
+        if not all(isinstance(text, str) for text in self.texts):
+            raise ValueError("ParsedText texts must be strings")
+        return self
 
-class Summary(BaseModel):
+
+@dataclass(slots=True)
+class Summary:
     urls: list[str]
     texts: list[str]
 
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def validate(self) -> "Summary":
+        _check_lengths(self, len(self.texts), "texts")
+        if not all(isinstance(text, str) for text in self.texts):
+            raise ValueError("Summary texts must be strings")
+        return self
+
+
+@dataclass(slots=True)
+class Vector:
+    """Url-aligned rows of a float32 matrix; lists of floats are converted once"""
 
-class Vector(BaseModel):
     urls: list[str]
-    vectors: list[list[float]]
+    vectors: np.ndarray
 
+    def __post_init__(self):
+        matrix = np.asarray(self.vectors, dtype=np.float32)
+        if matrix.ndim != 2:
+            # an empty list, or one flat row per url
+            matrix = matrix.reshape(len(self.urls), -1 if matrix.size else 0)
+        self.vectors = matrix
 
-class Cluster(BaseModel):
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def validate(self) -> "Vector":
+        _check_lengths(self, len(self.vectors), "vectors")
+        if not np.isfinite(self.vectors).all():
+            raise ValueError("Vector contains NaN or infinite values")
+        return self
+
+
+@dataclass(slots=True)
+class Cluster:
     urls: list[str]
-    labels: list[int]
+    labels: np.ndarray
     texts: list[str]
+
+    def __post_init__(self):
+        self.labels = np.asarray(self.labels, dtype=np.int64).reshape(-1)
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def validate(self) -> "Cluster":
+        _check_lengths(self, len(self.labels), "labels")
+        if self.texts and len(self.texts) != len(self.urls):
+            raise ValueError(f"Cluster has {len(self.urls)} urls but {len(self.texts)} texts")
+        return self
+
+
+class Bookmark(BaseModel):
+    url: str
+    title: str = ""
+    folder: list[str] = []
+    add_date: int | None = None
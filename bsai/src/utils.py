@@ -1,36 +1,67 @@
-import numpy as np
-import pandas as pd
-from sklearn.manifold import TSNE
-import matplotlib
-import matplotlib.pyplot as plt
+import asyncio
+import threading
+import time
 
-from bsai.src.types.dto import Cluster, Vector
 
+def filter_urls(urls1: list[str], urls2: list[str]) -> set:
+    return set(urls1).difference(set(urls2))
 
-def visualize_clusters(clusters: Cluster, vectors: Vector):
-    matrix = np.array(vectors.vectors)
-    df = pd.DataFrame(matrix)
-    df["Cluster"] = clusters.labels
-    df["Cluster"] = df["Cluster"] + 1
 
-    tsne = TSNE(n_components=2, perplexity=15, random_state=42, init="random", learning_rate=200)
-    vis_dims2 = tsne.fit_transform(matrix)
+class RateLimiter:
+    """Thread-safe limiter that spaces calls to at most `rate` per second."""
 
-    x = [x for x, y in vis_dims2]
-    y = [y for x, y in vis_dims2]
+    def __init__(self, rate: float | None = None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
 
-    for category, color in enumerate(["purple", "green", "red"]):
-        xs = np.array(x)[df.Cluster == category]
-        ys = np.array(y)[df.Cluster == category]
-        plt.scatter(xs, ys, color=color, alpha=0.3)
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        return slot - now
 
-        avg_x = xs.mean()
-        avg_y = ys.mean()
+    def wait(self):
+        if not self.interval:
+            return
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
 
-        plt.scatter(avg_x, avg_y, marker="x", color=color, s=100)
-    plt.title("Clusters identified visualized in language 2d using t-SNE")
-    plt.show()
 
+class TokenBucket:
+    """Budget of `per_minute` units refilled continuously, e.g. requests or tokens.
 
-def filter_urls(urls1: list[str], urls2: list[str]) -> set:
-    return set(urls1).difference(set(urls2))
+    Acquiring more than is available reserves the deficit and returns the time to
+    wait until it is paid back, so callers are served in arrival order.
+    """
+
+    def __init__(self, per_minute: float | None = None):
+        self.capacity = per_minute or 0.0
+        self.rate = self.capacity / 60
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def wait(self, amount: float = 1.0):
+        if not self.capacity:
+            return
+        delay = self._reserve(amount)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def async_wait(self, amount: float = 1.0):
+        if not self.capacity:
+            return
+        delay = self._reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,159 @@
+"""2D cluster maps of stored embeddings"""
+import hashlib
+import os
+
+import numpy as np
+from sklearn.decomposition import PCA
+from sklearn.manifold import TSNE
+from sklearn.neighbors import NearestNeighbors
+import matplotlib
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+
+from bsai.src.domain.repository import BaseRepository
+from bsai.src.types.dto import Cluster, Vector
+
+
+def _fingerprints(urls: list[str], matrix: np.ndarray) -> np.ndarray:
+    """64-bit digest of each (url, vector) row, so a changed vector counts as a new point"""
+    return np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(url.encode("utf-8") + row.tobytes(), digest_size=8).digest(),
+                "little",
+            )
+            for url, row in zip(urls, matrix)
+        ],
+        dtype=np.uint64,
+    )
+
+
+def _place(reduced: np.ndarray, anchors: np.ndarray, coords: np.ndarray, n_neighbors: int):
+    """Fill coords of non-anchor rows with the distance-weighted mean of their nearest anchors"""
+    rest = ~anchors
+    if not rest.any():
+        return
+    neighbors = NearestNeighbors(n_neighbors=min(n_neighbors, int(anchors.sum())))
+    distances, idx = neighbors.fit(reduced[anchors]).kneighbors(reduced[rest])
+    weights = 1.0 / (distances + 1e-6)
+    weights /= weights.sum(axis=1, keepdims=True)
+    coords[rest] = (coords[anchors][idx] * weights[..., None]).sum(axis=1)
+
+
+def cluster_layout(
+    urls: list[str],
+    vectors,
+    layout_path: str | None = None,
+    max_fit: int = 5_000,
+    pca_components: int = 50,
+    refit_fraction: float = 0.5,
+    n_neighbors: int = 5,
+) -> np.ndarray:
+    """2D t-SNE coordinates for each row of `vectors`.
+
+    t-SNE runs on PCA-reduced vectors of at most `max_fit` rows, picked by
+    fingerprint so the same rows are chosen from run to run; the other rows are
+    placed at the distance-weighted mean of their nearest fitted neighbours.
+    With `layout_path` the layout is cached by (url, vector) fingerprint and
+    later calls only place new points, refitting once they exceed
+    `refit_fraction` of the cached ones.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    keys = _fingerprints(urls, matrix)
+    order = np.argsort(keys)
+    n_components = min(pca_components, *matrix.shape)
+    pca = PCA(n_components=n_components, random_state=42).fit(matrix[np.sort(order[:max_fit])])
+    reduced = pca.transform(matrix)
+    coords = np.zeros((len(keys), 2), dtype=np.float32)
+
+    anchors = None
+    if layout_path is not None and os.path.exists(layout_path):
+        cached = np.load(layout_path)
+        position = dict(zip(cached["keys"].tolist(), cached["coords"]))
+        known = np.array([key in position for key in keys.tolist()], dtype=bool)
+        if known.sum() > n_neighbors and (~known).sum() <= refit_fraction * known.sum():
+            coords[known] = [position[key] for key in keys[known].tolist()]
+            anchors = known
+
+    if anchors is None:
+        anchors = np.zeros(len(keys), dtype=bool)
+        anchors[order[:max_fit]] = True
+        tsne = TSNE(
+            n_components=2,
+            perplexity=min(30.0, max(1.0, (anchors.sum() - 1) / 3)),
+            max_iter=500,
+            random_state=42,
+            init="pca",
+            learning_rate="auto",
+        )
+        coords[anchors] = tsne.fit_transform(reduced[anchors])
+    _place(reduced, anchors, coords, n_neighbors)
+
+    if layout_path is not None:
+        os.makedirs(os.path.dirname(layout_path) or ".", exist_ok=True)
+        with open(layout_path, "wb") as f:
+            np.savez(f, keys=keys, coords=coords)
+    return coords
+
+
+def render_cluster_map(
+    clusters: Cluster,
+    urls: list[str],
+    vectors,
+    output_path: str | None = None,
+    layout_path: str | None = None,
+    max_fit: int = 5_000,
+) -> str | None:
+    """Scatter every cluster in 2D; saves to `output_path`, or shows the plot without one"""
+    label_of = dict(zip(clusters.urls, clusters.labels))
+    rows = [i for i, url in enumerate(urls) if url in label_of]
+    if not rows:
+        return None
+    urls = [urls[i] for i in rows]
+    labels = np.array([label_of[url] for url in urls])
+    coords = cluster_layout(urls, np.asarray(vectors, dtype=np.float32)[rows], layout_path, max_fit)
+
+    # pyplot only for interactive display; a bare Figure renders without a GUI backend
+    fig = plt.figure(figsize=(12, 9)) if output_path is None else Figure(figsize=(12, 9))
+    ax = fig.subplots()
+    noise = labels == -1
+    ax.scatter(coords[noise, 0], coords[noise, 1], color="lightgray", s=2, alpha=0.3)
+    cluster_ids = sorted(set(labels.tolist()) - {-1})
+    colormap = matplotlib.colormaps["tab20"].resampled(max(len(cluster_ids), 1))
+    for i, cluster_id in enumerate(cluster_ids):
+        points = coords[labels == cluster_id]
+        color = colormap(i % colormap.N)
+        ax.scatter(points[:, 0], points[:, 1], color=color, s=3, alpha=0.4)
+        ax.scatter(*points.mean(axis=0), marker="x", color=color, s=100)
+    ax.set_title(f"{len(cluster_ids)} clusters of {len(urls)} bookmarks, t-SNE")
+
+    if output_path is None:
+        plt.show()
+        return None
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    fig.savefig(output_path, dpi=120)
+    return output_path
+
+
+def visualize_clusters(
+    clusters: Cluster,
+    vectors: Vector,
+    output_path: str | None = None,
+    layout_path: str | None = None,
+    max_fit: int = 5_000,
+) -> str | None:
+    return render_cluster_map(
+        clusters, vectors.urls, vectors.vectors, output_path, layout_path, max_fit
+    )
+
+
+def show_clusters(
+    repository: BaseRepository,
+    output_path: str | None = None,
+    layout_path: str | None = None,
+    max_fit: int = 5_000,
+) -> str | None:
+    urls, matrix = repository.get_vector_matrix()
+    return render_cluster_map(
+        repository.get_clusters(), urls, matrix, output_path, layout_path, max_fit
+    )
@@ -1,5 +1,6 @@
 import os
 from enum import Enum
+from functools import cached_property
 
 from pydantic import AnyUrl, Extra, root_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -27,6 +28,10 @@ class PostgresSettings(BaseSettings):
 
 class TavilySettings(BaseSettings):
     api_key: str
+    base_url: str | None = None
+    max_workers: int = 8
+    requests_per_second: float | None = 5.0
+    max_retries: int = 3
 
     model_config = SettingsConfigDict(
         env_file="env", env_file_encoding="utf-8", env_prefix="TAVILY_", extra="allow"
@@ -36,25 +41,171 @@ class TavilySettings(BaseSettings):
 class LLMSettings(BaseSettings):
     model: str
     token: str
+    max_concurrency: int = 8
+    requests_per_minute: float | None = None
+    tokens_per_minute: float | None = None
+    timeout: float = 60.0
+    max_retries: int = 3
+    cache_enabled: bool = True
+    cache_bypass: bool = False
+    cache_max_entries: int | None = 100_000
+    # page text budget for a single summary call; longer pages are truncated,
+    # pages beyond map_reduce_tokens are summarized chunk by chunk
+    max_input_tokens: int = 8_000
+    map_reduce_tokens: int = 32_000
+    chunk_tokens: int = 4_000
+    max_chunks: int = 8
 
     model_config = SettingsConfigDict(
         env_file="env", env_file_encoding="utf-8", env_prefix="LLM_", extra="allow"
     )
 
 
+class EmbeddingSettings(BaseSettings):
+    backend: str = "openai"
+    model: str = 'text-embedding-3-small'
+    batch_size: int = 256
+    max_batch_tokens: int = 250_000
+    max_workers: int = 4
+    cache_enabled: bool = True
+    local_model_path: str | None = None
+    local_batch_size: int = 32
+    local_max_length: int = 512
+    num_threads: int | None = None
+    quantize: bool = False
+
+    model_config = SettingsConfigDict(
+        env_file="env", env_file_encoding="utf-8", env_prefix="EMB_", extra="allow"
+    )
+
+
+class PipelineSettings(BaseSettings):
+    streaming: bool = False
+    batch_size: int = 32
+    queue_size: int = 2
+    max_attempts: int = 3
+    retry_backoff: float = 60.0
+
+    model_config = SettingsConfigDict(
+        env_file="env", env_file_encoding="utf-8", env_prefix="PIPELINE_", extra="allow"
+    )
+
+
+class DedupSettings(BaseSettings):
+    # pages whose estimated word 5-gram Jaccard similarity reaches `threshold` share one summary
+    enabled: bool = True
+    threshold: float = 0.85
+    num_perm: int = 128
+    bands: int = 16
+    shingle_size: int = 5
+
+    model_config = SettingsConfigDict(
+        env_file="env", env_file_encoding="utf-8", env_prefix="DEDUP_", extra="allow"
+    )
+
+
+class ClusterSettings(BaseSettings):
+    incremental: bool = False
+    min_cluster_size: int = 3
+    min_samples: int = 2
+    # project embeddings to this many dimensions before HDBSCAN; None clusters raw vectors
+    n_components: int | None = None
+    reduction: str = "pca"
+
+    model_config = SettingsConfigDict(
+        env_file="env", env_file_encoding="utf-8", env_prefix="CLUSTER_", extra="allow"
+    )
+
+
+class IndexSettings(BaseSettings):
+    ivf_threshold: int = 20_000
+    nprobe: int = 8
+
+    model_config = SettingsConfigDict(
+        env_file="env", env_file_encoding="utf-8", env_prefix="INDEX_", extra="allow"
+    )
+
+
+class RecommenderSettings(BaseSettings):
+    # "balanced" picks clusters uniformly; "mmr" also trades centrality against recent picks
+    strategy: str = "balanced"
+    mmr_lambda: float = 0.5
+    n_candidates: int = 8
+    history_window: int = 20
+
+    model_config = SettingsConfigDict(
+        env_file="env", env_file_encoding="utf-8", env_prefix="RECOMMENDER_", extra="allow"
+    )
+
+
 class DataSettings(BaseSettings):
     path: str
+    backend: str = "df"
+    cache_max_mb: int = 512
 
     model_config = SettingsConfigDict(
         env_file="env", env_file_encoding="utf-8", env_prefix="DATA_", extra="allow"
     )
 
 
-class Settings(BaseSettings):
-    tavily: TavilySettings = TavilySettings()
-    llm: LLMSettings = LLMSettings()
-    postgres: PostgresSettings = PostgresSettings()
-    data: DataSettings = DataSettings()
+class MetricsSettings(BaseSettings):
+    # .json for a JSON snapshot, anything else for Prometheus text; defaults to DATA_PATH/metrics
+    export_path: str | None = None
+
+    model_config = SettingsConfigDict(
+        env_file="env", env_file_encoding="utf-8", env_prefix="METRICS_", extra="allow"
+    )
+
+
+class Settings:
+    """Component settings, each read and validated from the environment on first access.
+
+    A command that never touches e.g. `settings.tavily` does not need its env vars.
+    """
+
+    @cached_property
+    def tavily(self) -> TavilySettings:
+        return TavilySettings()
+
+    @cached_property
+    def llm(self) -> LLMSettings:
+        return LLMSettings()
+
+    @cached_property
+    def embedding(self) -> EmbeddingSettings:
+        return EmbeddingSettings()
+
+    @cached_property
+    def pipeline(self) -> PipelineSettings:
+        return PipelineSettings()
+
+    @cached_property
+    def dedup(self) -> DedupSettings:
+        return DedupSettings()
+
+    @cached_property
+    def cluster(self) -> ClusterSettings:
+        return ClusterSettings()
+
+    @cached_property
+    def index(self) -> IndexSettings:
+        return IndexSettings()
+
+    @cached_property
+    def recommender(self) -> RecommenderSettings:
+        return RecommenderSettings()
+
+    @cached_property
+    def postgres(self) -> PostgresSettings:
+        return PostgresSettings()
+
+    @cached_property
+    def data(self) -> DataSettings:
+        return DataSettings()
+
+    @cached_property
+    def metrics(self) -> MetricsSettings:
+        return MetricsSettings()
 
 
 settings = Settings()
@@ -1,4 +1,6 @@
 """Fixtures and etc."""
+import numpy as np
+
 from bsai.src.domain.llm import BaseLLM
 from bsai.src.domain.parser import BaseParser
 from bsai.src.domain.vectorizer import BaseVectorizer
@@ -22,16 +24,16 @@ class MockParser(BaseParser):
     def __init__(self):
         pass
 
-    def extract(self, urls: list[str]) -> list[str]:
-        return [f"extracted_text_{i}" for i in range(len(urls))]
+    def extract(self, urls: list[str]) -> tuple[list[str], list[str]]:
+        return urls, [f"extracted_text_{i}" for i in range(len(urls))]
 
 
 class MocVectorizer(BaseVectorizer):
     def __init__(self):
         pass
 
-    def transform(self, texts: list[str]) -> list[list[float]]:
-        return [[1.0, 1.0, 1.0, 1.0] for _ in texts]
+    def transform(self, texts: list[str]) -> np.ndarray:
+        return np.ones((len(texts), 4), dtype=np.float32)
 
-    def fit_transform(self, texts: list[str]) -> list[list[float]]:
+    def fit_transform(self, texts: list[str]) -> np.ndarray:
         return self.transform(texts)
@@ -0,0 +1,47 @@
+import pytest
+
+from bsai.src.api.bookmarks import canonicalize_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://Example.COM/Path/", "https://example.com/Path"),
+    ("https://example.com", "https://example.com/"),
+    ("https://example.com:443/a", "https://example.com/a"),
+    ("http://example.com:8080/a", "http://example.com:8080/a"),
+    ("https://example.com./a#section", "https://example.com/a"),
+    ("http://[::1]:8000/", "http://[::1]:8000/"),
+    ("  https://example.com/a  ", "https://example.com/a"),
+    # tracking parameters go, the others keep their spelling and order
+    ("https://example.com/?utm_source=x&b=2&gclid=1&a=1", "https://example.com/?b=2&a=1"),
+    ("https://example.com/a?UTM_Medium=x", "https://example.com/a"),
+    ("https://example.com/a?q=a+b%20c&fbclid=1", "https://example.com/a?q=a+b%20c"),
+    # user info is part of the address
+    ("https://user:pw@Example.com/a", "https://user:pw@example.com/a"),
+    ("https://user@example.com:443/", "https://user@example.com/"),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://youtu.be/abc?si=x&t=10", "https://youtu.be/abc?t=10"),
+    ("https://www.youtube.com/watch?v=abc&si=x", "https://www.youtube.com/watch?v=abc"),
+    ("https://open.spotify.com/track/1?si=x", "https://open.spotify.com/track/1"),
+    ("https://www.aliexpress.com/item/1?spm=a2g0o", "https://www.aliexpress.com/item/1"),
+    # elsewhere the same names can be real parameters
+    ("https://example.com/search?si=2&spm=1", "https://example.com/search?si=2&spm=1"),
+    ("https://notyoutube.com/?si=1", "https://notyoutube.com/?si=1"),
+])
+def test_host_specific_tracking_params(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://example.com/file",
+    "javascript:alert(1)",
+    "place:sort=8",
+    "https://",
+    "http://example.com:99999/",
+])
+def test_non_http_urls_are_rejected(url):
+    assert canonicalize_url(url) is None
@@ -0,0 +1,101 @@
+import itertools
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from bsai.src import cache as cache_module
+from bsai.src.cache import DiskCache, TableCache, content_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing `time.time()` so access order never ties"""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def test_disk_cache_hit_and_miss(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"))
+    key = content_key("model", [{"role": "user", "content": "hi"}])
+    assert cache.get(key) is None
+    cache.set(key, b"value")
+    assert cache.get(key) == b"value"
+    assert cache.get_many([key, "missing"]) == {key: b"value"}
+    assert cache.stats() == {"hits": 2, "misses": 2, "hit_rate": 0.5, "entries": 1}
+
+    # persisted across instances
+    assert DiskCache(str(tmp_path / "cache.sqlite")).get(key) == b"value"
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path, clock):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.set("c", b"3")
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get_many(["a", "c"]) == {"a": b"1", "c": b"3"}
+
+
+def test_disk_cache_bypass_still_writes(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    DiskCache(path).set("a", b"old")
+    cache = DiskCache(path, bypass=True)
+    assert cache.get("a") is None
+    cache.set("a", b"new")
+    assert DiskCache(path).get("a") == b"new"
+
+
+class Loader:
+    def __init__(self):
+        self.loads = 0
+
+    def __call__(self, path: str) -> str:
+        self.loads += 1
+        with open(path) as f:
+            return f.read()
+
+
+def test_table_cache_reloads_changed_files(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text("a,b\n")
+    cache = TableCache()
+    load = Loader()
+    assert cache.get(str(path), load, len) == "a,b\n"
+    assert cache.get(str(path), load, len) == "a,b\n"
+    assert load.loads == 1
+
+    # same size, newer mtime
+    path.write_text("c,d\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.get(str(path), load, len) == "c,d\n"
+
+    # same mtime, different size
+    stat = path.stat()
+    path.write_text("c,d\ne,f\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.get(str(path), load, len) == "c,d\ne,f\n"
+    assert load.loads == 3
+
+    cache.invalidate(str(path))
+    cache.get(str(path), load, len)
+    assert load.loads == 4
+    assert cache.stats()["hits"] == 1
+
+
+def test_table_cache_evicts_beyond_max_bytes(tmp_path):
+    paths = []
+    for name in "abc":
+        paths.append(str(tmp_path / name))
+        (tmp_path / name).write_text(name * 10)
+    cache = TableCache(max_bytes=25)
+    load = Loader()
+    for path in paths:
+        cache.get(path, load, len)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] == 20
+    cache.get(paths[0], load, len)
+    assert load.loads == 4
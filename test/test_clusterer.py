@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from bsai.src.domain.clusterer import HDBSCANClusterer
+from bsai.src.domain.core import update_clusters
+from bsai.src.domain.repository import SQLiteRepository
+from bsai.src.types.dto import Summary, Vector
+from conf import MockLLM
+
+CENTERS = np.array([[0, 0, 0], [10, 0, 0], [0, 10, 0]], dtype=np.float32)
+
+
+class CountingLLM(MockLLM):
+    def __init__(self):
+        self.topics = 0
+
+    def get_cluster_topic(self, texts: list[str]) -> str:
+        self.topics += 1
+        return f"topic {self.topics}"
+
+
+class CountingRepository(SQLiteRepository):
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.replaced = 0
+
+    def replace_clusters(self, clusters):
+        self.replaced += 1
+        super().replace_clusters(clusters)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return CountingRepository(str(tmp_path))
+
+
+def store(repository, name: str, points: np.ndarray) -> Vector:
+    urls = [f"{name}{i}" for i in range(len(points))]
+    repository.save_summaries(Summary(urls=urls, texts=[f"summary {url}" for url in urls]))
+    vectors = Vector(urls=urls, vectors=points.astype(np.float32))
+    repository.save_vectors(vectors)
+    return vectors
+
+
+def blobs(n: int, seed: int, centers: np.ndarray = CENTERS) -> np.ndarray:
+    noise = 0.1 * np.random.default_rng(seed).standard_normal((n * len(centers), 3))
+    return np.repeat(centers, n, axis=0) + noise
+
+
+def labels_of(repository) -> dict[str, int]:
+    clusters = repository.get_clusters()
+    return dict(zip(clusters.urls, clusters.labels.tolist()))
+
+
+def fit(repository, llm) -> tuple[HDBSCANClusterer, dict[str, int]]:
+    clusterer = HDBSCANClusterer()
+    update_clusters(store(repository, "a", blobs(10, 0)), clusterer, llm, repository)
+    assert repository.replaced == 1
+    assert sorted(set(labels_of(repository).values())) == [0, 1, 2]
+    return clusterer, labels_of(repository)
+
+
+def test_new_points_join_stored_labels(repository):
+    llm = CountingLLM()
+    clusterer, fitted = fit(repository, llm)
+    topics = llm.topics
+
+    clusters = update_clusters(store(repository, "b", blobs(1, 1)), clusterer, llm, repository)
+    assert clusters.labels.tolist() == [fitted["a0"], fitted["a10"], fitted["a20"]]
+    # placed without a refit or new topics
+    assert repository.replaced == 1
+    assert llm.topics == topics
+    assert clusterer.n_predicted == 3
+
+
+def test_noisy_batch_refits_with_stable_labels(repository):
+    llm = CountingLLM()
+    clusterer, fitted = fit(repository, llm)
+    topics = llm.topics
+
+    far = blobs(4, 2, np.array([[50, 50, 50]], dtype=np.float32))
+    clusters = update_clusters(store(repository, "c", far), clusterer, llm, repository)
+    assert repository.replaced == 2
+    assert clusterer.n_predicted == 0
+    labels = labels_of(repository)
+    assert all(labels[url] == label for url, label in fitted.items())
+    # the matched clusters kept their topics; only the new one was named
+    assert set(clusters.labels.tolist()) == {3}
+    assert llm.topics == topics + 1
+
+
+def test_drift_triggers_refit(repository):
+    llm = CountingLLM()
+    clusterer, fitted = fit(repository, llm)
+    update_clusters(
+        store(repository, "b", blobs(1, 1)), clusterer, llm, repository, drift_threshold=0.15
+    )
+    assert repository.replaced == 1
+    # 6 predicted points on 30 fitted ones are past the threshold
+    update_clusters(
+        store(repository, "d", blobs(1, 3)), clusterer, llm, repository, drift_threshold=0.15
+    )
+    assert repository.replaced == 2
+    assert (clusterer.fit_size, clusterer.n_predicted) == (36, 0)
+    labels = labels_of(repository)
+    assert all(labels[url] == label for url, label in fitted.items())
+
+
+@pytest.mark.parametrize("reduction", ["pca", "svd"])
+def test_projection_is_fitted_persisted_and_reused(tmp_path, reduction):
+    rng = np.random.default_rng(0)
+    centers = 5 * rng.standard_normal((3, 64))
+    vectors = (np.repeat(centers, 20, axis=0) + 0.2 * rng.standard_normal((60, 64))).astype(
+        np.float32
+    )
+    raw = HDBSCANClusterer().clusterize(vectors)
+
+    path = str(tmp_path / "model.pkl")
+    clusterer = HDBSCANClusterer(model_path=path, n_components=8, reduction=reduction)
+    labels = clusterer.clusterize(vectors)
+    assert clusterer.reducer.n_components == 8
+    # the same partition as without the projection, up to label names
+    assert len(set(zip(raw.tolist(), labels.tolist()))) == len(set(raw.tolist())) == 3
+    clusterer.save()
+
+    loaded = HDBSCANClusterer(model_path=path, n_components=8, reduction=reduction)
+    assert loaded.load()
+    assert loaded._project(vectors[:2]).shape == (2, 8)
+    assert loaded.predict(vectors[::20]).tolist() == labels[::20].tolist()
+
+
+def test_projection_is_skipped_when_not_smaller():
+    vectors = np.random.default_rng(0).standard_normal((10, 4)).astype(np.float32)
+    clusterer = HDBSCANClusterer(n_components=8)
+    clusterer.clusterize(vectors)
+    assert clusterer.reducer is None
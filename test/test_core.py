@@ -0,0 +1,139 @@
+import threading
+
+import numpy as np
+import pytest
+
+from bsai.src.domain.clusterer import BaseClusterer
+from bsai.src.domain.core import pipeline_urls, pipeline_urls_streaming
+from bsai.src.domain.dedup import Deduplicator
+from bsai.src.domain.ledger import StageLedger
+from bsai.src.domain.repository import SQLiteRepository
+from conf import MockLLM, MockParser, MocVectorizer
+
+
+class CountingParser(MockParser):
+    def __init__(self):
+        self.calls = 0
+
+    def extract(self, urls: list[str]) -> tuple[list[str], list[str]]:
+        self.calls += 1
+        return super().extract(urls)
+
+
+class MirrorParser(MockParser):
+    """Pages whose path ends in "-copy" have the same text as the page without it"""
+
+    def extract(self, urls: list[str]) -> tuple[list[str], list[str]]:
+        texts = [
+            " ".join(f"{url.removesuffix('-copy')} word {i}" for i in range(40)) for url in urls
+        ]
+        return urls, texts
+
+
+class CountingLLM(MockLLM):
+    def __init__(self):
+        self.summarized = []
+
+    def get_summary(self, texts: list[str]) -> list[str]:
+        self.summarized += texts
+        return super().get_summary(texts)
+
+
+class FlakyVectorizer(MocVectorizer):
+    """Fails its first `failures` calls"""
+
+    def __init__(self, failures: int = 1):
+        self.failures = failures
+        self.calls = 0
+
+    def transform(self, texts: list[str]) -> np.ndarray:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("embeddings unavailable")
+        return super().transform(texts)
+
+
+class SingleClusterer(BaseClusterer):
+    def clusterize(self, vectors: np.ndarray) -> np.ndarray:
+        return np.zeros(len(vectors), dtype=np.int64)
+
+
+class FailingRepository(SQLiteRepository):
+    def save_summaries(self, summary):
+        raise OSError("disk full")
+
+
+def test_streaming_failure_stops_every_stage(tmp_path):
+    parser = CountingParser()
+    before = threading.active_count()
+    urls = [f"https://example.com/{i}" for i in range(200)]
+    with pytest.raises(OSError, match="disk full"):
+        pipeline_urls_streaming(
+            urls, parser, MocVectorizer(), None, MockLLM(), FailingRepository(str(tmp_path)),
+            batch_size=2, queue_size=1,
+        )
+    # the stage threads were joined, and fetching stopped instead of running through all batches
+    assert threading.active_count() == before
+    assert parser.calls < len(urls) // 2
+
+
+def test_duplicates_share_rows_of_their_representative(tmp_path):
+    repository = SQLiteRepository(str(tmp_path))
+    urls = ["https://example.com/a", "https://example.com/b", "https://example.com/a-copy"]
+    pipeline_urls(
+        urls, MirrorParser(), MocVectorizer(), SingleClusterer(), MockLLM(), repository,
+        deduplicator=Deduplicator(),
+    )
+    assert sorted(repository.get_urls()) == sorted(urls)
+    summary = repository.get_summaries()
+    summaries = dict(zip(summary.urls, summary.texts))
+    assert summaries[urls[2]] == summaries[urls[0]]
+    vector_urls, matrix = repository.get_vector_matrix()
+    rows = {url: i for i, url in enumerate(vector_urls)}
+    np.testing.assert_array_equal(matrix[rows[urls[2]]], matrix[rows[urls[0]]])
+    clusters = repository.get_clusters()
+    assert sorted(clusters.urls) == sorted(urls)
+    assert set(clusters.texts) == {"topic"}
+
+
+def test_resume_skips_completed_stages(tmp_path):
+    repository = SQLiteRepository(str(tmp_path / "data"))
+    ledger_path = str(tmp_path / "ledger.sqlite")
+    urls = ["https://example.com/a", "https://example.com/b"]
+    parser, llm, vectorizer = CountingParser(), CountingLLM(), FlakyVectorizer()
+
+    def run():
+        pipeline_urls(
+            urls, parser, vectorizer, SingleClusterer(), llm, repository,
+            ledger=StageLedger(ledger_path, backoff=0),
+        )
+
+    run()
+    ledger = StageLedger(ledger_path)
+    assert [ledger.status(url)["stage"] for url in urls] == ["summarized"] * 2
+    assert ledger.status(urls[0])["attempts"] == 1
+    assert repository.get_urls() == []
+
+    # a new ledger on the same file picks up at the embedding
+    run()
+    assert (parser.calls, len(llm.summarized), vectorizer.calls) == (1, 2, 2)
+    assert sorted(repository.get_urls()) == urls
+    assert StageLedger(ledger_path).summary()["clustered"] == 2
+
+    run()
+    assert (parser.calls, len(llm.summarized), vectorizer.calls) == (1, 2, 2)
+
+
+def test_failed_urls_stop_after_max_attempts(tmp_path):
+    ledger = StageLedger(str(tmp_path / "ledger.sqlite"), max_attempts=2, backoff=0)
+    ledger.add(["a", "b"])
+    for _ in range(2):
+        assert ledger.due(["a", "b"], "new") == ["a", "b"]
+        ledger.fail(["a"], "fetch: timeout")
+    assert ledger.due(["a", "b"], "new") == ["b"]
+    assert ledger.failed() == [("a", "new", "fetch: timeout")]
+
+    backing_off = StageLedger(str(tmp_path / "other.sqlite"), backoff=60)
+    backing_off.add(["a"])
+    backing_off.fail(["a"], "fetch: timeout")
+    assert backing_off.due(["a"], "new") == []
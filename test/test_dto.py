@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from bsai.src.types.dto import Cluster, ParsedText, Summary, Vector
+
+
+def test_vector_converts_lists_once():
+    vector = Vector(urls=["a", "b"], vectors=[[1, 2], [3, 4]])
+    assert vector.vectors.dtype == np.float32
+    assert vector.vectors.shape == (2, 2)
+    assert vector.validate() is vector
+
+    assert Vector(urls=[], vectors=[]).vectors.shape == (0, 0)
+    assert Vector(urls=["a"], vectors=[1.0, 2.0, 3.0]).vectors.shape == (1, 3)
+    matrix = np.ones((2, 3), dtype=np.float32)
+    assert Vector(urls=["a", "b"], vectors=matrix).vectors is matrix
+
+
+def test_vector_validation():
+    with pytest.raises(ValueError, match="2 urls but 3 vectors"):
+        Vector(urls=["a", "b"], vectors=np.ones((3, 2))).validate()
+    with pytest.raises(ValueError, match="NaN"):
+        Vector(urls=["a"], vectors=[[np.nan, 1.0]]).validate()
+    with pytest.raises(ValueError, match="strings"):
+        Vector(urls=[1], vectors=[[1.0]]).validate()
+
+
+def test_cluster_labels_and_validation():
+    cluster = Cluster(urls=["a", "b"], labels=[0, -1], texts=["x", "Other"])
+    assert cluster.labels.dtype == np.int64
+    assert cluster.validate() is cluster
+    # texts may be filled in later
+    Cluster(urls=["a"], labels=[0], texts=[]).validate()
+
+    with pytest.raises(ValueError, match="2 urls but 1 labels"):
+        Cluster(urls=["a", "b"], labels=[0], texts=[]).validate()
+    with pytest.raises(ValueError, match="1 texts"):
+        Cluster(urls=["a", "b"], labels=[0, 1], texts=["x"]).validate()
+
+
+@pytest.mark.parametrize("batch_type", [ParsedText, Summary])
+def test_text_batch_validation(batch_type):
+    batch = batch_type(urls=["a", "b"], texts=["x", "y"])
+    assert len(batch) == 2
+    assert batch.validate() is batch
+    with pytest.raises(ValueError, match="2 urls but 1 texts"):
+        batch_type(urls=["a", "b"], texts=["x"]).validate()
+    with pytest.raises(ValueError, match="texts must be strings"):
+        batch_type(urls=["a"], texts=[None]).validate()
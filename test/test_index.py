@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from bsai.src.domain.index import VectorIndex
+
+
+@pytest.mark.parametrize("ivf_threshold", [20_000, 4])
+def test_resaved_vector_replaces_its_row(tmp_path, ivf_threshold):
+    index = VectorIndex(str(tmp_path), ivf_threshold=ivf_threshold, nprobe=1)
+    vectors = np.eye(4, dtype=np.float32)
+    assert index.add(["a", "b", "c", "d"], vectors) == 4
+
+    assert index.add(["b", "e"], [vectors[3], vectors[0] + vectors[1]]) == 1
+    assert len(index) == 5
+    np.testing.assert_allclose(index.vector("b"), vectors[3])
+    assert index.search(vectors[3:], k=2)[0][0][1] == pytest.approx(1.0)
+    assert {url for url, _ in index.search(vectors[3:], k=2)[0]} == {"b", "d"}
+
+    reloaded = VectorIndex(str(tmp_path), ivf_threshold=ivf_threshold, nprobe=1)
+    np.testing.assert_allclose(reloaded.vector("b"), vectors[3])
+    np.testing.assert_array_equal(reloaded.assign, index.assign)
+
+
+def clustered(n: int, dim: int = 16, centers: int = 20, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    means = rng.standard_normal((centers, dim))
+    return (means[rng.integers(centers, size=n)] + 0.3 * rng.standard_normal((n, dim))).astype(
+        np.float32
+    )
+
+
+def test_ivf_matches_brute_force(tmp_path):
+    vectors = clustered(1000)
+    queries = vectors[::50] + 0.1 * np.random.default_rng(1).standard_normal((20, 16))
+    urls = [f"u{i}" for i in range(len(vectors))]
+    brute = VectorIndex(str(tmp_path / "brute"))
+    brute.add(urls, vectors)
+    assert brute.centroids is None
+    expected = brute.search(queries, k=10)
+
+    ivf = VectorIndex(str(tmp_path / "ivf"), ivf_threshold=500, nprobe=8)
+    ivf.add(urls[:600], vectors[:600])
+    ivf.add(urls[600:], vectors[600:])
+    assert ivf.centroids is not None
+    # probing every list is exhaustive
+    ivf.nprobe = len(ivf.centroids)
+    for got, want in zip(ivf.search(queries, k=10), expected):
+        assert [url for url, _ in got] == [url for url, _ in want]
+        np.testing.assert_allclose([s for _, s in got], [s for _, s in want], rtol=1e-5)
+
+    ivf.nprobe = 8
+    found = sum(
+        len({url for url, _ in got} & {url for url, _ in want})
+        for got, want in zip(ivf.search(queries, k=10), expected)
+    )
+    assert found / (10 * len(queries)) >= 0.9
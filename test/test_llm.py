@@ -0,0 +1,143 @@
+"""OpenAIModel against a local fake chat completions endpoint"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from bsai.src.domain.llm import OpenAIModel
+from config import settings
+
+
+class FakeChat:
+    """`/chat/completions` stand-in that keeps connections alive like the real API.
+
+    Structured requests get a useful summary, plain ones the topic "topic".
+    `failures` status codes are answered first, one per request.
+    """
+
+    def __init__(self, failures: list[int] | None = None):
+        self.failures = list(failures or [])
+        self.requests = 0
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with fake._lock:
+                    fake.requests += 1
+                    status = fake.failures.pop(0) if fake.failures else 200
+                if status != 200:
+                    payload = {"error": {"message": f"status {status}", "type": "server_error"}}
+                else:
+                    if "response_format" in body:
+                        content = json.dumps({"is_useful": True, "summary": "summary"})
+                    else:
+                        content = "topic"
+                    payload = {
+                        "id": "chatcmpl-1",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body["model"],
+                        "choices": [{
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": content},
+                        }],
+                        "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+                    }
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def __enter__(self) -> "FakeChat":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_chat(monkeypatch):
+    monkeypatch.setenv("LLM_MODEL", "test-model")
+    monkeypatch.setenv("LLM_TOKEN", "test-token")
+    monkeypatch.delitem(settings.__dict__, "llm", raising=False)
+    with FakeChat() as fake:
+        monkeypatch.setenv("OPENAI_BASE_URL", fake.base_url)
+        yield fake
+    settings.__dict__.pop("llm", None)
+
+
+def make_model(**kwargs) -> OpenAIModel:
+    return OpenAIModel("test-model", max_retries=2, backoff=0.01, timeout=5.0, **kwargs)
+
+
+def test_summaries_across_event_loops(fake_chat):
+    model = make_model()
+    for run in range(3):
+        texts = [f"page {run} {i}" for i in range(4)]
+        assert model.get_summary(texts) == ["summary"] * 4
+    assert fake_chat.requests == 12
+
+
+def test_topics_after_summaries(fake_chat):
+    model = make_model()
+    assert model.get_summary(["a page"]) == ["summary"]
+    assert model.get_cluster_topics([["a"], ["b"]]) == ["topic", "topic"]
+    assert model.get_cluster_topics([["c"]]) == ["topic"]
+
+
+def test_summary_retries_server_errors(fake_chat):
+    fake_chat.failures = [500, 503]
+    assert make_model().get_summary(["a page"]) == ["summary"]
+    assert fake_chat.requests == 3
+
+
+def test_topics_raise_when_retries_run_out(fake_chat):
+    fake_chat.failures = [500] * 3
+    with pytest.raises(RuntimeError, match="1/2 cluster topics"):
+        make_model(max_concurrency=1).get_cluster_topics([["a"], ["b"]])
+
+
+def test_sync_calls_inside_a_running_loop(fake_chat):
+    model = make_model()
+
+    async def handler():
+        return model.get_summary(["a page"]), model.get_cluster_topics([["a"]])
+
+    assert asyncio.run(handler()) == (["summary"], ["topic"])
+
+
+def test_token_budget_is_charged_with_the_token_counter(fake_chat, monkeypatch):
+    model = make_model()
+    charged = []
+
+    async def wait(amount: float = 1.0):
+        charged.append(amount)
+
+    monkeypatch.setattr(model.tokens_budget, "async_wait", wait)
+    monkeypatch.setattr(model.counter, "count", lambda text: 10)
+    model.get_cluster_topics([["a"]])
+    # a system and a user message
+    assert charged == [2 * (4 + 10)]
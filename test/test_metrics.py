@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from bsai.src.metrics import Metrics
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.inc("bsai_stage_items_total", 10, stage="summarize")
+    metrics.observe("bsai_stage_seconds", 2.0, stage="summarize")
+    metrics.observe("bsai_api_request_seconds", 0.05, api="openai_chat")
+    metrics.observe("bsai_api_request_seconds", 0.5, api="openai_chat")
+    metrics.record_tokens("gpt-4o-mini", 1_000_000, 100_000)
+    return metrics
+
+
+def test_prometheus_export(metrics, tmp_path):
+    path = metrics.export(str(tmp_path / "metrics" / "run.prom"))
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert "# TYPE bsai_llm_tokens_total counter" in lines
+    assert 'bsai_llm_tokens_total{kind="prompt",model="gpt-4o-mini"} 1000000' in lines
+    assert 'bsai_llm_cost_usd_total{model="gpt-4o-mini"} 0.21' in lines
+    # buckets are cumulative
+    assert "# TYPE bsai_api_request_seconds histogram" in lines
+    assert 'bsai_api_request_seconds_bucket{api="openai_chat",le="0.1"} 1' in lines
+    assert 'bsai_api_request_seconds_bucket{api="openai_chat",le="1.0"} 2' in lines
+    assert 'bsai_api_request_seconds_bucket{api="openai_chat",le="+Inf"} 2' in lines
+    assert 'bsai_api_request_seconds_count{api="openai_chat"} 2' in lines
+
+
+def test_label_values_are_escaped():
+    metrics = Metrics()
+    metrics.inc("bsai_errors_total", error='bad "quote"\\')
+    metrics.inc("bsai_errors_total", error="two\nlines")
+    exported = metrics.to_prometheus()
+    assert 'bsai_errors_total{error="bad \\"quote\\"\\\\"} 1' in exported
+    assert 'bsai_errors_total{error="two\\nlines"} 1' in exported
+
+
+def test_json_snapshot(metrics, tmp_path):
+    with open(metrics.export(str(tmp_path / "run.json"))) as f:
+        snapshot = json.load(f)
+    assert snapshot["stage_items_per_second"] == {"summarize": 5.0}
+    histogram = next(h for h in snapshot["histograms"] if h["name"] == "bsai_api_request_seconds")
+    assert histogram["buckets"] == {"0.1": 1, "1.0": 1, "+Inf": 0}
+    assert histogram["count"] == 2
+    counters = {(c["name"], c["labels"].get("kind")): c["value"] for c in snapshot["counters"]}
+    assert counters["bsai_llm_tokens_total", "completion"] == 100_000
+
+
+def test_request_counts_errors():
+    metrics = Metrics()
+    with metrics.request("tavily"):
+        pass
+    with pytest.raises(TimeoutError):
+        with metrics.request("tavily"):
+            raise TimeoutError
+    statuses = {dict(labels)["status"]: value for (_, labels), value in metrics.counters.items()}
+    assert statuses == {"ok": 1, "error": 1}
@@ -0,0 +1,128 @@
+"""TavilyParser against a local fake extract endpoint"""
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from bsai.src.domain.parser import TavilyParser
+
+
+class FakeExtract:
+    """Tavily `/extract` stand-in: answers after `latency`, results in reverse order.
+
+    `failures` maps a url to the status codes returned, one per request, for the
+    chunks containing it before the request succeeds.
+    """
+
+    def __init__(self, latency: float = 0.0, failures: dict[str, list[int]] | None = None):
+        self.latency = latency
+        self.failures = {url: list(codes) for url, codes in (failures or {}).items()}
+        self.requests: list[tuple[float, list[str]]] = []
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status = fake.handle(body["urls"])
+                time.sleep(fake.latency)
+                if status == 200:
+                    payload = {
+                        "results": [
+                            {"url": url, "raw_content": f"text of {url}"} for url in reversed(body["urls"])
+                        ]
+                    }
+                else:
+                    payload = {"detail": {"error": f"status {status}"}}
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def handle(self, urls: list[str]) -> int:
+        with self._lock:
+            self.requests.append((time.monotonic(), urls))
+            for url in urls:
+                if self.failures.get(url):
+                    return self.failures[url].pop(0)
+        return 200
+
+    def attempts(self) -> Counter:
+        return Counter(url for _, urls in self.requests for url in urls)
+
+    def __enter__(self) -> "FakeExtract":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_parser(fake: FakeExtract, **kwargs) -> TavilyParser:
+    kwargs = {"max_workers": 4, "requests_per_second": None, "backoff": 0.01, **kwargs}
+    return TavilyParser("test-key", base_url=fake.base_url, **kwargs)
+
+
+def test_extract_keeps_input_order():
+    urls = [f"https://example.com/{i}" for i in range(11)]
+    with FakeExtract(latency=0.02) as fake:
+        found, texts = make_parser(fake).extract(urls)
+    assert found == urls
+    assert texts == [f"text of {url}" for url in urls]
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_extract_retries_transient_errors(status):
+    urls = [f"https://example.com/{i}" for i in range(6)]
+    with FakeExtract(failures={urls[2]: [status, status]}) as fake:
+        found, _ = make_parser(fake, max_retries=3).extract(urls)
+    assert found == urls
+    attempts = fake.attempts()
+    assert attempts[urls[2]] == 3
+    assert attempts[urls[0]] == 1
+
+
+def test_extract_gives_up_after_max_retries():
+    urls = [f"https://example.com/{i}" for i in range(4)]
+    with FakeExtract(failures={urls[0]: [503] * 10}) as fake:
+        found, _ = make_parser(fake, max_retries=2).extract(urls)
+    assert found == urls[2:]
+    assert fake.attempts()[urls[0]] == 3
+
+
+def test_extract_does_not_retry_bad_request():
+    urls = [f"https://example.com/{i}" for i in range(2)]
+    with FakeExtract(failures={urls[0]: [400, 400]}) as fake:
+        found, _ = make_parser(fake, max_retries=3).extract(urls)
+    assert found == []
+    assert fake.attempts()[urls[0]] == 1
+
+
+def test_extract_respects_rate_limit():
+    rate = 20.0
+    urls = [f"https://example.com/{i}" for i in range(16)]
+    with FakeExtract() as fake:
+        found, _ = make_parser(fake, max_workers=8, requests_per_second=rate).extract(urls)
+    assert found == urls
+    starts = sorted(start for start, _ in fake.requests)
+    assert len(starts) == 8
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    # the limiter spaces requests 1/rate apart; allow some scheduling jitter
+    assert min(gaps) >= 0.5 / rate
+    assert starts[-1] - starts[0] >= (len(starts) - 1) * 0.95 / rate
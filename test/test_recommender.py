@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from bsai.src.domain.index import VectorIndex
+from bsai.src.domain.recommender import Recommender, SimilarSearch, recommend_random
+from bsai.src.domain.repository import DFRepository, SQLiteRepository
+from bsai.src.types.dto import Cluster, Summary, Vector
+
+
+@pytest.fixture(params=[DFRepository, SQLiteRepository])
+def repository(request, tmp_path, monkeypatch):
+    repository = request.param(str(tmp_path / "data"))
+    # sync must only read what was saved since the last call
+    for name in ("get_summaries", "get_clusters", "get_not_existing_summaries"):
+        monkeypatch.setattr(repository, name, lambda *args: pytest.fail("full read by sync"))
+    return repository
+
+
+def save(repository, urls: list[str], labels: list[int] | None = None):
+    if labels is None:
+        repository.save_summaries(Summary(urls=urls, texts=[f"summary {url}" for url in urls]))
+    else:
+        repository.save_clusters(Cluster(urls=urls, labels=labels, texts=["topic"] * len(urls)))
+
+
+def label_of(recommender: Recommender) -> dict[str, int]:
+    return dict(zip(recommender.urls, recommender.labels.tolist()))
+
+
+def test_sync_reads_only_new_rows(repository, tmp_path):
+    recommender = Recommender(str(tmp_path / "recommender"), seed=0)
+    save(repository, ["a", "b"])
+    save(repository, ["a", "b"], [0, 1])
+    assert recommender.sync(repository) == 2
+    assert label_of(recommender) == {"a": 0, "b": 1}
+
+    save(repository, ["c"])
+    save(repository, ["c", "a"], [1, 1])
+    assert recommender.sync(repository) == 1
+    assert label_of(recommender) == {"a": 1, "b": 1, "c": 1}
+    assert recommender.sync(repository) == 0
+
+    # a label can arrive before its summary
+    save(repository, ["d"], [3])
+    recommender.sync(repository)
+    save(repository, ["d"])
+    assert recommender.sync(repository) == 1
+    assert label_of(recommender)["d"] == 3
+
+
+def test_replaced_clusters_supersede_earlier_labels(repository, tmp_path):
+    recommender = Recommender(str(tmp_path / "recommender"), seed=0)
+    save(repository, ["a", "b", "c"])
+    save(repository, ["a", "b", "c"], [0, 0, 1])
+    recommender.sync(repository)
+
+    repository.replace_clusters(Cluster(urls=["b", "a"], labels=[2, 2], texts=["x", "x"]))
+    recommender.sync(repository)
+    assert label_of(recommender) == {"a": 2, "b": 2, "c": -1}
+
+    save(repository, ["c"], [2])
+    recommender.sync(repository)
+    assert label_of(recommender) == {"a": 2, "b": 2, "c": 2}
+
+
+def test_positions_survive_restart(repository, tmp_path):
+    path = str(tmp_path / "recommender")
+    recommender = Recommender(path, seed=0)
+    save(repository, ["a", "b"])
+    save(repository, ["a", "b"], [0, 1])
+    recommender.sync(repository)
+    recommender.save()
+
+    recommender = Recommender(path, seed=0)
+    assert recommender.sync(repository) == 0
+    save(repository, ["c"])
+    assert recommender.sync(repository) == 1
+    assert sorted(url for url, _ in recommender.recommend(3)) == ["a", "b", "c"]
+
+
+def test_recommend_random(tmp_path):
+    repository = SQLiteRepository(str(tmp_path))
+    save(repository, ["a", "b"])
+    url, text = recommend_random(repository)
+    assert text == f"summary {url}"
+
+
+def test_search_from_stored_url_does_not_build_vectorizer(tmp_path):
+    repository = SQLiteRepository(str(tmp_path / "data"))
+    vectors = np.eye(3, dtype=np.float32) + 0.1
+    repository.save_vectors(Vector(urls=["a", "b", "c"], vectors=vectors))
+    search = SimilarSearch(
+        repository, lambda: pytest.fail("vectorizer built"), VectorIndex(str(tmp_path / "index"))
+    )
+    assert sorted(url for url, _ in search.similar("a", 2)) == ["b", "c"]
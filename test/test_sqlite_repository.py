@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from bsai.src.domain.repository import SQLiteRepository
+from bsai.src.types.dto import Cluster, Summary, Vector
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return SQLiteRepository(str(tmp_path))
+
+
+def test_get_not_existing_urls_keeps_input_order(repository):
+    repository.save_urls(["c", "a"])
+    assert repository.get_not_existing_urls(["e", "a", "d", "c", "b"]) == ["e", "d", "b"]
+    assert repository.get_not_existing_urls([]) == []
+
+    # more urls than SQLite allows bound parameters
+    urls = [f"u{i}" for i in range(5000)]
+    repository.save_urls(urls[::2])
+    assert repository.get_not_existing_urls(urls) == urls[1::2]
+
+
+def test_summaries_since(repository):
+    repository.save_summaries(Summary(urls=["a", "b"], texts=["sa", "sb"]))
+    summaries, position = repository.get_summaries_since()
+    assert summaries.urls == ["a", "b"]
+    assert repository.get_summaries_since(position) == (Summary(urls=[], texts=[]), position)
+
+    # rewriting the newest row still moves it past the position
+    repository.save_summaries(Summary(urls=["b", "c"], texts=["sb2", "sc"]))
+    summaries, position = repository.get_summaries_since(position)
+    assert (summaries.urls, summaries.texts) == (["b", "c"], ["sb2", "sc"])
+
+
+def test_vectors_since(repository):
+    matrix = np.arange(6, dtype=np.float32).reshape(3, 2)
+    repository.save_vectors(Vector(urls=["a", "b"], vectors=matrix[:2]))
+    urls, vectors, position = repository.get_vectors_since()
+    assert urls == ["a", "b"]
+    np.testing.assert_array_equal(vectors, matrix[:2])
+
+    repository.save_vectors(Vector(urls=["a"], vectors=matrix[2:]))
+    urls, vectors, position = repository.get_vectors_since(position)
+    assert urls == ["a"]
+    np.testing.assert_array_equal(vectors, matrix[2:])
+    assert repository.get_vectors_since(position)[0] == []
+
+
+def test_clusters_since(repository):
+    repository.save_clusters(Cluster(urls=["a", "b"], labels=[0, 1], texts=["x", "y"]))
+    clusters, position = repository.get_clusters_since()
+    assert clusters.urls == ["a", "b"]
+
+    repository.save_cluster_texts(["a"], ["renamed"])
+    clusters, position = repository.get_clusters_since(position)
+    assert (clusters.urls, clusters.texts) == (["a"], ["renamed"])
+
+    # a replace starts a new generation, read in full
+    repository.replace_clusters(Cluster(urls=["c"], labels=[2], texts=["z"]))
+    clusters, replaced = repository.get_clusters_since(position)
+    assert replaced[0] == position[0] + 1
+    assert clusters.urls == ["c"]
+    assert repository.get_clusters_since(replaced)[0].urls == []
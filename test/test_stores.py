@@ -0,0 +1,92 @@
+"""The append-only file stores behind DFRepository and VectorIndex"""
+import numpy as np
+import pytest
+
+from bsai.src.domain import repository as repository_module
+from bsai.src.domain.repository import TextStore, VectorStore
+
+
+def test_vector_store_round_trip(tmp_path):
+    store = VectorStore(str(tmp_path))
+    assert store.load()[0] == []
+    matrix = np.arange(12, dtype=np.float32).reshape(4, 3)
+    store.append(["a", "b"], matrix[:2])
+    store.append(["c", "d"], matrix[2:])
+
+    urls, loaded = VectorStore(str(tmp_path)).load()
+    assert urls == ["a", "b", "c", "d"]
+    assert store.dim() == 3
+    np.testing.assert_array_equal(loaded, matrix)
+
+    store.update([1], matrix[3:] * 10)
+    np.testing.assert_array_equal(store.load()[1][1], matrix[3] * 10)
+    with pytest.raises(ValueError):
+        store.append(["e"], np.ones((1, 4), dtype=np.float32))
+
+
+def test_vector_store_recovers_from_torn_appends(tmp_path):
+    store = VectorStore(str(tmp_path))
+    matrix = np.arange(6, dtype=np.float32).reshape(3, 2)
+    store.append(["a"], matrix[:1])
+
+    # rows written, interrupted before the urls
+    with open(store.matrix_path, "ab") as f:
+        f.write(matrix[1:].tobytes())
+    assert store.load()[0] == ["a"]
+
+    # or halfway through the urls
+    with open(store.urls_path, "a") as f:
+        f.write("b\nc")
+    urls, loaded = store.load()
+    assert urls == ["a", "b"]
+    np.testing.assert_array_equal(loaded, matrix[:2])
+
+    # the next append drops what the interrupted ones left behind
+    store.append(["d"], matrix[2:] * 10)
+    urls, loaded = store.load()
+    assert urls == ["a", "b", "d"]
+    np.testing.assert_array_equal(loaded, np.vstack([matrix[:2], matrix[2:] * 10]))
+
+
+def test_text_store_round_trip(tmp_path):
+    store = TextStore(str(tmp_path))
+    assert store.put(["a", "b", "c"], ["same page", "other page", "same page"]) == 2
+    assert store.put(["d"], ["same page"]) == 0
+    assert store.put(["a"], ["edited page"]) == 1
+
+    reloaded = TextStore(str(tmp_path))
+    assert len(reloaded) == 4
+    assert reloaded.get("a") == "edited page"
+    assert reloaded.get_many(["d", "missing", "b", "d"]) == [
+        ("d", "same page"), ("b", "other page")
+    ]
+    assert reloaded.get("missing") is None
+
+
+def test_text_store_zlib_without_zstandard(tmp_path, monkeypatch):
+    monkeypatch.setattr(repository_module, "zstandard", None)
+    store = TextStore(str(tmp_path))
+    assert store.codec == "zlib"
+    store.put(["a"], ["page " * 100])
+    assert TextStore(str(tmp_path)).get("a") == "page " * 100
+
+
+def test_text_store_recovers_from_torn_appends(tmp_path):
+    store = TextStore(str(tmp_path))
+    store.put(["a"], ["page a"])
+
+    # blob and hash line written, interrupted halfway through the url line
+    store.put(["b"], ["page b"])
+    with open(store.urls_path, "rb+") as f:
+        f.truncate(f.seek(0, 2) - 5)
+    # a hash line cut short as well
+    with open(store.hashes_path, "a") as f:
+        f.write("abc\t12")
+
+    reloaded = TextStore(str(tmp_path))
+    assert reloaded.urls() == ["a"]
+    assert reloaded.put(["b", "c"], ["page b", "page c"]) == 1
+    assert reloaded.get_many(["a", "b", "c"]) == [
+        ("a", "page a"), ("b", "page b"), ("c", "page c")
+    ]
+    assert TextStore(str(tmp_path)).get_many(["b", "c"]) == [("b", "page b"), ("c", "page c")]
@@ -0,0 +1,53 @@
+import pytest
+import tiktoken
+
+from bsai.src.domain.text import TokenCounter, spread
+
+
+class CharEncoding:
+    """One token per character"""
+
+    def encode(self, text: str, disallowed_special=()) -> list[int]:
+        return [ord(c) for c in text]
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(map(chr, tokens))
+
+
+@pytest.fixture
+def counter(monkeypatch):
+    monkeypatch.setattr(tiktoken, "encoding_for_model", lambda model: CharEncoding())
+    return TokenCounter("test-model")
+
+
+def test_count_and_truncate(counter):
+    assert counter.count("abcdef") == 6
+    assert counter.truncate("abcdef", 3) == "abc"
+    assert counter.truncate("abc", 3) == "abc"
+
+
+def test_split_packs_lines_up_to_the_limit(counter):
+    text = "aaaa\nbbb\ncc\n\ndddddddddd\ne"
+    chunks = counter.split(text, 5)
+    assert chunks == ["aaaa", "bbb", "cc", "ddddd", "ddddd", "e"]
+    assert all(counter.count(chunk) <= 5 for chunk in chunks)
+    assert counter.split("ab\ncd\nef", 5) == ["ab\ncd", "ef"]
+    assert counter.split("", 5) == []
+
+
+def test_falls_back_to_estimates_without_an_encoding(monkeypatch):
+    def unavailable(model):
+        raise ConnectionError("no network")
+
+    monkeypatch.setattr(tiktoken, "encoding_for_model", unavailable)
+    counter = TokenCounter("test-model")
+    assert counter.encoding is None
+    assert counter.count("a" * 40) == 11
+    assert counter.truncate("a" * 40, 5) == "a" * 20
+    assert all(len(chunk) <= 20 for chunk in counter.split("a" * 30 + "\n" + "b" * 8, 5))
+
+
+def test_spread_keeps_first_and_last():
+    assert spread(list(range(10)), 3) == [0, 4, 9]
+    assert spread(list(range(3)), 5) == [0, 1, 2]
+    assert spread(list(range(10)), 1) == [0]
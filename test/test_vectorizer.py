@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from bsai.src.cache import DiskCache
+from bsai.src.domain.openai_vectorizer import OpenAIVectorizer
+from config import settings
+
+
+class FakeEmbeddings:
+    """`get_embeddings` stand-in recording each request's texts"""
+
+    def __init__(self):
+        self.requests = []
+
+    def get_embeddings(self, texts: list[str], model: str) -> list[list[float]]:
+        self.requests.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+@pytest.fixture
+def make_vectorizer(monkeypatch):
+    monkeypatch.setenv("LLM_MODEL", "test-model")
+    monkeypatch.setenv("LLM_TOKEN", "test-token")
+    monkeypatch.delitem(settings.__dict__, "llm", raising=False)
+
+    def make(**kwargs) -> OpenAIVectorizer:
+        vectorizer = OpenAIVectorizer(max_workers=1, **kwargs)
+        vectorizer.llm = FakeEmbeddings()
+        return vectorizer
+
+    yield make
+    settings.__dict__.pop("llm", None)
+
+
+def test_batches_respect_item_and_token_limits(make_vectorizer):
+    vectorizer = make_vectorizer(batch_size=3, max_batch_tokens=10)
+    texts = ["a" * 12, "b" * 12, "c" * 12, "d" * 12, "e" * 30, "f" * 60]
+    # 4 tokens each up to "d", then 8 and 16
+    assert vectorizer._batches(texts) == [texts[:2], texts[2:4], texts[4:5], texts[5:]]
+    assert make_vectorizer(batch_size=2)._batches(list("abcde")) == [
+        ["a", "b"], ["c", "d"], ["e"]
+    ]
+
+
+def test_transform_deduplicates_and_keeps_order(make_vectorizer):
+    vectorizer = make_vectorizer(batch_size=2)
+    vectors = vectorizer.transform(["aa", "b", "aa", "ccc"])
+    assert vectors.dtype == np.float32
+    np.testing.assert_array_equal(vectors[:, 0], [2, 1, 2, 3])
+    assert sorted(text for request in vectorizer.llm.requests for text in request) == [
+        "aa", "b", "ccc"
+    ]
+
+
+def test_cached_embeddings_are_not_requested_again(make_vectorizer, tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"))
+    first = make_vectorizer(cache=cache)
+    expected = first.transform(["a", "bb"])
+
+    second = make_vectorizer(cache=cache)
+    np.testing.assert_array_equal(second.transform(["bb", "ccc", "a"])[[2, 0]], expected)
+    assert second.llm.requests == [["ccc"]]
+    assert second.transform(["a", "bb", "ccc"]).shape == (3, 2)
+    assert second.llm.requests == [["ccc"]]